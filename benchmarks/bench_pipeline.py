@@ -0,0 +1,197 @@
+"""
+End-to-end benchmark of the talk pipeline against local stand-in services.
+
+Starts the fake OpenAI, Tavily and TED endpoints of fake_services.py, points
+the clients at them through the environment, and runs main.process_talk for
+1..N talks on the batch worker pool, with the transcripts prefetched as in
+batch mode unless --no-prefetch is given. Reports throughput, per-operation
+p50/p95 latency and peak RSS, and can compare the run against a saved report
+to catch regressions:
+
+    python benchmarks/bench_pipeline.py --talks 8 --latency 0.2 --json baseline.json
+    python benchmarks/bench_pipeline.py --talks 8 --latency 0.2 --compare baseline.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fake_services import FakeServiceSettings, start_server  # noqa: E402
+
+
+def configure_environment(base_url: str, data_dir: str, stream: bool) -> None:
+    """Point the application at the stand-in services; must run before importing it."""
+    os.environ.update({
+        "OPENAI_API_KEY": "benchmark",
+        "TAVILY_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": f"{base_url}/v1",
+        "TAVILY_BASE_URL": base_url,
+        "TED_BASE_URL": base_url,
+        "SCRAPER_BACKEND": "http",
+        "CACHE_ENABLED": "false",
+        "DATA_DIR": data_dir,
+        "STREAM_OUTPUT": "true" if stream else "false",
+    })
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the pipeline for the requested talks and collect the report."""
+    settings = FakeServiceSettings(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        requests_per_minute=args.rpm,
+        talks=args.talks,
+        talks_per_page=max(args.talks, 1),
+        transcript_words=args.transcript_words,
+        ted_latency=args.ted_latency,
+        stream_interval=args.stream_interval,
+        seed=args.seed,
+    )
+    server = start_server(settings)
+    data_dir = tempfile.mkdtemp(prefix="ted-bench-")
+    configure_environment(f"http://127.0.0.1:{server.server_address[1]}", data_dir, args.stream)
+
+    from config import config
+    from batch import run_batch
+    from main import process_talk
+    from metrics import metrics
+    from ted_scraper import prefetch_transcripts, scrape_ted_talks, talk_slug
+
+    try:
+        talks = scrape_ted_talks()
+        metrics.reset()
+        start = time.perf_counter()
+        talk_numbers = sorted(talks)[:args.talks]
+        transcripts = None
+        if not args.no_prefetch:
+            numbers = {talks[number]["url"]: number for number in talk_numbers}
+            transcripts = ((numbers[url], transcript) for url, transcript in prefetch_transcripts(list(numbers)))
+        results = run_batch(
+            talks,
+            talk_numbers,
+            lambda talk, *transcript: process_talk(
+                talk, config.talk_dir(talk_slug(talk["url"])), quiet=True, transcript=next(iter(transcript), None)
+            ),
+            workers=args.workers,
+            transcripts=transcripts,
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    snapshot = metrics.snapshot()
+    succeeded = sum(1 for result in results if result.status == "ok")
+    return {
+        "settings": {
+            "talks": args.talks,
+            "workers": args.workers,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "rpm": args.rpm,
+            "stream": args.stream,
+            "ted_latency": args.ted_latency,
+            "prefetch": not args.no_prefetch,
+        },
+        "elapsed_seconds": round(elapsed, 6),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "talks_per_minute": round(succeeded / elapsed * 60, 3) if elapsed else 0.0,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "requests": dict(sorted(settings.requests.items())),
+        "timers": {
+            name: {key: stats[key] for key in ("calls", "errors", "p50_seconds", "p95_seconds")}
+            for name, stats in snapshot["timers"].items()
+        },
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Print the benchmark report as a table."""
+    print(
+        f"talks ok={report['succeeded']} failed={report['failed']} "
+        f"elapsed={report['elapsed_seconds']:.2f}s "
+        f"throughput={report['talks_per_minute']:.1f} talks/min "
+        f"peak_rss={report['peak_rss_mb']:.1f}MB"
+    )
+    print(f"{'operation':<28}{'calls':>7}{'errors':>7}{'p50 s':>10}{'p95 s':>10}")
+    for name, stats in sorted(report["timers"].items()):
+        print(
+            f"{name[:27]:<28}{stats['calls']:>7}{stats['errors']:>7}"
+            f"{stats['p50_seconds']:>10.3f}{stats['p95_seconds']:>10.3f}"
+        )
+
+
+def compare_reports(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """List the regressions of a report against a baseline.
+
+    Args:
+        report: The current benchmark report.
+        baseline: A previously saved benchmark report.
+        tolerance: Allowed relative slowdown, e.g. 0.2 for 20%.
+
+    Returns:
+        Descriptions of throughput drops and stage p95 increases beyond the tolerance.
+    """
+    regressions = []
+    if report["talks_per_minute"] < baseline["talks_per_minute"] * (1 - tolerance):
+        regressions.append(
+            f"throughput {report['talks_per_minute']:.1f} < baseline {baseline['talks_per_minute']:.1f} talks/min"
+        )
+    for name, stats in report["timers"].items():
+        before = baseline["timers"].get(name)
+        if not name.startswith("stage.") or not before or not before["p95_seconds"]:
+            continue
+        if stats["p95_seconds"] > before["p95_seconds"] * (1 + tolerance):
+            regressions.append(f"{name} p95 {stats['p95_seconds']:.3f}s > baseline {before['p95_seconds']:.3f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the talk pipeline against local stand-in services")
+    parser.add_argument("--talks", type=int, default=4, help="Number of talks processed")
+    parser.add_argument("--workers", type=int, default=4, help="Number of talks processed concurrently")
+    parser.add_argument("--latency", type=float, default=0.1, help="Base delay of API responses in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Maximum extra random delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API requests failing with 500")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute quota of each API endpoint")
+    parser.add_argument("--transcript-words", type=int, default=1500, help="Length of each talk's transcript")
+    parser.add_argument("--stream", action="store_true", help="Stream chat completions")
+    parser.add_argument("--ted-latency", type=float, default=0.0, help="Delay of TED talk pages and subtitles")
+    parser.add_argument(
+        "--no-prefetch", action="store_true", help="Download each transcript in its talk's worker instead"
+    )
+    parser.add_argument("--stream-interval", type=float, default=0.0, help="Delay between streamed chunks")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the simulated delays and errors")
+    parser.add_argument("--json", metavar="PATH", help="Write the report as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="Baseline report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown against the baseline")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare_reports(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Benchmark of the talk listing scraper backends.
+
+Compares the plain-HTTP backend with the Selenium backend on wall time and
+peak memory. The Selenium backend keeps its browsers pooled for the process,
+so only the first run pays the browser startup.
+
+With --fixture, saved listing pages are served from a local HTTP server so
+that both backends run offline against the same HTML; without paths, the
+committed fixtures of benchmarks/fixtures are used. --check verifies the
+listing and talk page parsers against these fixtures: a listing page with the
+embedded Next.js JSON payload, one with rendered talk cards only, and two talk
+pages.
+
+    python benchmarks/bench_scrapers.py --check
+    python benchmarks/bench_scrapers.py --fixture --runs 5
+    python benchmarks/bench_scrapers.py --save-fixture page1.html
+    python benchmarks/bench_scrapers.py --fixture page1.html --runs 5
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from config import config  # noqa: E402
+import ted_scraper  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+LISTING_FIXTURES = ["listing_next_data.html", "listing_cards.html"]
+FIXTURE_BASE_URL = "https://www.ted.com"
+
+
+def _read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def check_fixtures() -> bool:
+    """Check the listing and talk page parsers against the committed fixtures.
+
+    Returns:
+        True if every check passed.
+    """
+    expected = json.loads(_read_fixture("expected_talks.json"))
+    untitled_url = expected[3]["url"]
+    checks = [
+        (
+            "Next.js JSON listing",
+            ted_scraper.parse_listing_html(_read_fixture("listing_next_data.html"), FIXTURE_BASE_URL),
+            expected,
+        ),
+        (
+            "talk card listing",
+            ted_scraper.parse_listing_html(_read_fixture("listing_cards.html"), FIXTURE_BASE_URL),
+            expected,
+        ),
+        (
+            "talk page",
+            ted_scraper.parse_talk_page(_read_fixture("talk_page.html"), expected[1]["url"]),
+            expected[1],
+        ),
+        (
+            "talk page without title",
+            ted_scraper.parse_talk_page(_read_fixture("talk_page_untitled.html"), untitled_url),
+            {"url": untitled_url, "speaker": "Mei Tanaka", "title": "Mei tanaka design for the ocean s future"},
+        ),
+    ]
+
+    passed = True
+    for name, actual, wanted in checks:
+        if actual == wanted:
+            print(f"ok      {name}")
+        else:
+            passed = False
+            print(f"FAILED  {name}\n  expected: {wanted}\n  actual:   {actual}")
+    return passed
+
+
+def serve_fixtures(paths: List[str]) -> ThreadingHTTPServer:
+    """Serve saved listing pages as /talks?page=N on a local port."""
+    pages = []
+    for path in paths:
+        with open(path, "rb") as f:
+            pages.append(f.read())
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            page = int(parse_qs(url.query).get("page", ["1"])[0])
+            if url.path.rstrip("/") != "/talks" or not 1 <= page <= len(pages):
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(pages[page - 1])))
+            self.end_headers()
+            self.wfile.write(pages[page - 1])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_backend(backend: str, pages: int, runs: int) -> None:
+    """Run a backend several times and print time, memory and talk count."""
+    times = []
+    talks = {}
+    tracemalloc.start()
+    children_rss_before = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    for _ in range(runs):
+        start = time.perf_counter()
+        talks = ted_scraper.scrape_with_backend(backend, pages)
+        times.append(time.perf_counter() - start)
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+    print(
+        f"{backend:<10} talks={len(talks):<4} "
+        f"median={statistics.median(times):7.3f}s min={min(times):7.3f}s "
+        f"python_peak={python_peak / 1024 / 1024:7.1f}MB "
+        f"child_peak_rss={max(children_rss, children_rss_before) / 1024:7.1f}MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the TED listing scraper backends")
+    parser.add_argument(
+        "--fixture", nargs="*", default=None,
+        help="Saved listing pages, in page order; the committed fixtures if no path is given",
+    )
+    parser.add_argument("--check", action="store_true", help="Check the parsers against the fixtures and exit")
+    parser.add_argument("--save-fixture", help="Download the first listing page to this path and exit")
+    parser.add_argument("--backends", nargs="*", default=list(ted_scraper.SCRAPER_BACKENDS))
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if check_fixtures() else 1)
+
+    if args.save_fixture:
+        response = ted_scraper.clients.http().get(
+            ted_scraper.listing_url(1), headers={"User-Agent": config.SCRAPER_USER_AGENT}, timeout=config.HTTP_TIMEOUT
+        )
+        response.raise_for_status()
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_fixture)), exist_ok=True)
+        with open(args.save_fixture, "w", encoding="utf-8") as f:
+            f.write(response.text)
+        print(f"Saved {len(ted_scraper.parse_listing_html(response.text))} talks to {args.save_fixture}")
+        return
+
+    server = None
+    if args.fixture is not None:
+        args.fixture = args.fixture or [os.path.join(FIXTURE_DIR, name) for name in LISTING_FIXTURES]
+        server = serve_fixtures(args.fixture)
+        config.TED_BASE_URL = f"http://127.0.0.1:{server.server_address[1]}"
+        args.pages = min(args.pages, len(args.fixture)) or len(args.fixture)
+
+    try:
+        for backend in args.backends:
+            bench_backend(backend, args.pages, args.runs)
+    finally:
+        if server:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Cold-start benchmark of the command-line interface.
+
+Runs CLI invocations that should return without touching the heavy
+dependencies (--help, an argument error, and listing talks from a warm
+listing cache) in fresh interpreters. Reports the median wall time of each
+command and the heavy modules it imported (as reported by -X importtime),
+and can compare the run against a saved report to catch regressions:
+
+    python benchmarks/bench_startup.py --runs 10 --json startup.json
+    python benchmarks/bench_startup.py --runs 10 --compare startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pipeline import configure_environment  # noqa: E402
+from fake_services import FakeServiceSettings, start_server  # noqa: E402
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "main.py")
+
+# Modules that only the commands calling external services should import
+HEAVY_MODULES = ("openai", "tavily", "yt_dlp", "selenium", "httpx", "requests", "numpy")
+
+COMMANDS = {
+    "help": ["--help"],
+    "bad_argument": ["process", "--talk_number", "not-a-number"],
+    "list_cached": ["list"],
+}
+
+
+def heavy_imports(importtime_output: str) -> List[str]:
+    """Return the heavy top-level packages listed in -X importtime output."""
+    found = set()
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        module = line.rsplit("|", 1)[-1].strip()
+        if module.split(".")[0] in HEAVY_MODULES:
+            found.add(module.split(".")[0])
+    return sorted(found)
+
+
+def time_command(args: List[str], runs: int) -> Dict[str, Any]:
+    """Run a CLI command in fresh interpreters and collect its timings.
+
+    Args:
+        args: The command-line arguments of main.py.
+        runs: Number of timed runs.
+
+    Returns:
+        Median and minimum wall time in seconds and the heavy modules imported.
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, MAIN] + args, capture_output=True)
+        timings.append(time.perf_counter() - start)
+    traced = subprocess.run([sys.executable, "-X", "importtime", MAIN] + args, capture_output=True, text=True)
+    return {
+        "median_seconds": round(statistics.median(timings), 6),
+        "min_seconds": round(min(timings), 6),
+        "heavy_imports": heavy_imports(traced.stderr),
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """Time the CLI commands against the local stand-in services."""
+    server = start_server(FakeServiceSettings(talks=args.talks, talks_per_page=args.talks))
+    data_dir = tempfile.mkdtemp(prefix="ted-startup-")
+    configure_environment(f"http://127.0.0.1:{server.server_address[1]}", data_dir, stream=False)
+    os.environ.update({"CACHE_ENABLED": "true", "CACHE_DIR": os.path.join(data_dir, "cache")})
+
+    try:
+        # Warm the listing cache; the timed runs must not scrape
+        subprocess.run([sys.executable, MAIN, "list"], capture_output=True, check=True)
+        commands = {name: time_command(argv, args.runs) for name, argv in COMMANDS.items()}
+    finally:
+        server.shutdown()
+
+    baseline_timings = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], capture_output=True)
+        baseline_timings.append(time.perf_counter() - start)
+
+    return {
+        "settings": {"runs": args.runs, "python": sys.version.split()[0]},
+        "interpreter_seconds": round(statistics.median(baseline_timings), 6),
+        "commands": commands,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Print the benchmark report as a table."""
+    print(f"bare interpreter startup: {report['interpreter_seconds']:.3f}s")
+    print(f"{'command':<16}{'median s':>10}{'min s':>10}  heavy imports")
+    for name, stats in report["commands"].items():
+        heavy = ", ".join(stats["heavy_imports"]) or "-"
+        print(f"{name:<16}{stats['median_seconds']:>10.3f}{stats['min_seconds']:>10.3f}  {heavy}")
+
+
+def compare_reports(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """List the regressions of a report against a baseline.
+
+    Args:
+        report: The current benchmark report.
+        baseline: A previously saved benchmark report.
+        tolerance: Allowed relative slowdown, e.g. 0.2 for 20%.
+
+    Returns:
+        Descriptions of commands that became slower beyond the tolerance or
+        started importing heavy modules.
+    """
+    regressions = []
+    for name, stats in report["commands"].items():
+        before = baseline["commands"].get(name)
+        if not before:
+            continue
+        if stats["median_seconds"] > before["median_seconds"] * (1 + tolerance):
+            regressions.append(
+                f"{name} median {stats['median_seconds']:.3f}s > baseline {before['median_seconds']:.3f}s"
+            )
+        new_imports = sorted(set(stats["heavy_imports"]) - set(before["heavy_imports"]))
+        if new_imports:
+            regressions.append(f"{name} now imports {', '.join(new_imports)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cold start of the command-line interface")
+    parser.add_argument("--runs", type=int, default=5, help="Number of timed runs per command")
+    parser.add_argument("--talks", type=int, default=24, help="Number of talks in the fake listing")
+    parser.add_argument("--json", metavar="PATH", help="Write the report as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="Baseline report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed relative slowdown against the baseline")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare_reports(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
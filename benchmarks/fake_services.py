@@ -0,0 +1,604 @@
+"""
+Local stand-ins for the OpenAI, Tavily and TED endpoints used by the pipeline.
+
+A single threaded HTTP server answers:
+- OpenAI:  POST /v1/chat/completions (blocking or SSE streamed), /v1/audio/speech,
+           /v1/images/generations and /v1/embeddings; the Batch API's POST /v1/files,
+           POST /v1/batches, GET /v1/batches/<id> and GET /v1/files/<id>/content
+- Tavily:  POST /search
+- TED:     GET /talks?page=N listing cards, /talks/<slug> pages with a subtitle
+           track, /subs/<slug>.vtt subtitles and /media/<name> downloads
+
+Every API response is delayed by a configurable latency plus uniform jitter,
+and fails with HTTP 500 at a configurable error rate; TED talk pages and
+subtitles can be delayed separately to model the site's latency. An optional per-endpoint
+requests-per-minute quota answers excess requests with HTTP 429, Retry-After
+and x-ratelimit-* headers, so that concurrency, retries, rate limiting and
+streaming can be measured without spending API credits. Point the
+clients at it through OPENAI_BASE_URL, TAVILY_BASE_URL and TED_BASE_URL:
+
+    python benchmarks/fake_services.py --port 8765 --latency 0.2 --jitter 0.1
+"""
+
+import argparse
+import base64
+import hashlib
+import html
+import json
+import math
+import random
+import struct
+import threading
+import time
+import uuid
+from collections import deque
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+WORDS = (
+    "ideas change the world when people share them openly curiosity drives "
+    "science and art forward every small step matters communities grow "
+    "stronger through trust and learning never really stops"
+).split()
+
+# Minimal valid 1x1 PNG served as the generated image
+PNG_PIXEL = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+
+class FakeServiceSettings:
+    """Behaviour of the stand-in services."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        requests_per_minute: int = 0,
+        talks: int = 12,
+        talks_per_page: int = 12,
+        transcript_words: int = 1500,
+        response_words: int = 120,
+        stream_chunk_words: int = 4,
+        stream_interval: float = 0.0,
+        audio_bytes_per_char: int = 40,
+        batch_delay: float = 1.0,
+        ted_latency: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        """Initialize the settings.
+
+        Args:
+            latency: Base delay of every API response in seconds.
+            jitter: Upper bound of a uniformly random extra delay in seconds.
+            error_rate: Fraction of API requests answered with HTTP 500.
+            requests_per_minute: Quota of each API endpoint; 0 for none.
+            talks: Number of talks in the listing.
+            talks_per_page: Number of talk cards per listing page.
+            transcript_words: Number of words of each talk's subtitles.
+            response_words: Number of words of each chat completion.
+            stream_chunk_words: Number of words per streamed chat chunk.
+            stream_interval: Delay between streamed chat chunks in seconds.
+            audio_bytes_per_char: Size of the generated audio per input character.
+            batch_delay: Seconds until a submitted batch completes.
+            ted_latency: Delay of the TED talk pages and subtitles in seconds.
+            seed: Seed of the random delays and errors, for repeatable runs.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests_per_minute = requests_per_minute
+        self.talks = talks
+        self.talks_per_page = talks_per_page
+        self.transcript_words = transcript_words
+        self.response_words = response_words
+        self.stream_chunk_words = stream_chunk_words
+        self.stream_interval = stream_interval
+        self.audio_bytes_per_char = audio_bytes_per_char
+        self.batch_delay = batch_delay
+        self.ted_latency = ted_latency
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.windows: Dict[str, Deque[float]] = {}
+
+    def count(self, endpoint: str) -> None:
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def delay(self) -> float:
+        with self.lock:
+            return self.latency + self.random.uniform(0, self.jitter)
+
+    def quota(self, endpoint: str) -> Tuple[bool, Dict[str, str]]:
+        """Charge a request to the endpoint's sliding one-minute quota.
+
+        Returns:
+            Whether the request is allowed, and the rate limit headers to send.
+        """
+        if not self.requests_per_minute:
+            return True, {}
+        now = time.monotonic()
+        with self.lock:
+            window = self.windows.setdefault(endpoint, deque())
+            while window and now - window[0] >= 60:
+                window.popleft()
+            allowed = len(window) < self.requests_per_minute
+            if allowed:
+                window.append(now)
+            reset = 60 - (now - window[0]) if window else 0.0
+            remaining = self.requests_per_minute - len(window)
+        headers = {
+            "x-ratelimit-limit-requests": str(self.requests_per_minute),
+            "x-ratelimit-remaining-requests": str(remaining),
+            "x-ratelimit-reset-requests": f"{reset:.3f}s",
+        }
+        if not allowed:
+            headers["retry-after-ms"] = str(int(reset * 1000))
+            headers["retry-after"] = str(max(1, round(reset)))
+        return allowed, headers
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+
+def talk_slug(number: int) -> str:
+    """Return the slug of the n-th fake talk (1-based)."""
+    return f"fake_speaker_{number}_benchmark_talk"
+
+
+def _text(words: int, offset: int = 0) -> str:
+    sentences = []
+    for start in range(0, words, 12):
+        chunk = [WORDS[(offset + i) % len(WORDS)] for i in range(start, min(start + 12, words))]
+        sentences.append(" ".join(chunk).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def _timestamp(seconds: float) -> str:
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{seconds:06.3f}"
+
+
+def listing_page(settings: FakeServiceSettings, page: int) -> str:
+    """Render a listing page in the card markup of the TED site."""
+    first = (page - 1) * settings.talks_per_page + 1
+    last = min(settings.talks, first + settings.talks_per_page - 1)
+    cards = []
+    for number in range(first, last + 1):
+        cards.append(
+            '<div class="xs-tui:col-span-1"><div>'
+            f'<a href="/talks/{talk_slug(number)}"><span class="subheader2">'
+            f"Benchmark talk {number}</span></a>"
+            f'<p class="text-textTertiary-onLight">Fake Speaker {number}</p>'
+            "</div></div>"
+        )
+    return f"<html><head><title>Talks</title></head><body>{''.join(cards)}</body></html>"
+
+
+def talk_page(slug: str) -> str:
+    """Render a talk page whose video carries an English subtitle track."""
+    number = "".join(char for char in slug if char.isdigit())
+    heading = html.escape(f"Fake Speaker {number}: Benchmark talk {number} | TED Talk", quote=True)
+    return (
+        f'<html><head><title>{heading}</title><meta property="og:title" content="{heading}">'
+        "</head><body><video controls>"
+        f'<source src="/media/{slug}.mp4" type="video/mp4">'
+        f'<track kind="subtitles" srclang="en" src="/subs/{slug}.vtt"></video></body></html>'
+    )
+
+
+def subtitles(settings: FakeServiceSettings, slug: str) -> str:
+    """Render rolling WebVTT captions of the configured transcript length."""
+    lines = ["WEBVTT", "Kind: captions", "Language: en", ""]
+    words = _text(settings.transcript_words, offset=len(slug)).split()
+    previous = ""
+    for cue, start in enumerate(range(0, len(words), 8)):
+        line = " ".join(words[start:start + 8])
+        begin = cue * 2.0
+        lines += [str(cue + 1), f"{_timestamp(begin)} --> {_timestamp(begin + 2.0)}"]
+        # Rolling captions repeat the previous line above the new one
+        lines += [previous, line, ""] if previous else [line, ""]
+        previous = line
+    return "\n".join(lines)
+
+
+def chat_answer(
+    settings: FakeServiceSettings, messages: List[Dict[str, Any]], response_format: Optional[Dict[str, Any]] = None
+) -> str:
+    """Compose a deterministic answer shaped like the one the prompt or JSON schema asks for."""
+    system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+    user = next((m.get("content", "") for m in messages if m.get("role") == "user"), "")
+    if response_format and response_format.get("type") == "json_schema":
+        properties = response_format["json_schema"]["schema"].get("properties", {})
+        return json.dumps({
+            name: [f"benchmark query {i + 1} {WORDS[i % len(WORDS)]}" for i in range(3)]
+            if spec.get("type") == "array"
+            else _text(settings.response_words, offset=len(system) + len(user) + idx)
+            for idx, (name, spec) in enumerate(properties.items())
+        })
+    if "JSON array" in system:
+        return json.dumps([f"benchmark query {i + 1} {WORDS[i % len(WORDS)]}" for i in range(3)])
+    return _text(settings.response_words, offset=len(system) + len(user))
+
+
+def embedding(text: str, dim: int = 64) -> List[float]:
+    """Embed text as a normalized hashed bag of words, so that texts sharing words are similar."""
+    vector = [0.0] * dim
+    for word in text.lower().split():
+        digest = hashlib.md5(word.strip(".,;:!?\"'").encode()).digest()
+        vector[digest[0] % dim] += 1.0 if digest[1] % 2 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+def _usage(messages: List[Dict[str, Any]], answer: str) -> Dict[str, int]:
+    prompt = sum(len(str(m.get("content", ""))) for m in messages) // 4
+    completion = len(answer) // 4
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+def _completion(model: str, messages: List[Dict[str, Any]], answer: str) -> Dict[str, Any]:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": answer},
+            "finish_reason": "stop",
+        }],
+        "usage": _usage(messages, answer),
+    }
+
+
+def run_batch(settings: FakeServiceSettings, batch_id: str) -> None:
+    """Answer the requests of a batch after the configured delay.
+
+    Requests fail individually at the configured error rate and are then
+    written to the batch's error file.
+    """
+    with settings.lock:
+        batch = settings.batches[batch_id]
+        batch["status"] = "in_progress"
+        lines = settings.files[batch["input_file_id"]].decode("utf-8").splitlines()
+    time.sleep(settings.batch_delay)
+
+    outputs, errors = [], []
+    for line in lines:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        body = request.get("body") or {}
+        entry = {"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": request["custom_id"]}
+        if settings.should_fail():
+            errors.append({**entry, "response": None, "error": {"code": "server_error", "message": "Simulated error"}})
+            continue
+        messages = body.get("messages") or []
+        answer = chat_answer(settings, messages, body.get("response_format"))
+        outputs.append({
+            **entry,
+            "response": {"status_code": 200, "request_id": uuid.uuid4().hex, "body": _completion(
+                body.get("model", "fake-model"), messages, answer
+            )},
+            "error": None,
+        })
+
+    with settings.lock:
+        for kind, entries in (("output_file_id", outputs), ("error_file_id", errors)):
+            if entries:
+                file_id = f"file-{uuid.uuid4().hex[:12]}"
+                settings.files[file_id] = "".join(json.dumps(entry) + "\n" for entry in entries).encode("utf-8")
+                batch[kind] = file_id
+        batch["request_counts"] = {"total": len(outputs) + len(errors), "completed": len(outputs), "failed": len(errors)}
+        batch["status"] = "completed"
+        batch["completed_at"] = int(time.time())
+
+
+def make_handler(settings: FakeServiceSettings) -> type:
+    """Create the request handler class bound to the given settings."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in self.extra_headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, payload: Any, status: int = 200) -> None:
+            self._send(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+        def _simulate(self, endpoint: str) -> bool:
+            """Count, delay and possibly fail an API request; False if it failed."""
+            settings.count(endpoint)
+            allowed, self.extra_headers = settings.quota(endpoint)
+            if not allowed:
+                settings.count(f"{endpoint}.throttled")
+                self._json({"error": {"message": "Rate limit reached", "type": "requests"}}, 429)
+                return False
+            time.sleep(settings.delay())
+            if settings.should_fail():
+                self._json({"error": {"message": "Simulated server error", "type": "server_error"}}, 500)
+                return False
+            return True
+
+        def _body(self) -> Dict[str, Any]:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b"{}"
+            try:
+                return json.loads(raw or b"{}")
+            except json.JSONDecodeError:
+                return {}
+
+        def do_GET(self):
+            self.extra_headers = {}
+            url = urlparse(self.path)
+            path = url.path.rstrip("/")
+            if path.startswith("/v1/batches/"):
+                settings.count("openai.batch_poll")
+                with settings.lock:
+                    batch = settings.batches.get(path.rsplit("/", 1)[-1])
+                    payload = dict(batch) if batch else None
+                if payload is None:
+                    self._json({"error": {"message": "No such batch"}}, 404)
+                else:
+                    self._json(payload)
+            elif path.startswith("/v1/files/") and path.endswith("/content"):
+                settings.count("openai.file_content")
+                with settings.lock:
+                    content = settings.files.get(path.split("/")[3])
+                if content is None:
+                    self._json({"error": {"message": "No such file"}}, 404)
+                else:
+                    self._send(200, content, "application/jsonl")
+            elif path == "/talks":
+                settings.count("ted.listing")
+                page = int(parse_qs(url.query).get("page", ["1"])[0])
+                self._send(200, listing_page(settings, page).encode("utf-8"), "text/html; charset=utf-8")
+            elif path.startswith("/talks/"):
+                settings.count("ted.talk")
+                time.sleep(settings.ted_latency)
+                self._send(200, talk_page(path.rsplit("/", 1)[-1]).encode("utf-8"), "text/html; charset=utf-8")
+            elif path.startswith("/subs/") and path.endswith(".vtt"):
+                settings.count("ted.subtitles")
+                time.sleep(settings.ted_latency)
+                slug = path[len("/subs/"):-len(".vtt")]
+                self._send(200, subtitles(settings, slug).encode("utf-8"), "text/vtt; charset=utf-8")
+            elif path.startswith("/media/") and path.endswith(".png"):
+                settings.count("media.image")
+                self._send(200, PNG_PIXEL, "image/png")
+            else:
+                self._send(404, b"Not found", "text/plain")
+
+        def do_POST(self):
+            self.extra_headers = {}
+            path = urlparse(self.path).path.rstrip("/")
+            if path.endswith("/v1/files"):
+                if self._simulate("openai.files"):
+                    self._upload()
+                return
+            body = self._body()
+            if path.endswith("/v1/batches"):
+                if self._simulate("openai.batches"):
+                    self._create_batch(body)
+            elif path.endswith("/chat/completions"):
+                if self._simulate("openai.chat"):
+                    self._chat(body)
+            elif path.endswith("/audio/speech"):
+                if self._simulate("openai.tts"):
+                    size = max(1, len(body.get("input", ""))) * settings.audio_bytes_per_char
+                    self._send(200, b"\xff\xfb" + bytes(size - 2 if size > 2 else 0), "audio/mpeg")
+            elif path.endswith("/images/generations"):
+                if self._simulate("openai.image"):
+                    host = self.headers.get("Host") or f"127.0.0.1:{self.server.server_address[1]}"
+                    self._json({"created": int(time.time()), "data": [{"url": f"http://{host}/media/image.png"}]})
+            elif path.endswith("/embeddings"):
+                if self._simulate("openai.embeddings"):
+                    self._embeddings(body)
+            elif path == "/search":
+                if self._simulate("tavily.search"):
+                    query = body.get("query", "")
+                    count = int(body.get("max_results") or 5)
+                    self._json({
+                        "query": query,
+                        "response_time": settings.latency,
+                        "results": [
+                            {
+                                "title": f"Result {i + 1} for {query}",
+                                "url": f"https://example.com/{abs(hash(query)) % 10000}/{i + 1}",
+                                "content": _text(40, offset=i),
+                                "score": round(1 - i / (count + 1), 3),
+                            }
+                            for i in range(count)
+                        ],
+                    })
+            else:
+                self._send(404, b"Not found", "text/plain")
+
+        def _embeddings(self, body: Dict[str, Any]) -> None:
+            texts = body.get("input", [])
+            texts = [texts] if isinstance(texts, str) else texts
+            data = []
+            for idx, text in enumerate(texts):
+                vector = embedding(text)
+                if body.get("encoding_format") == "base64":
+                    vector = base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode()
+                data.append({"object": "embedding", "index": idx, "embedding": vector})
+            tokens = sum(len(text) for text in texts) // 4
+            self._json({
+                "object": "list",
+                "data": data,
+                "model": body.get("model"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            })
+
+        def _upload(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            message = BytesParser(policy=default_policy).parsebytes(
+                f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode() + raw
+            )
+            fields = {
+                part.get_param("name", header="content-disposition"): part
+                for part in message.iter_parts()
+            }
+            upload = fields.get("file")
+            if upload is None:
+                self._json({"error": {"message": "Missing file"}}, 400)
+                return
+            content = upload.get_payload(decode=True) or b""
+            purpose = fields["purpose"].get_content().strip() if "purpose" in fields else "batch"
+            file_id = f"file-{uuid.uuid4().hex[:12]}"
+            with settings.lock:
+                settings.files[file_id] = content
+            self._json({
+                "id": file_id,
+                "object": "file",
+                "bytes": len(content),
+                "created_at": int(time.time()),
+                "filename": upload.get_filename() or "input.jsonl",
+                "purpose": purpose,
+                "status": "processed",
+            })
+
+        def _create_batch(self, body: Dict[str, Any]) -> None:
+            with settings.lock:
+                if body.get("input_file_id") not in settings.files:
+                    batch = None
+                else:
+                    batch = {
+                        "id": f"batch_{uuid.uuid4().hex[:12]}",
+                        "object": "batch",
+                        "endpoint": body.get("endpoint"),
+                        "input_file_id": body["input_file_id"],
+                        "completion_window": body.get("completion_window", "24h"),
+                        "status": "validating",
+                        "created_at": int(time.time()),
+                        "output_file_id": None,
+                        "error_file_id": None,
+                        "errors": None,
+                        "request_counts": {"total": 0, "completed": 0, "failed": 0},
+                        "metadata": body.get("metadata"),
+                    }
+                    settings.batches[batch["id"]] = batch
+                    payload = dict(batch)
+            if batch is None:
+                self._json({"error": {"message": "No such input file"}}, 400)
+                return
+            threading.Thread(target=run_batch, args=(settings, batch["id"]), daemon=True).start()
+            self._json(payload)
+
+        def _chat(self, body: Dict[str, Any]) -> None:
+            messages = body.get("messages") or []
+            model = body.get("model", "fake-model")
+            answer = chat_answer(settings, messages, body.get("response_format"))
+            created = int(time.time())
+            if not body.get("stream"):
+                self._json(_completion(model, messages, answer))
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            for name, value in self.extra_headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+
+            def event(payload: Any) -> None:
+                data = b"data: " + (payload if isinstance(payload, bytes) else json.dumps(payload).encode()) + b"\n\n"
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            words = answer.split(" ")
+            step = max(1, settings.stream_chunk_words)
+            for start in range(0, len(words), step):
+                delta = " ".join(words[start:start + step]) + (" " if start + step < len(words) else "")
+                event({
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}],
+                })
+                if settings.stream_interval:
+                    time.sleep(settings.stream_interval)
+            if (body.get("stream_options") or {}).get("include_usage"):
+                event({
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [],
+                    "usage": _usage(messages, answer),
+                })
+            event(b"[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def start_server(settings: FakeServiceSettings, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Start the stand-in services on a background thread.
+
+    Args:
+        settings: Behaviour of the services.
+        host: Interface to listen on.
+        port: Port to listen on; 0 picks a free port.
+
+    Returns:
+        The running server; call shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(settings))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-ins for the OpenAI, Tavily and TED endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Base delay of API responses in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum extra random delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API requests failing with 500")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute quota of each API endpoint")
+    parser.add_argument("--talks", type=int, default=12, help="Number of talks in the listing")
+    parser.add_argument("--batch-delay", type=float, default=1.0, help="Seconds until a submitted batch completes")
+    parser.add_argument("--ted-latency", type=float, default=0.0, help="Delay of TED talk pages and subtitles")
+    args = parser.parse_args()
+
+    settings = FakeServiceSettings(
+        args.latency, args.jitter, args.error_rate, args.rpm, talks=args.talks, batch_delay=args.batch_delay,
+        ted_latency=args.ted_latency,
+    )
+    server = start_server(settings, args.host, args.port)
+    base = f"http://{args.host}:{server.server_address[1]}"
+    print(f"OPENAI_BASE_URL={base}/v1\nTAVILY_BASE_URL={base}\nTED_BASE_URL={base}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
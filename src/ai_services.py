@@ -2,23 +2,150 @@
 AI services for OpenAI API interactions.
 
 This module provides cached AI services including:
-- Chat completions for text processing
+- Chat completions for text processing, blocking or streamed
 - Text-to-speech conversion
 - Image generation using OpenAI image generators
+- Batched text embeddings for the semantic index
 
-All functions utilize LRU caching where applicable to optimize API usage.
+All calls share the clients of clients.py and the rate limiter of rate_limit.py.
+Chat and speech results are also persisted in the on-disk cache of cache.py.
 """
 
-import requests
+import json
+import os
 from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
 
-from openai import OpenAI
-
+from cache import DiskCache, audio_cache, chat_cache
+from clients import clients
 from config import config
+from metrics import metrics
+from rate_limit import limiter
+from retry import retry_call
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _chat_messages(system_message: str, speaker: str, title: str, text: str) -> List[Dict[str, str]]:
+    """Build the chat messages of a request."""
+    return [
+        {
+            "role": "system",
+            "content": system_message
+        },
+        {
+            "role": "user",
+            "content": f"Here is the text for TED Talk with the title {title} by {speaker}:\\n\\n" + text
+        }
+    ]
+
+
+def chat_request_body(
+    system_message: str, speaker: str, title: str, text: str, model: Optional[str] = None
+) -> Dict[str, Any]:
+    """Build the body of a chat completion request, e.g. for a Batch API input file.
+
+    Args:
+        system_message: The system message for the AI model.
+        speaker: The speaker's name.
+        title: The title of the talk.
+        text: The text content to process.
+        model: The chat model; defaults to CHAT_MODEL.
+
+    Returns:
+        The request body.
+    """
+    return {
+        "model": model or config.CHAT_MODEL,
+        "messages": _chat_messages(system_message, speaker, title, text),
+    }
+
+
+def _chat_cache_key(system_message: str, speaker: str, title: str, text: str, model: Optional[str] = None) -> str:
+    return DiskCache.make_key(model or config.CHAT_MODEL, system_message, speaker, title, text)
+
+
+def cached_chat_response(
+    system_message: str, speaker: str, title: str, text: str, model: Optional[str] = None
+) -> Optional[str]:
+    """Return the cached chat response of a request, if any."""
+    return chat_cache.get_text(_chat_cache_key(system_message, speaker, title, text, model))
+
+
+def store_chat_response(
+    system_message: str, speaker: str, title: str, text: str, output: str, model: Optional[str] = None
+) -> None:
+    """Store a chat response obtained elsewhere (e.g. from the Batch API) in the chat cache."""
+    chat_cache.set_text(_chat_cache_key(system_message, speaker, title, text, model), output)
+
+
+def _limited(endpoint: str, func: Callable[[], Any], tokens: float = 0) -> Any:
+    """Call an OpenAI endpoint within its rate limit, retrying throttled calls.
+
+    Args:
+        endpoint: The rate limited endpoint ("chat", "tts", "images" or "embeddings").
+        func: Callable performing the request.
+        tokens: Estimated tokens of the request.
+
+    Returns:
+        The callable's return value.
+    """
+    from openai import RateLimitError
+
+    def attempt() -> Any:
+        with limiter.slot(endpoint, tokens):
+            return func()
+
+    return retry_call(
+        attempt,
+        retries=config.RATE_LIMIT_RETRIES,
+        retry_on=(RateLimitError,),
+        on_retry=lambda attempt, error: metrics.add("retries", operation=f"openai.{endpoint}"),
+    )
+
+
+def _estimate_tokens(*texts: str) -> int:
+    """Roughly estimate the prompt tokens of a request (about 4 characters per token)."""
+    return sum(len(text) for text in texts) // 4
+
+
+def record_cost(model: str, units: float, output_units: float = 0, scale: float = 1e-6) -> None:
+    """Add the price of a call to the cost_usd counter of the current stage and model.
+
+    Args:
+        model: The model that served the call; models without a MODEL_PRICES entry are not counted.
+        units: Input tokens, TTS characters or generated images.
+        output_units: Output tokens of chat calls.
+        scale: Factor applied to the prices, which are per million units except for images.
+    """
+    price = config.MODEL_PRICES.get(model)
+    if price is None:
+        return
+    cost = (units * price[0] + output_units * price[1]) * scale
+    metrics.add("cost_usd", cost, stage=metrics.current_stage(), model=model)
+
+
+def _record_usage(usage: Any, model: str) -> None:
+    """Count the prompt and completion tokens reported by the API and their cost."""
+    if usage is None:
+        return
+    metrics.add("openai_prompt_tokens", usage.prompt_tokens or 0, model=model)
+    # Embedding responses report no completion tokens
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if completion_tokens is not None:
+        metrics.add("openai_completion_tokens", completion_tokens or 0, model=model)
+    record_cost(model, usage.prompt_tokens or 0, completion_tokens or 0)
 
 
 @lru_cache(maxsize=config.CACHE_SIZE)
-def get_openai_response(system_message: str, speaker: str, title: str, text: str) -> str:
+def get_openai_response(
+    system_message: str,
+    speaker: str,
+    title: str,
+    text: str,
+    model: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> str:
     """Get OpenAI response.
     
     Args:
@@ -26,34 +153,201 @@ def get_openai_response(system_message: str, speaker: str, title: str, text: str
         speaker: The speaker's name.
         title: The title of the talk.
         text: The text content to process.
+        model: The chat model; defaults to CHAT_MODEL.
+        timeout: Optional deadline of the request in seconds; the request is
+            then not retried by the client (see routing.py).
         
     Returns:
         The AI model's response.
         
     Raises:
         ValueError: If OpenAI returns an empty response.
+        openai.APITimeoutError: If the request exceeds the timeout.
     """
-    llm = OpenAI(api_key=config.OPENAI_API_KEY)
-    response = llm.chat.completions.create(
-        model=config.CHAT_MODEL,
-        messages=[
-            {
-                "role": "system",
-                "content": system_message
-            },
-            {
-                "role": "user",
-                "content": f"Here is the text for TED Talk with the title {title} by {speaker}:\\n\\n" + text
-            }
-        ]
-    )
+    model = model or config.CHAT_MODEL
+    cache_key = _chat_cache_key(system_message, speaker, title, text, model)
+    cached = chat_cache.get_text(cache_key)
+    if cached is not None:
+        return cached
+
+    llm = clients.openai()
+    if timeout is not None:
+        llm = llm.with_options(timeout=timeout, max_retries=0)
+
+    def create() -> Any:
+        with metrics.timer("openai.chat"):
+            return llm.chat.completions.create(
+                model=model,
+                messages=_chat_messages(system_message, speaker, title, text)
+            )
+
+    response = _limited("chat", create, _estimate_tokens(system_message, text))
+    _record_usage(response.usage, model)
     output = response.choices[0].message.content
     if output is None:
         raise ValueError(f"OpenAI returned empty response for {title}")
     
+    chat_cache.set_text(cache_key, output)
+    return output
+
+
+def get_structured_response(
+    system_message: str,
+    speaker: str,
+    title: str,
+    text: str,
+    name: str,
+    schema: Dict[str, Any],
+    model: Optional[str] = None,
+) -> str:
+    """Get an OpenAI response constrained to a JSON schema (structured outputs).
+
+    Args:
+        system_message: The system message for the AI model.
+        speaker: The speaker's name.
+        title: The title of the talk.
+        text: The text content to process.
+        name: Name of the schema.
+        schema: The JSON schema of the response, in strict mode.
+        model: The chat model; defaults to CHAT_MODEL.
+
+    Returns:
+        The response as JSON text; validating it is left to the caller.
+
+    Raises:
+        ValueError: If OpenAI returns an empty response or refuses.
+    """
+    model = model or config.CHAT_MODEL
+    schema_json = json.dumps(schema, sort_keys=True)
+    cache_key = DiskCache.make_key(model, system_message, speaker, title, text, schema_json)
+    cached = chat_cache.get_text(cache_key)
+    if cached is not None:
+        return cached
+
+    llm = clients.openai()
+
+    def create() -> Any:
+        with metrics.timer("openai.chat_structured"):
+            return llm.chat.completions.create(
+                model=model,
+                messages=_chat_messages(system_message, speaker, title, text),
+                response_format={
+                    "type": "json_schema",
+                    "json_schema": {"name": name, "schema": schema, "strict": True},
+                },
+            )
+
+    response = _limited("chat", create, _estimate_tokens(system_message, text))
+    _record_usage(response.usage, model)
+    message = response.choices[0].message
+    if getattr(message, "refusal", None):
+        raise ValueError(f"OpenAI refused the structured response for {title}: {message.refusal}")
+    if not message.content:
+        raise ValueError(f"OpenAI returned empty response for {title}")
+
+    chat_cache.set_text(cache_key, message.content)
+    return message.content
+
+
+def stream_openai_response(
+    system_message: str,
+    speaker: str,
+    title: str,
+    text: str,
+    on_delta: Callable[[str], None],
+    model: Optional[str] = None,
+) -> str:
+    """Get OpenAI response as a stream, handing each chunk of text to a callback.
+
+    Shares the on-disk cache with get_openai_response; on a cache hit the whole
+    response is handed to the callback at once.
+
+    Args:
+        system_message: The system message for the AI model.
+        speaker: The speaker's name.
+        title: The title of the talk.
+        text: The text content to process.
+        on_delta: Callable receiving the text as it arrives.
+        model: The chat model; defaults to CHAT_MODEL.
+
+    Returns:
+        The complete AI model's response.
+
+    Raises:
+        ValueError: If OpenAI returns an empty response.
+    """
+    model = model or config.CHAT_MODEL
+    cache_key = _chat_cache_key(system_message, speaker, title, text, model)
+    cached = chat_cache.get_text(cache_key)
+    if cached is not None:
+        on_delta(cached)
+        return cached
+
+    llm = clients.openai()
+
+    def consume() -> str:
+        # The rate limit slot is held until the stream is exhausted
+        parts = []
+        with metrics.timer("openai.chat_stream"):
+            stream = llm.chat.completions.create(
+                model=model,
+                messages=_chat_messages(system_message, speaker, title, text),
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            for chunk in stream:
+                if chunk.usage:
+                    _record_usage(chunk.usage, model)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    on_delta(delta)
+        return "".join(parts)
+
+    output = _limited("chat", consume, _estimate_tokens(system_message, text))
+    if not output:
+        raise ValueError(f"OpenAI returned empty response for {title}")
+
+    chat_cache.set_text(cache_key, output)
     return output
 
 
+def synthesize_speech_to_file(text: str, path: str) -> None:
+    """Convert text to speech using OpenAI's TTS API, streaming the audio to a file.
+
+    The response body is written in chunks as it arrives, so memory use does
+    not grow with the length of the audio.
+
+    Args:
+        text: The text to convert to speech; must be within the TTS input limit.
+        path: The output file path where the audio will be saved.
+    """
+    cache_key = DiskCache.make_key(config.TTS_MODEL, config.TTS_VOICE, text)
+    if audio_cache.get_file(cache_key, path):
+        return
+
+    llm = clients.openai()
+
+    def synthesize() -> None:
+        with metrics.timer("openai.tts"):
+            with llm.audio.speech.with_streaming_response.create(
+                model=config.TTS_MODEL,
+                voice=config.TTS_VOICE,
+                input=text,
+            ) as response:
+                with open(path, "wb") as f:
+                    for chunk in response.iter_bytes(chunk_size=STREAM_CHUNK_SIZE):
+                        f.write(chunk)
+
+    _limited("tts", synthesize)
+    metrics.add("tts_characters", len(text), model=config.TTS_MODEL)
+    record_cost(config.TTS_MODEL, len(text))
+    metrics.add("bytes_written", os.path.getsize(path), kind="audio")
+    audio_cache.set_file(cache_key, path)
+
+
 @lru_cache(maxsize=config.CACHE_SIZE)
 def text_to_speech(text: str, path: str = config.AUDIO_PATH) -> None:
     """Convert text to speech using OpenAI's TTS API and save it as binary content.
@@ -62,14 +356,7 @@ def text_to_speech(text: str, path: str = config.AUDIO_PATH) -> None:
         text: The text (narrative) to convert to speech.
         path: The output file path where the audio will be saved.
     """
-    llm = OpenAI(api_key=config.OPENAI_API_KEY)
-    response = llm.audio.speech.create(
-        model=config.TTS_MODEL,
-        voice=config.TTS_VOICE,
-        input=text,
-    )
-    with open(path, "wb") as f:
-        f.write(response.content)
+    synthesize_speech_to_file(text, path)
 
 
 def image_generation(prompt: str, path: str = config.IMAGE_PATH) -> None:
@@ -82,19 +369,54 @@ def image_generation(prompt: str, path: str = config.IMAGE_PATH) -> None:
     Raises:
         ValueError: If OpenAI returns an empty image response or no URL.
     """
-    llm = OpenAI(api_key=config.OPENAI_API_KEY)
-    response = llm.images.generate(
-        model=config.IMAGE_MODEL,
-        prompt=prompt,
-        size=config.IMAGE_SIZE
-    )
+    llm = clients.openai()
+
+    def generate() -> Any:
+        with metrics.timer("openai.image"):
+            return llm.images.generate(
+                model=config.IMAGE_MODEL,
+                prompt=prompt,
+                size=config.IMAGE_SIZE
+            )
+
+    response = _limited("images", generate)
+    metrics.add("images_generated", model=config.IMAGE_MODEL)
+    record_cost(config.IMAGE_MODEL, 1, scale=1)
     if not response.data or not response.data[0].url:
         raise ValueError("OpenAI returned empty image response")    
     image_url = response.data[0].url
 
-    request_response = requests.get(image_url)
-    if request_response.status_code == 200:
-        with open(path, "wb") as f:
-            f.write(request_response.content)
-    else:
-        print(f"Failed to retrieve image from {image_url}")
+    with metrics.timer("http.image_download"):
+        with clients.http().get(image_url, stream=True, timeout=config.HTTP_TIMEOUT) as request_response:
+            if request_response.status_code == 200:
+                with open(path, "wb") as f:
+                    for chunk in request_response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                        f.write(chunk)
+                metrics.add("bytes_written", os.path.getsize(path), kind="image")
+            else:
+                print(f"Failed to retrieve image from {image_url}")
+
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """Embed texts with OpenAI's embedding model, in batches of EMBEDDING_BATCH_SIZE.
+
+    Args:
+        texts: The texts to embed.
+
+    Returns:
+        One embedding vector per text, in input order.
+    """
+    llm = clients.openai()
+    step = max(1, config.EMBEDDING_BATCH_SIZE)
+    vectors: List[List[float]] = []
+    for start in range(0, len(texts), step):
+        batch = texts[start:start + step]
+
+        def create() -> Any:
+            with metrics.timer("openai.embeddings"):
+                return llm.embeddings.create(model=config.EMBEDDING_MODEL, input=batch)
+
+        response = _limited("embeddings", create, _estimate_tokens(*batch))
+        _record_usage(response.usage, config.EMBEDDING_MODEL)
+        vectors.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+    return vectors
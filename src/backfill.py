@@ -0,0 +1,324 @@
+"""
+Bulk backfill of the text stages through the OpenAI Batch API.
+
+Instead of one synchronous chat call per stage and talk, the chat requests of
+all talks are grouped into waves: every request whose inputs are available is
+written to a JSONL batch file, submitted through the Batch API and polled until
+the batch completes. Each completed wave fans out into the dependent stages:
+- summary (chunk summaries and their reduce step for long transcripts)
+- extract, visualization prompt and search queries, once the summary exists
+- narrative, once the extract exists
+
+Requests already in the chat cache are not submitted, and requests that fail
+inside a batch are retried synchronously. The results are stored in the chat
+cache and checkpointed in each talk's manifest (see checkpoints.py), so the
+regular per-talk pipeline that follows only runs the remaining stages (audio,
+image and search) and writes into the same per-talk outputs.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from ai_services import (
+    cached_chat_response, chat_request_body, get_openai_response, record_cost, store_chat_response
+)
+from checkpoints import load_manifest, stage_fingerprint
+from clients import clients
+from config import config
+from content_processors import content_stages
+from metrics import metrics
+from prompts import (
+    CHUNK_SUMMARY_SYSTEM_MESSAGE,
+    EXTRACT_SYSTEM_MESSAGE,
+    IMAGE_SYSTEM_MESSAGE,
+    NARRATIVE_SYSTEM_MESSAGE,
+    REDUCE_SUMMARY_SYSTEM_MESSAGE,
+    SEARCH_SYSTEM_MESSAGE,
+    SUMMARY_SYSTEM_MESSAGE,
+)
+from routing import model_router
+from search_service import parse_search_queries, search_stages
+from summarizer import combine_partials, summary_chunks
+from ted_scraper import prefetch_transcripts, talk_slug
+
+# Chat stages after the summary: (stage, system message, input stage)
+CHAT_STAGES = (
+    ("extract", EXTRACT_SYSTEM_MESSAGE, "summary"),
+    ("visualization_prompt", IMAGE_SYSTEM_MESSAGE, "summary"),
+    ("search_queries", SEARCH_SYSTEM_MESSAGE, "summary"),
+    ("narrative", NARRATIVE_SYSTEM_MESSAGE, "extract"),
+)
+
+# Batch statuses after which a batch no longer changes
+FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class ChatRequest(NamedTuple):
+    """A chat request of one stage of one talk."""
+
+    custom_id: str
+    system_message: str
+    speaker: str
+    title: str
+    text: str
+    model: str
+
+
+def _stage_name(custom_id: str) -> str:
+    """Return the pipeline stage of a request; chunk summaries belong to the summary stage."""
+    stage = custom_id.split("|", 1)[1]
+    return "summary" if stage.startswith("chunk.") else stage
+
+
+class BackfillTalk:
+    """Progress of the text stages of a single talk through the waves."""
+
+    def __init__(self, key: int, talk: dict, output_dir: str, transcript: str):
+        """Initialize the talk's progress.
+
+        Args:
+            key: Unique number of the talk within the backfill.
+            talk: The talk metadata with "url", "speaker" and "title".
+            output_dir: Directory of the talk's outputs.
+            transcript: The full transcript text.
+        """
+        self.key = key
+        self.talk = talk
+        self.output_dir = output_dir
+        self.transcript = transcript
+        self.outputs: Dict[str, str] = {}
+        self.chunks = summary_chunks(transcript)
+        self.partials: Dict[int, str] = {}
+        self.error: Optional[str] = None
+
+    def _request(self, stage: str, system_message: str, text: str) -> ChatRequest:
+        # Chunk summaries are part of the summary stage and use its model
+        model = model_router.stage_model("summary" if stage.startswith("chunk.") else stage)
+        return ChatRequest(
+            f"{self.key}|{stage}", system_message, self.talk["speaker"], self.talk["title"], text, model
+        )
+
+    def ready(self) -> List[ChatRequest]:
+        """Return the requests whose inputs are available and that are not done yet."""
+        if self.error:
+            return []
+        if "summary" not in self.outputs:
+            if not self.chunks:
+                return [self._request("summary", SUMMARY_SYSTEM_MESSAGE, self.transcript)]
+            if len(self.partials) < len(self.chunks):
+                return [
+                    self._request(f"chunk.{idx}", CHUNK_SUMMARY_SYSTEM_MESSAGE, chunk)
+                    for idx, chunk in enumerate(self.chunks) if idx not in self.partials
+                ]
+            combined = combine_partials([self.partials[idx] for idx in range(len(self.chunks))])
+            return [self._request("summary", REDUCE_SUMMARY_SYSTEM_MESSAGE, combined)]
+        return [
+            self._request(stage, system_message, self.outputs[source])
+            for stage, system_message, source in CHAT_STAGES
+            if stage not in self.outputs and source in self.outputs
+        ]
+
+    def accept(self, stage: str, output: str) -> None:
+        """Store the output of a completed request."""
+        if stage.startswith("chunk."):
+            self.partials[int(stage.split(".", 1)[1])] = output
+        else:
+            self.outputs[stage] = output
+
+    def checkpoint(self) -> None:
+        """Record the completed text stages in the talk's manifest."""
+        manifest = load_manifest(self.output_dir)
+        if manifest is None:
+            return
+        speaker, title = self.talk["speaker"], self.talk["title"]
+        stages = {stage.name: stage for stage in content_stages(speaker, title) + search_stages(speaker, title)}
+        results = {"transcript": self.transcript, **self.outputs}
+        if "search_queries" in results:
+            try:
+                results["search_queries"] = parse_search_queries(results["search_queries"])
+            except ValueError:
+                del results["search_queries"]
+        for name, stage in stages.items():
+            if name in results and name != "transcript" and all(dep in results for dep in stage.deps):
+                fingerprint = stage_fingerprint(stage.fingerprint, [results[dep] for dep in stage.deps])
+                manifest.record(name, fingerprint, results[name])
+
+
+def _submit(requests: List[ChatRequest], label: str) -> str:
+    """Write a JSONL batch file, upload it and create the batch; returns the batch id."""
+    os.makedirs(config.BATCH_DIR, exist_ok=True)
+    path = os.path.join(config.BATCH_DIR, f"{label}.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for request in requests:
+            body = chat_request_body(
+                request.system_message, request.speaker, request.title, request.text, request.model
+            )
+            f.write(json.dumps({
+                "custom_id": request.custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body,
+            }, ensure_ascii=False) + "\n")
+
+    llm = clients.openai()
+    with open(path, "rb") as f:
+        input_file = llm.files.create(file=f, purpose="batch")
+    batch = llm.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window=config.BATCH_COMPLETION_WINDOW,
+        metadata={"label": label},
+    )
+    metrics.add("batch_requests", len(requests))
+    print(f"\033[94mSubmitted batch {batch.id} with {len(requests)} requests ({path})\033[0m")
+    return batch.id
+
+
+def _collect(batch_id: str) -> Dict[str, str]:
+    """Poll a batch until it is final and return the outputs by custom id."""
+    llm = clients.openai()
+    with metrics.timer("openai.batch"):
+        while True:
+            batch = llm.batches.retrieve(batch_id)
+            counts = batch.request_counts
+            progress = f" {counts.completed}/{counts.total}" if counts else ""
+            print(f"\033[90mBatch {batch_id}: {batch.status}{progress}\033[0m")
+            if batch.status in FINAL_STATUSES:
+                break
+            time.sleep(config.BATCH_POLL_INTERVAL)
+
+    outputs: Dict[str, str] = {}
+    if not batch.output_file_id:
+        return outputs
+    for line in llm.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        response = entry.get("response") or {}
+        if response.get("status_code") != 200:
+            continue
+        body = response.get("body") or {}
+        content = body["choices"][0]["message"].get("content")
+        if content:
+            outputs[entry["custom_id"]] = content
+        usage = body.get("usage") or {}
+        model = body.get("model", config.CHAT_MODEL)
+        metrics.add("openai_prompt_tokens", usage.get("prompt_tokens", 0), model=model)
+        metrics.add("openai_completion_tokens", usage.get("completion_tokens", 0), model=model)
+        with metrics.stage(_stage_name(entry["custom_id"])):
+            record_cost(
+                model, usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0),
+                scale=1e-6 * config.BATCH_PRICE_FACTOR,
+            )
+    return outputs
+
+
+def run_wave(requests: List[ChatRequest], label: str) -> Dict[str, str]:
+    """Run one wave of chat requests through the Batch API.
+
+    Cached requests are answered from the cache, the others are submitted in
+    batches of at most BATCH_MAX_REQUESTS, and requests that fail inside a
+    batch are retried synchronously.
+
+    Args:
+        requests: The requests of the wave.
+        label: Label of the wave, used to name the batch files.
+
+    Returns:
+        Dictionary mapping custom ids to outputs; failed requests are missing.
+    """
+    outputs: Dict[str, str] = {}
+    todo = []
+    for request in requests:
+        cached = cached_chat_response(
+            request.system_message, request.speaker, request.title, request.text, request.model
+        )
+        if cached is not None:
+            outputs[request.custom_id] = cached
+        else:
+            todo.append(request)
+
+    step = max(1, config.BATCH_MAX_REQUESTS)
+    batch_ids = [_submit(todo[start:start + step], f"{label}-{start // step + 1}") for start in range(0, len(todo), step)]
+    batched: Dict[str, str] = {}
+    for batch_id in batch_ids:
+        batched.update(_collect(batch_id))
+
+    failed = []
+    for request in todo:
+        if request.custom_id in batched:
+            output = batched[request.custom_id]
+            store_chat_response(
+                request.system_message, request.speaker, request.title, request.text, output, request.model
+            )
+            outputs[request.custom_id] = output
+        else:
+            failed.append(request)
+
+    def retry(request: ChatRequest) -> str:
+        with metrics.stage(_stage_name(request.custom_id)):
+            return get_openai_response(
+                request.system_message, request.speaker, request.title, request.text, model=request.model
+            )
+
+    if failed:
+        print(f"\033[93m{len(failed)} batch requests failed, retrying them synchronously\033[0m")
+        metrics.add("retries", len(failed), operation="openai.batch")
+        with ThreadPoolExecutor(max_workers=max(1, config.BATCH_WORKERS)) as executor:
+            futures = {request.custom_id: executor.submit(retry, request) for request in failed}
+            for custom_id, future in futures.items():
+                try:
+                    outputs[custom_id] = future.result()
+                except Exception as e:
+                    print(f"Request {custom_id} failed: {e}")
+    return outputs
+
+
+def backfill_text_stages(talks: List[dict]) -> Tuple[List[BackfillTalk], Dict[str, Optional[str]]]:
+    """Generate the text stages of many talks in Batch API waves.
+
+    Each talk's stages are checkpointed in its batch mode output directory.
+
+    Args:
+        talks: The talks to backfill.
+
+    Returns:
+        The progress of each talk with a transcript, where talks whose requests
+        failed carry an error, and the downloaded transcripts by talk URL, so
+        that the per-talk pipeline that follows does not download them again
+        (None for failed downloads, which that pipeline retries).
+    """
+    transcripts_by_url = dict(prefetch_transcripts([talk["url"] for talk in talks]))
+    transcripts = [transcripts_by_url[talk["url"]] for talk in talks]
+
+    jobs = [
+        BackfillTalk(key, talk, config.talk_dir(talk_slug(talk["url"])), transcript)
+        for key, (talk, transcript) in enumerate(zip(talks, transcripts))
+        if transcript is not None and transcript != "No transcript available."
+    ]
+    by_key = {job.key: job for job in jobs}
+    run_label = time.strftime("%Y%m%d-%H%M%S")
+
+    wave = 0
+    while True:
+        requests = [request for job in jobs for request in job.ready()]
+        if not requests:
+            break
+        wave += 1
+        print(f"\033[92mWave {wave}: {len(requests)} requests\033[0m")
+        outputs = run_wave(requests, f"{run_label}-wave{wave}")
+        for request in requests:
+            key, stage = request.custom_id.split("|", 1)
+            job = by_key[int(key)]
+            if request.custom_id in outputs:
+                job.accept(stage, outputs[request.custom_id])
+            else:
+                job.error = f"Stage {stage} failed"
+
+    for job in jobs:
+        job.checkpoint()
+    return jobs, transcripts_by_url
+
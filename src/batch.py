@@ -0,0 +1,150 @@
+"""
+Batch processing of several TED talks in one invocation.
+
+The talk listing is scraped once and the per-talk pipeline is run for the
+selected talks on a bounded worker pool. With prefetched transcripts, a talk
+is submitted as soon as its transcript has been downloaded. Each talk writes
+into its own output directory, and the run ends with a per-talk
+success/failure report.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import config
+
+
+class TalkResult:
+    """Outcome of processing a single talk in a batch."""
+
+    def __init__(self, talk_number: int, title: str, status: str, elapsed: float, error: Optional[str] = None):
+        """Initialize the result.
+
+        Args:
+            talk_number: Position of the talk in the listing.
+            title: The title of the talk.
+            status: One of "ok", "no transcript" or "failed".
+            elapsed: Processing time in seconds.
+            error: The error message of a failed talk.
+        """
+        self.talk_number = talk_number
+        self.title = title
+        self.status = status
+        self.elapsed = elapsed
+        self.error = error
+
+
+def parse_talk_numbers(spec: str, available: List[int]) -> List[int]:
+    """Parse a talk selection like "1-5,8,10-12".
+
+    Args:
+        spec: Comma-separated talk numbers and inclusive ranges.
+        available: Talk numbers present in the listing.
+
+    Returns:
+        Sorted list of the selected talk numbers.
+
+    Raises:
+        ValueError: If the selection is malformed or refers to unknown talks.
+    """
+    selected = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if "-" in part:
+                start, end = (int(bound) for bound in part.split("-", 1))
+                if start > end:
+                    raise ValueError
+                selected.update(range(start, end + 1))
+            else:
+                selected.add(int(part))
+        except ValueError:
+            raise ValueError(f"Invalid talk selection: '{part}'")
+
+    missing = sorted(selected - set(available))
+    if missing:
+        raise ValueError(f"Talks not found in listing: {', '.join(map(str, missing))}")
+    if not selected:
+        raise ValueError("No talks selected")
+    return sorted(selected)
+
+
+def run_batch(
+    talks: Dict[int, dict],
+    talk_numbers: List[int],
+    process: Callable[..., bool],
+    workers: int = config.BATCH_WORKERS,
+    transcripts: Optional[Iterable[Tuple[int, Optional[str]]]] = None,
+) -> List[TalkResult]:
+    """Process several talks concurrently.
+
+    Args:
+        talks: The scraped talk listing.
+        talk_numbers: Numbers of the talks to process.
+        process: Callable processing a single talk; returns False if the talk
+            has no transcript and raises on failure.
+        workers: Maximum number of talks processed at the same time.
+        transcripts: Optional (talk number, transcript) pairs of all selected
+            talks in the order they become available, e.g. from
+            ted_scraper.prefetch_transcripts. Each talk is then submitted when
+            its transcript arrives, and process receives the transcript as
+            its second argument (None if the prefetch failed).
+
+    Returns:
+        Results in the order of talk_numbers.
+    """
+    results: Dict[int, TalkResult] = {}
+    lock = threading.Lock()
+
+    def run(talk_number: int, *args: Any) -> None:
+        talk = talks[talk_number]
+        start = time.perf_counter()
+        try:
+            status = "ok" if process(talk, *args) else "no transcript"
+            error = None
+        except Exception as e:
+            status, error = "failed", str(e)
+        result = TalkResult(talk_number, talk["title"], status, time.perf_counter() - start, error)
+        with lock:
+            results[talk_number] = result
+            color = "92" if result.status == "ok" else "91"
+            print(
+                f"\033[{color}m[{len(results)}/{len(talk_numbers)}] #{result.talk_number} {result.title}: "
+                f"{result.status} ({result.elapsed:.1f}s)\033[0m"
+            )
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        if transcripts is None:
+            for number in talk_numbers:
+                executor.submit(run, number)
+        else:
+            for number, transcript in transcripts:
+                executor.submit(run, number, transcript)
+
+    return [results[number] for number in talk_numbers]
+
+
+def print_batch_report(results: List[TalkResult], elapsed: float) -> None:
+    """Print the per-talk outcome and the throughput of a batch run.
+
+    Args:
+        results: The per-talk results.
+        elapsed: Wall-clock time of the whole batch in seconds.
+    """
+    print("="*config.TEXT_WIDTH)
+    print("Batch Report:".center(config.TEXT_WIDTH))
+    print("="*config.TEXT_WIDTH)
+    for result in results:
+        line = f"#{result.talk_number:<4} {result.status:<14} {result.elapsed:7.1f}s  {result.title}"
+        print(line[:config.TEXT_WIDTH])
+        if result.error:
+            print(f"      {result.error}"[:config.TEXT_WIDTH])
+    print("="*config.TEXT_WIDTH)
+
+    succeeded = sum(1 for result in results if result.status == "ok")
+    throughput = len(results) / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"{succeeded}/{len(results)} talks succeeded in {elapsed:.1f}s ({throughput:.2f} talks/min)")
@@ -0,0 +1,246 @@
+"""
+Persistent, content-addressed on-disk cache for AI service results.
+
+Entries are stored under ``config.CACHE_DIR`` in per-namespace directories and
+addressed by a SHA-256 hash of everything that determines the result (model,
+system message, speaker, title, input text, ...). The cache provides:
+- Atomic writes (temporary file + rename) so readers never see partial entries
+- Age-based expiry of stale entries
+- Size-based eviction of least recently used entries
+- Hit/miss counters for reporting
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, BinaryIO, Callable, Dict, Optional
+
+from config import config
+
+
+class DiskCache:
+    """A thread-safe, size- and age-bounded cache of binary blobs on disk."""
+
+    def __init__(self, directory: str, max_bytes: int, max_age: float, enabled: bool = True):
+        """Initialize the cache.
+
+        Args:
+            directory: Directory where the entries are stored.
+            max_bytes: Maximum total size of the entries; 0 disables the size limit.
+            max_age: Maximum age of an entry in seconds; 0 disables expiry.
+            enabled: Whether the cache is active at all.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a content-addressed key from the values that determine a result.
+
+        Args:
+            *parts: JSON-serializable values identifying the cached result.
+
+        Returns:
+            Hex SHA-256 digest of the serialized parts.
+        """
+        payload = json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached value for a key, or None on a miss.
+
+        Args:
+            key: Key produced by make_key.
+
+        Returns:
+            The cached bytes, or None if absent, expired or the cache is disabled.
+        """
+        def read(path: str) -> bytes:
+            with open(path, "rb") as f:
+                return f.read()
+
+        return self._read(key, read)
+
+    def get_file(self, key: str, dest: str) -> bool:
+        """Copy the cached value for a key to a file without loading it into memory.
+
+        Args:
+            key: Key produced by make_key.
+            dest: Path of the file to write.
+
+        Returns:
+            True on a hit, False on a miss.
+        """
+        return self._read(key, lambda path: shutil.copyfile(path, dest)) is not None
+
+    def set(self, key: str, value: bytes) -> None:
+        """Atomically store a value under a key and evict entries if over budget.
+
+        Args:
+            key: Key produced by make_key.
+            value: The bytes to store.
+        """
+        def write(f: BinaryIO) -> None:
+            f.write(value)
+
+        self._write(key, write)
+
+    def set_file(self, key: str, src: str) -> None:
+        """Atomically store the contents of a file under a key, copying it in chunks.
+
+        Args:
+            key: Key produced by make_key.
+            src: Path of the file to store.
+        """
+        def write(f: BinaryIO) -> None:
+            with open(src, "rb") as source:
+                shutil.copyfileobj(source, f)
+
+        self._write(key, write)
+
+    def _read(self, key: str, reader: Callable[[str], Any]) -> Optional[Any]:
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+            if self.max_age and time.time() - stat.st_mtime > self.max_age:
+                self._remove(path, stat.st_size)
+                raise FileNotFoundError(path)
+            value = reader(path)
+            os.utime(path)  # Mark as recently used for LRU eviction
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return True if value is None else value
+
+    def _write(self, key: str, writer: Callable[[BinaryIO], None]) -> None:
+        if not self.enabled:
+            return
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                writer(f)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            if self._size is not None:
+                self._size += size
+        if self.max_bytes and self._total_size() > self.max_bytes:
+            self.evict()
+
+    def get_text(self, key: str) -> Optional[str]:
+        """Return a cached text value, or None on a miss."""
+        value = self.get(key)
+        return value.decode("utf-8") if value is not None else None
+
+    def set_text(self, key: str, value: str) -> None:
+        """Store a text value."""
+        self.set(key, value.encode("utf-8"))
+
+    def evict(self) -> None:
+        """Remove expired entries, then the least recently used ones until under budget."""
+        now = time.time()
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.startswith(".tmp-"):
+                    # Leftover from an interrupted write
+                    if now - stat.st_mtime > 3600:
+                        self._remove(path, 0)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = 0
+        live = []
+        for mtime, size, path in entries:
+            if self.max_age and now - mtime > self.max_age:
+                self._remove(path, 0)
+            else:
+                live.append((mtime, size, path))
+                total += size
+
+        live.sort()
+        for _, size, path in live:
+            if not self.max_bytes or total <= self.max_bytes:
+                break
+            self._remove(path, 0)
+            total -= size
+
+        with self._lock:
+            self._size = total
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit/miss counters."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def _total_size(self) -> int:
+        with self._lock:
+            size = self._size
+        if size is None:
+            size = 0
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    try:
+                        size += os.path.getsize(os.path.join(root, name))
+                    except OSError:
+                        continue
+            with self._lock:
+                self._size = size
+        return size
+
+    def _remove(self, path: str, size: int) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size = max(0, self._size - size)
+
+
+def _make_cache(namespace: str, max_age: Optional[float] = None) -> DiskCache:
+    return DiskCache(
+        os.path.join(config.CACHE_DIR, namespace),
+        max_bytes=config.CACHE_MAX_MB * 1024 * 1024,
+        max_age=config.CACHE_MAX_AGE_DAYS * 24 * 3600 if max_age is None else max_age,
+        enabled=config.CACHE_ENABLED and max_age != 0,
+    )
+
+
+chat_cache = _make_cache("chat")
+audio_cache = _make_cache("audio")
+# Search results go stale much sooner than generated content
+search_cache = _make_cache("search", max_age=config.SEARCH_CACHE_TTL)
@@ -0,0 +1,127 @@
+"""
+Per-talk stage checkpoints for resumable runs.
+
+Each talk's output directory holds a manifest recording, for every completed
+stage, its output and a fingerprint of its inputs: the stage's static inputs
+(prompt text, model name and settings) and the hashes of its upstream
+outputs. When a run is repeated, stages whose fingerprint is unchanged are
+restored from the manifest instead of being recomputed, so a run that failed
+at a late stage resumes where it stopped, and editing one prompt only redoes
+that stage and the stages whose inputs change as a result.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from config import config
+from metrics import metrics
+
+MANIFEST_VERSION = 1
+
+
+def output_hash(value: Any) -> str:
+    """Return a stable hash of a stage output."""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def stage_fingerprint(static: Sequence[Any], upstream: Sequence[Any]) -> str:
+    """Compute the fingerprint of a stage's inputs.
+
+    Args:
+        static: The stage's static inputs, e.g. prompt text and model name.
+        upstream: The outputs of the stage's dependencies.
+
+    Returns:
+        Hex digest identifying the combination of inputs.
+    """
+    payload = json.dumps(
+        [list(static), [output_hash(value) for value in upstream]],
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class StageManifest:
+    """JSON manifest of the completed stages of one talk."""
+
+    def __init__(self, path: str):
+        """Load the manifest, starting empty if it is missing or unreadable.
+
+        Args:
+            path: The manifest file path.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self._stages = data.get("stages", {})
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def lookup(self, name: str, fingerprint: str) -> Tuple[bool, Any]:
+        """Return the checkpointed output of a stage if its inputs are unchanged.
+
+        A checkpoint is only valid while the files the stage wrote still exist
+        with their recorded sizes. Files that were still being written in the
+        background when the stage completed only need to exist.
+
+        Args:
+            name: The name of the stage.
+            fingerprint: The fingerprint of the stage's current inputs.
+
+        Returns:
+            Whether a valid checkpoint exists, and its output.
+        """
+        with self._lock:
+            entry = self._stages.get(name)
+        valid = entry is not None and entry.get("fingerprint") == fingerprint and all(
+            os.path.isfile(path) and (size is None or os.path.getsize(path) == size)
+            for path, size in entry.get("files", {}).items()
+        )
+        metrics.add("checkpoint_hits" if valid else "checkpoint_misses", stage=name)
+        return (True, entry["output"]) if valid else (False, None)
+
+    def record(self, name: str, fingerprint: str, output: Any, files: Sequence[str] = ()) -> None:
+        """Record a completed stage and persist the manifest.
+
+        Args:
+            name: The name of the stage.
+            fingerprint: The fingerprint of the stage's inputs.
+            output: The stage's JSON-serializable output.
+            files: Paths of the files the stage wrote; files that do not exist
+                yet are recorded without a size.
+        """
+        with self._lock:
+            self._stages[name] = {
+                "fingerprint": fingerprint,
+                "output": output,
+                "output_hash": output_hash(output),
+                "files": {path: os.path.getsize(path) if os.path.isfile(path) else None for path in files},
+                "completed": time.time(),
+            }
+            self._save()
+
+    def _save(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "stages": self._stages}, f, indent=2, ensure_ascii=False)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, self.path)
+
+
+def load_manifest(output_dir: str) -> Optional[StageManifest]:
+    """Return the manifest of a talk's output directory, or None if resuming is disabled."""
+    if not config.RESUME_ENABLED:
+        return None
+    return StageManifest(os.path.join(output_dir, config.MANIFEST_FILENAME))
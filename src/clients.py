@@ -0,0 +1,130 @@
+"""
+Registry of long-lived API clients and HTTP sessions.
+
+Creating a client per call pays for client setup and a fresh TLS handshake on
+every request. The registry creates each client once, on first use, and shares
+it between all stages and threads:
+- One OpenAI client, whose keep-alive connection pool is thread-safe
+- One Tavily client, with its HTTP session pool sized for concurrent searches
+- One requests session for plain downloads (e.g. generated images)
+
+Responses of the OpenAI and Tavily clients are passed to the rate limiter
+(see rate_limit.py) so that throttling and quota headers shape later calls.
+All clients are closed when the process exits. The OpenAI and Tavily SDKs
+and requests are only imported when their client is first needed, so that
+commands that never call them start quickly.
+"""
+
+import atexit
+import threading
+from typing import TYPE_CHECKING, Optional
+
+from config import config
+from rate_limit import limiter
+
+if TYPE_CHECKING:
+    import httpx
+    import requests
+    from openai import OpenAI
+    from tavily import TavilyClient
+
+# Rate limited OpenAI endpoints by URL path suffix
+OPENAI_ENDPOINTS = (
+    ("/chat/completions", "chat"),
+    ("/audio/speech", "tts"),
+    ("/images/generations", "images"),
+    ("/embeddings", "embeddings"),
+)
+
+
+class ClientRegistry:
+    """Lazily created, process-wide API clients."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._openai: Optional["OpenAI"] = None
+        self._tavily: Optional["TavilyClient"] = None
+        self._http: Optional["requests.Session"] = None
+
+    def openai(self) -> "OpenAI":
+        """Return the shared OpenAI client."""
+        with self._lock:
+            if self._openai is None:
+                # The SDK inspects the httpx module whenever it is loaded; import it
+                # completely before the first request, so that a concurrent import
+                # (e.g. by the Tavily SDK) is never observed half-initialized
+                import httpx  # noqa: F401
+                from openai import DefaultHttpxClient, OpenAI
+
+                self._openai = OpenAI(
+                    api_key=config.OPENAI_API_KEY,
+                    base_url=config.OPENAI_BASE_URL or None,
+                    timeout=config.OPENAI_TIMEOUT,
+                    http_client=DefaultHttpxClient(event_hooks={"response": [_observe_openai]}),
+                )
+            return self._openai
+
+    def tavily(self) -> "TavilyClient":
+        """Return the shared Tavily client."""
+        with self._lock:
+            if self._tavily is None:
+                import requests
+                from tavily import TavilyClient
+
+                self._tavily = TavilyClient(api_key=config.TAVILY_API_KEY, api_base_url=config.TAVILY_BASE_URL or None)
+                session = getattr(self._tavily, "session", None)
+                if isinstance(session, requests.Session):
+                    _mount_pool(session)
+                    session.hooks["response"].append(_observe_tavily)
+            return self._tavily
+
+    def http(self) -> "requests.Session":
+        """Return the shared HTTP session for plain downloads."""
+        with self._lock:
+            if self._http is None:
+                import requests
+
+                self._http = requests.Session()
+                _mount_pool(self._http)
+            return self._http
+
+    def close(self) -> None:
+        """Close all clients that were created."""
+        with self._lock:
+            if self._openai is not None:
+                self._openai.close()
+                self._openai = None
+            if self._tavily is not None:
+                session = getattr(self._tavily, "session", None)
+                if session is not None:
+                    session.close()
+                self._tavily = None
+            if self._http is not None:
+                self._http.close()
+                self._http = None
+
+
+def _mount_pool(session: "requests.Session") -> None:
+    from requests.adapters import HTTPAdapter
+
+    # The default adapter keeps only 10 connections per host, fewer than our workers
+    adapter = HTTPAdapter(pool_connections=config.HTTP_POOL_SIZE, pool_maxsize=config.HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def _observe_openai(response: "httpx.Response") -> None:
+    path = response.request.url.path
+    for suffix, endpoint in OPENAI_ENDPOINTS:
+        if path.endswith(suffix):
+            limiter.observe(endpoint, response.status_code, response.headers)
+            return
+
+
+def _observe_tavily(response: "requests.Response", *args, **kwargs) -> None:
+    if response.request.path_url.split("?")[0].endswith("/search"):
+        limiter.observe("search", response.status_code, response.headers)
+
+
+clients = ClientRegistry()
+atexit.register(clients.close)
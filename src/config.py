@@ -1,39 +1,181 @@
 """Configuration settings for the TED Talk processing application."""
 
 import os
+from typing import Dict, Tuple
+
 from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _parse_mapping(value: str) -> Dict[str, str]:
+    """Parse a "key=value,key=value" setting."""
+    mapping = {}
+    for item in value.split(','):
+        key, sep, item_value = item.partition('=')
+        if sep and key.strip():
+            mapping[key.strip()] = item_value.strip()
+    return mapping
+
+
+def _parse_prices(value: str) -> Dict[str, Tuple[float, float]]:
+    """Parse a "model=input/output,model=price" setting; a single price applies to input and output."""
+    prices = {}
+    for model, price in _parse_mapping(value).items():
+        input_price, _, output_price = price.partition('/')
+        prices[model] = (float(input_price), float(output_price or input_price))
+    return prices
+
+
 class Config:
     """Application configuration class."""
     
     # API Configuration
     OPENAI_API_KEY: str = os.getenv('OPENAI_API_KEY', '')
     TAVILY_API_KEY: str = os.getenv('TAVILY_API_KEY', '')
+    # Alternative API endpoints, e.g. the local stand-ins of benchmarks/fake_services.py
+    OPENAI_BASE_URL: str = os.getenv('OPENAI_BASE_URL', '')
+    TAVILY_BASE_URL: str = os.getenv('TAVILY_BASE_URL', '')
     
     # Model Configuration
     CHAT_MODEL: str = os.getenv('CHAT_MODEL', 'gpt-5')
+    # Per-stage chat models as stage=model pairs, e.g. "extract=gpt-5-mini"; other stages use CHAT_MODEL
+    STAGE_MODELS: Dict[str, str] = _parse_mapping(os.getenv('STAGE_MODELS', ''))
+    # Latency-budgeted routing of the chat stages to a faster model (see routing.py); opt-in, as it
+    # changes the model serving a stage
+    ROUTING_ENABLED: bool = os.getenv('ROUTING_ENABLED', 'false').lower() == 'true'
+    FAST_CHAT_MODEL: str = os.getenv('FAST_CHAT_MODEL', 'gpt-5-mini')
+    # Seconds per call as stage=seconds pairs; a stage over budget falls back to FAST_CHAT_MODEL
+    STAGE_LATENCY_BUDGETS: Dict[str, float] = {
+        stage: float(seconds) for stage, seconds in _parse_mapping(
+            os.getenv('STAGE_LATENCY_BUDGETS', 'extract=20,visualization_prompt=20,search_queries=15')
+        ).items()
+    }
+    # Inputs of budgeted stages up to this many tokens go straight to FAST_CHAT_MODEL; 0 disables
+    ROUTING_FAST_INPUT_TOKENS: int = int(os.getenv('ROUTING_FAST_INPUT_TOKENS', '0'))
     TTS_MODEL: str = os.getenv('TTS_MODEL', 'tts-1-hd')
     TTS_VOICE: str = os.getenv('TTS_VOICE', 'alloy')
     IMAGE_MODEL: str = os.getenv('IMAGE_MODEL', 'dall-e-3')
     IMAGE_SIZE: str = os.getenv('IMAGE_SIZE', '1792x1024')  # type: ignore
+    TTS_MAX_CHARS: int = int(os.getenv('TTS_MAX_CHARS', '4096'))
+    TTS_SEGMENT_CHARS: int = int(os.getenv('TTS_SEGMENT_CHARS', '600'))
+    TTS_WORKERS: int = int(os.getenv('TTS_WORKERS', '3'))
+    # USD prices as model=price pairs, recorded as the cost_usd metric: input/output per million tokens
+    # for chat and embedding models, per million characters for TTS models and per image for image models
+    MODEL_PRICES: Dict[str, Tuple[float, float]] = _parse_prices(os.getenv(
+        'MODEL_PRICES',
+        'gpt-5=1.25/10,gpt-5-mini=0.25/2,tts-1=15,tts-1-hd=30,dall-e-3=0.08,text-embedding-3-small=0.02',
+    ))
+    # Price factor of requests run through the Batch API
+    BATCH_PRICE_FACTOR: float = float(os.getenv('BATCH_PRICE_FACTOR', '0.5'))
     
     # File Paths
     DATA_DIR: str = os.getenv('DATA_DIR', 'media')
-    TRANSCRIPT_PATH: str = os.path.join(DATA_DIR, 'transcript')
-    AUDIO_PATH: str = os.path.join(DATA_DIR, 'narrative.mp3')
-    IMAGE_PATH: str = os.path.join(DATA_DIR, 'artwork.png')
+    AUDIO_FILENAME: str = 'narrative.mp3'
+    IMAGE_FILENAME: str = 'artwork.png'
+    AUDIO_PATH: str = os.path.join(DATA_DIR, AUDIO_FILENAME)
+    IMAGE_PATH: str = os.path.join(DATA_DIR, IMAGE_FILENAME)
+    # Content-addressed store of the generated media; talk directories link to its files
+    MEDIA_STORE_ENABLED: bool = os.getenv('MEDIA_STORE_ENABLED', 'true').lower() == 'true'
+    MEDIA_STORE_DIR: str = os.getenv('MEDIA_STORE_DIR', os.path.join(DATA_DIR, 'store'))
+    MANIFEST_FILENAME: str = os.getenv('MANIFEST_FILENAME', 'manifest.json')
+    # Restore completed stages with unchanged inputs from the talk's manifest
+    RESUME_ENABLED: bool = os.getenv('RESUME_ENABLED', 'true').lower() == 'true'
 
+    # Scraper Configuration
+    TED_BASE_URL: str = os.getenv('TED_BASE_URL', 'https://www.ted.com').rstrip('/')
+    SCRAPER_BACKEND: str = os.getenv('SCRAPER_BACKEND', 'auto')
+    # Listing pages fetched concurrently
+    SCRAPER_WORKERS: int = int(os.getenv('SCRAPER_WORKERS', '4'))
+    # Headless browsers kept for the process when the Selenium backend is used
+    SELENIUM_POOL_SIZE: int = int(os.getenv('SELENIUM_POOL_SIZE', '2'))
+    # Seconds to wait for the talk cards of a listing page to render
+    SELENIUM_WAIT_TIMEOUT: float = float(os.getenv('SELENIUM_WAIT_TIMEOUT', '10'))
+    LISTING_PAGES: int = int(os.getenv('LISTING_PAGES', '1'))
+    # Seconds a scraped listing is reused from CACHE_DIR; 0 always scrapes
+    LISTING_CACHE_TTL: int = int(os.getenv('LISTING_CACHE_TTL', '3600'))
+    SUBTITLE_LANGUAGE: str = os.getenv('SUBTITLE_LANGUAGE', 'en')
+    # Transcripts downloaded concurrently ahead of batch processing
+    TRANSCRIPT_WORKERS: int = int(os.getenv('TRANSCRIPT_WORKERS', '6'))
+    SCRAPER_USER_AGENT: str = os.getenv(
+        'SCRAPER_USER_AGENT',
+        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+    )
+    
     # Search Configuration
     MAX_SEARCH_RESULTS: int = int(os.getenv('MAX_SEARCH_RESULTS', '1'))
     SEARCH_QUERIES_COUNT: int = int(os.getenv('SEARCH_QUERIES_COUNT', '5'))
+    SEARCH_WORKERS: int = int(os.getenv('SEARCH_WORKERS', '5'))
+    SEARCH_TIMEOUT: float = float(os.getenv('SEARCH_TIMEOUT', '20'))
+    SEARCH_MAX_RETRIES: int = int(os.getenv('SEARCH_MAX_RETRIES', '3'))
+    # Seconds a search result is reused from CACHE_DIR; 0 disables the search cache
+    SEARCH_CACHE_TTL: int = int(os.getenv('SEARCH_CACHE_TTL', '86400'))
+    # Minimum word overlap (Jaccard) of two queries of a run to be searched once
+    SEARCH_DEDUP_SIMILARITY: float = float(os.getenv('SEARCH_DEDUP_SIMILARITY', '0.8'))
+    
+    # Semantic Index Configuration
+    SEMANTIC_INDEX_ENABLED: bool = os.getenv('SEMANTIC_INDEX_ENABLED', 'true').lower() == 'true'
+    SEMANTIC_INDEX_DIR: str = os.getenv('SEMANTIC_INDEX_DIR', os.path.join(DATA_DIR, 'index'))
+    EMBEDDING_MODEL: str = os.getenv('EMBEDDING_MODEL', 'text-embedding-3-small')
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv('EMBEDDING_BATCH_SIZE', '64'))
+    INDEX_SEGMENT_TOKENS: int = int(os.getenv('INDEX_SEGMENT_TOKENS', '400'))
+    # Minimum cosine similarity of an archived talk to answer a query without web search
+    SEMANTIC_MATCH_THRESHOLD: float = float(os.getenv('SEMANTIC_MATCH_THRESHOLD', '0.6'))
+    
+    # Summarization Configuration
+    SUMMARY_CHUNK_THRESHOLD: int = int(os.getenv('SUMMARY_CHUNK_THRESHOLD', '6000'))
+    SUMMARY_CHUNK_TOKENS: int = int(os.getenv('SUMMARY_CHUNK_TOKENS', '2500'))
+    SUMMARY_CHUNK_WORKERS: int = int(os.getenv('SUMMARY_CHUNK_WORKERS', '4'))
+    SUMMARY_CHUNK_RETRIES: int = int(os.getenv('SUMMARY_CHUNK_RETRIES', '2'))
+    
+    # Pipeline Configuration
+    PIPELINE_WORKERS: int = int(os.getenv('PIPELINE_WORKERS', '4'))
+    FUSED_GENERATION: bool = os.getenv('FUSED_GENERATION', 'false').lower() == 'true'
+    BATCH_WORKERS: int = int(os.getenv('BATCH_WORKERS', '3'))
+    
+    # Watch Mode Configuration
+    WATCH_INTERVAL: float = float(os.getenv('WATCH_INTERVAL', '900'))
+    WATCH_INDEX_PATH: str = os.getenv('WATCH_INDEX_PATH', os.path.join(DATA_DIR, 'seen_talks.json'))
+    WATCH_MAX_PAGES: int = int(os.getenv('WATCH_MAX_PAGES', '10'))
+    WATCH_MAX_ATTEMPTS: int = int(os.getenv('WATCH_MAX_ATTEMPTS', '3'))
+    
+    # Batch API Configuration
+    BATCH_DIR: str = os.getenv('BATCH_DIR', 'batches')
+    BATCH_POLL_INTERVAL: float = float(os.getenv('BATCH_POLL_INTERVAL', '30'))
+    BATCH_COMPLETION_WINDOW: str = os.getenv('BATCH_COMPLETION_WINDOW', '24h')
+    BATCH_MAX_REQUESTS: int = int(os.getenv('BATCH_MAX_REQUESTS', '50000'))
+    
+    # HTTP Configuration
+    HTTP_POOL_SIZE: int = int(os.getenv('HTTP_POOL_SIZE', '32'))
+    HTTP_TIMEOUT: float = float(os.getenv('HTTP_TIMEOUT', '60'))
+    OPENAI_TIMEOUT: float = float(os.getenv('OPENAI_TIMEOUT', '600'))
+    
+    # Rate Limit Configuration (0 = follow the limits reported by the services)
+    RATE_LIMIT_ENABLED: bool = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    CHAT_RPM: float = float(os.getenv('CHAT_RPM', '0'))
+    CHAT_TPM: float = float(os.getenv('CHAT_TPM', '0'))
+    TTS_RPM: float = float(os.getenv('TTS_RPM', '0'))
+    IMAGE_RPM: float = float(os.getenv('IMAGE_RPM', '0'))
+    SEARCH_RPM: float = float(os.getenv('SEARCH_RPM', '0'))
+    RATE_LIMIT_INITIAL_CONCURRENCY: int = int(os.getenv('RATE_LIMIT_INITIAL_CONCURRENCY', '4'))
+    RATE_LIMIT_MAX_CONCURRENCY: int = int(os.getenv('RATE_LIMIT_MAX_CONCURRENCY', '16'))
+    RATE_LIMIT_RETRIES: int = int(os.getenv('RATE_LIMIT_RETRIES', '5'))
     
     # Display Configuration
     TEXT_WIDTH: int = int(os.getenv('TEXT_WIDTH', '80'))
+    STREAM_OUTPUT: bool = os.getenv('STREAM_OUTPUT', 'false').lower() == 'true'
     
     # Cache Configuration
     CACHE_SIZE: int = int(os.getenv('CACHE_SIZE', '10'))
+    CACHE_ENABLED: bool = os.getenv('CACHE_ENABLED', 'true').lower() == 'true'
+    CACHE_DIR: str = os.getenv('CACHE_DIR', 'cache')
+    CACHE_MAX_MB: int = int(os.getenv('CACHE_MAX_MB', '500'))
+    CACHE_MAX_AGE_DAYS: int = int(os.getenv('CACHE_MAX_AGE_DAYS', '30'))
+    
+    @classmethod
+    def talk_dir(cls, slug: str) -> str:
+        """Return the output directory of a single talk in batch mode."""
+        return os.path.join(cls.DATA_DIR, slug)
     
     @classmethod
     def validate(cls) -> bool:
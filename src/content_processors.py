@@ -9,32 +9,238 @@ various AI transformations including:
 - Visualization prompt generation for image creation
 - Media content generation (audio and image)
 
-The pipeline follows a sequential workflow where each step builds upon the previous output.
+The steps form a dependency graph (see pipeline.py), so independent stages run
+concurrently while their output is printed in a fixed order. Further features:
+- Streamed output and speech synthesis while the narrative streams (STREAM_OUTPUT)
+- Resumable runs from the per-talk manifest (see checkpoints.py)
+- Indexing of processed talks for later searches (see semantic_index.py)
+- Per-stage chat models with latency budgets (see routing.py)
+- Content-addressed storage of the audio and image (see media_store.py)
+
 Note: Search query generation functionality has been moved to search_service.py
 """
 
-import json
+import os
 import textwrap
-from typing import Tuple
+from typing import Callable, List, Optional, Sequence, TextIO, Tuple
 
 from config import config
 from prompts import (
-    SUMMARY_SYSTEM_MESSAGE, 
     EXTRACT_SYSTEM_MESSAGE, 
     NARRATIVE_SYSTEM_MESSAGE, 
-    IMAGE_SYSTEM_MESSAGE
+    IMAGE_SYSTEM_MESSAGE,
+    SUMMARY_SYSTEM_MESSAGE,
+    CHUNK_SUMMARY_SYSTEM_MESSAGE,
+    REDUCE_SUMMARY_SYSTEM_MESSAGE
 )
-from ai_services import get_openai_response, text_to_speech, image_generation
+from ai_services import get_openai_response, stream_openai_response, image_generation
+from checkpoints import load_manifest
+from fused import fuse_stages
+from media_store import media_store
+from pipeline import Stage, StageOutput, run_stages, select_stages
+from routing import ModelLog, model_router
+from search_service import search_stages
+from semantic_index import index_stages
+from speech import SpeechPrefetcher, chunked_text_to_speech
+from streaming import WrappedTextRenderer, record_timing
+from summarizer import estimate_tokens, summarize_transcript
+
+
+def print_section(heading: str, text: str, file: Optional[TextIO] = None) -> None:
+    """Print a titled, wrapped block of generated text.
+
+    Args:
+        heading: The heading of the block.
+        text: The text to print.
+        file: Optional stream to print to, e.g. a stage's output; defaults to stdout.
+    """
+    print("="*config.TEXT_WIDTH, file=file)
+    print(f"{heading}:".center(config.TEXT_WIDTH), file=file)
+    print("="*config.TEXT_WIDTH, file=file)
+    print(textwrap.fill(text, width=config.TEXT_WIDTH), file=file)
+    print("="*config.TEXT_WIDTH, file=file)
+
+
+def stream_section(
+    output: StageOutput,
+    heading: str,
+    stage: str,
+    generate: Callable[[Callable[[str], None]], str],
+    on_delta: Optional[Callable[[str], None]] = None,
+) -> str:
+    """Render a titled block of generated text while it is being streamed.
+
+    Args:
+        output: The stage's output writer.
+        heading: The heading of the block.
+        stage: The name of the stage, used to record its timings.
+        generate: Callable producing the text, given a callback for each chunk of it.
+        on_delta: Optional additional consumer of the streamed text.
+
+    Returns:
+        The complete generated text.
+    """
+    output.write("="*config.TEXT_WIDTH + "\n")
+    output.write(f"{heading}:".center(config.TEXT_WIDTH) + "\n")
+    output.write("="*config.TEXT_WIDTH + "\n")
+    renderer = WrappedTextRenderer(output.write)
+
+    def feed(delta: str) -> None:
+        renderer.feed(delta)
+        if on_delta:
+            on_delta(delta)
+
+    text = generate(feed)
+    renderer.close()
+    first_token, total = record_timing(stage, renderer)
+    output.write("="*config.TEXT_WIDTH + "\n")
+    output.write(f"\033[90m(first token after {first_token:.1f}s, complete after {total:.1f}s)\033[0m\n")
+    return text
+
+
+def content_stages(
+    speaker_name: str, title: str, speech: Optional[SpeechPrefetcher] = None, log: Optional[ModelLog] = None
+) -> List[Stage]:
+    """Declare the text transformation stages of the pipeline.
+
+    The stages expect the transcript as the "transcript" input. With
+    STREAM_OUTPUT enabled the stages stream their output.
+
+    Args:
+        speaker_name: The speaker's name.
+        title: The title of the talk.
+        speech: Optional prefetcher receiving the narrative while it is streamed.
+        log: Optional log of the run recording the model that served each stage.
+
+    Returns:
+        Stages producing "summary", "extract", "narrative" and "visualization_prompt".
+    """
+    def respond(name: str, system_message: str, text: str, feed: Optional[Callable[[str], None]] = None) -> str:
+        def request(model: str, timeout: Optional[float]) -> str:
+            if feed:
+                return stream_openai_response(system_message, speaker_name, title, text, feed, model)
+            return get_openai_response(system_message, speaker_name, title, text, model, timeout)
+
+        return model_router.call(name, estimate_tokens(text), request, log, stream=feed is not None)
+
+    def chat_stage(name: str, heading: str, system_message: str, source: str) -> Stage:
+        fingerprint = (system_message, *model_router.fingerprint(name), speaker_name, title)
+        if config.STREAM_OUTPUT:
+            return Stage(
+                name,
+                lambda text, output: stream_section(
+                    output, heading, name,
+                    lambda feed: respond(name, system_message, text, feed),
+                    on_delta=speech.feed if speech and name == "narrative" else None,
+                ),
+                deps=[source],
+                description=f"Generating {heading.lower()}...",
+                display=lambda text, output: print_section(heading, text, output),
+                stream=True,
+                fingerprint=fingerprint,
+            )
+        return Stage(
+            name,
+            lambda text: respond(name, system_message, text),
+            deps=[source],
+            description=f"Generating {heading.lower()}...",
+            display=lambda text, output: print_section(heading, text, output),
+            fingerprint=fingerprint,
+        )
+
+    summary_fingerprint = (
+        SUMMARY_SYSTEM_MESSAGE, CHUNK_SUMMARY_SYSTEM_MESSAGE, REDUCE_SUMMARY_SYSTEM_MESSAGE,
+        *model_router.fingerprint("summary"), config.SUMMARY_CHUNK_THRESHOLD, config.SUMMARY_CHUNK_TOKENS,
+        speaker_name, title,
+    )
+    if config.STREAM_OUTPUT:
+        summary_stage = Stage(
+            "summary",
+            lambda transcript, output: stream_section(
+                output, "Summary", "summary",
+                lambda feed: summarize_transcript(speaker_name, title, transcript, on_delta=feed, log=log),
+            ),
+            deps=["transcript"],
+            description="Generating summary...",
+            display=lambda text, output: print_section("Summary", text, output),
+            stream=True,
+            fingerprint=summary_fingerprint,
+        )
+    else:
+        summary_stage = Stage(
+            "summary",
+            lambda transcript: summarize_transcript(speaker_name, title, transcript, log=log),
+            deps=["transcript"],
+            description="Generating summary...",
+            display=lambda text, output: print_section("Summary", text, output),
+            fingerprint=summary_fingerprint,
+        )
+
+    return [
+        summary_stage,
+        chat_stage("extract", "Extract", EXTRACT_SYSTEM_MESSAGE, "summary"),
+        chat_stage("narrative", "Narrative", NARRATIVE_SYSTEM_MESSAGE, "extract"),
+        chat_stage("visualization_prompt", "Visualization Prompt", IMAGE_SYSTEM_MESSAGE, "summary"),
+    ]
+
+
+def media_stages(
+    audio_path: str = config.AUDIO_PATH,
+    image_path: str = config.IMAGE_PATH,
+    speech: Optional[SpeechPrefetcher] = None,
+) -> List[Stage]:
+    """Declare the media generation stages of the pipeline.
+
+    The stages expect the "narrative" and "visualization_prompt" results.
+
+    Args:
+        audio_path: The output file path of the audio.
+        image_path: The output file path of the image.
+        speech: Optional prefetcher that already synthesized parts of the streamed
+            narrative; otherwise the narrative is synthesized in concurrent chunks.
+
+    With MEDIA_STORE_ENABLED, the files are links into the media store (see
+    media_store.py), and media already stored for the same input is reused.
+
+    Returns:
+        Stages producing the audio file and the image file.
+    """
+    def generate_audio(narrative: str) -> None:
+        key = media_store.make_key("audio", config.TTS_MODEL, config.TTS_VOICE, narrative)
+        if speech:
+            if not media_store.generate(audio_path, key, lambda path: speech.finish(narrative, path)):
+                speech.discard()
+        else:
+            media_store.generate(audio_path, key, lambda path: chunked_text_to_speech(narrative, path))
+
+    def generate_image(prompt: str) -> None:
+        key = media_store.make_key("image", config.IMAGE_MODEL, config.IMAGE_SIZE, prompt)
+        media_store.generate(image_path, key, lambda path: image_generation(prompt, path))
+
+    return [
+        Stage(
+            "audio", generate_audio, deps=["narrative"], description="Generating audio...",
+            fingerprint=(config.TTS_MODEL, config.TTS_VOICE), outputs=[audio_path],
+        ),
+        Stage(
+            "image", generate_image,
+            deps=["visualization_prompt"], description="Generating image...", optional=True,
+            fingerprint=(config.IMAGE_MODEL, config.IMAGE_SIZE), outputs=[image_path],
+        ),
+    ]
 
 
 def process_talk_content(speaker_name: str, title: str, transcript: str) -> Tuple[str, str, str, str]:
     """Process TED talk content through AI transformations pipeline:
     
-    1. Generate a concise summary from the full transcript
+    1. Generate a concise summary from the full transcript (map-reduce over
+       chunks for long transcripts, see summarizer.py)
     2. Extract key insights and main points from the summary
     3. Create an engaging narrative suitable for audio presentation
     4. Generate a visualization prompt based on the summary
 
+    Steps 2 and 4 run concurrently once the summary is available.
+
     Args:
         speaker_name: The speaker's name.
         title: The title of the talk.
@@ -43,56 +249,8 @@ def process_talk_content(speaker_name: str, title: str, transcript: str) -> Tupl
     Returns:
         Tuple containing (summary, extract, narrative, visualization_prompt).
     """
-    
-    # Step 1: Generate summary
-    print(f"\033[94mGenerating summary...\033[0m")
-    summary = get_openai_response(
-        SUMMARY_SYSTEM_MESSAGE, speaker_name, title, transcript
-    )
-    
-    print("="*config.TEXT_WIDTH)
-    print("Summary:".center(config.TEXT_WIDTH))
-    print("="*config.TEXT_WIDTH)
-    print(textwrap.fill(summary, width=config.TEXT_WIDTH))
-    print("="*config.TEXT_WIDTH)
-
-    # Step 2: Generate extract
-    print(f"\033[94mGenerating extract...\033[0m")
-    extract = get_openai_response(
-        EXTRACT_SYSTEM_MESSAGE, speaker_name, title, summary
-    )
-    
-    print("="*config.TEXT_WIDTH)
-    print("Extract:".center(config.TEXT_WIDTH))
-    print("="*config.TEXT_WIDTH)
-    print(textwrap.fill(extract, width=config.TEXT_WIDTH))
-    print("="*config.TEXT_WIDTH)
-
-    # Step 3: Generate narrative
-    print(f"\033[94mGenerating narrative...\033[0m")
-    narrative = get_openai_response(
-        NARRATIVE_SYSTEM_MESSAGE, speaker_name, title, extract
-    )
-    
-    print("="*config.TEXT_WIDTH)
-    print("Narrative:".center(config.TEXT_WIDTH))
-    print("="*config.TEXT_WIDTH)
-    print(textwrap.fill(narrative, width=config.TEXT_WIDTH))
-    print("="*config.TEXT_WIDTH)
-
-    # Step 4: Generate visualization prompt
-    print(f"\033[94mGenerating visualization prompt...\033[0m")
-    visualization_prompt = get_openai_response(
-        IMAGE_SYSTEM_MESSAGE, speaker_name, title, summary
-    )
-    
-    print("="*config.TEXT_WIDTH)
-    print("Visualization Prompt:".center(config.TEXT_WIDTH))
-    print("="*config.TEXT_WIDTH)
-    print(textwrap.fill(visualization_prompt, width=config.TEXT_WIDTH))
-    print("="*config.TEXT_WIDTH)
-    
-    return summary, extract, narrative, visualization_prompt
+    results = run_stages(content_stages(speaker_name, title), inputs={"transcript": transcript})
+    return results["summary"], results["extract"], results["narrative"], results["visualization_prompt"]
 
 
 def generate_media_content(speaker_name: str, title: str, narrative: str, visualization_prompt: str) -> None:
@@ -100,6 +258,8 @@ def generate_media_content(speaker_name: str, title: str, narrative: str, visual
     
     1. Converts narrative text to speech audio file
     2. Creates an image based on the provided visualization prompt
+
+    Both steps run concurrently.
     
     Args:
         speaker_name: The speaker's name.
@@ -107,14 +267,65 @@ def generate_media_content(speaker_name: str, title: str, narrative: str, visual
         narrative: The narrative text.
         visualization_prompt: The pre-generated visualization prompt for image creation.
     """
-    
-    # Generate audio
-    print(f"\033[94mGenerating audio...\033[0m")
-    text_to_speech(narrative)
-    
-    # Generate image
+    run_stages(media_stages(), inputs={"narrative": narrative, "visualization_prompt": visualization_prompt})
+
+
+def run_talk_pipeline(
+    speaker_name: str,
+    title: str,
+    transcript: str,
+    output_dir: str = config.DATA_DIR,
+    quiet: bool = False,
+    targets: Optional[Sequence[str]] = None,
+    url: str = "",
+) -> dict:
+    """Run text processing, media generation and search as one dependency graph.
+
+    Args:
+        speaker_name: The speaker's name.
+        title: The title of the talk.
+        transcript: The full transcript text.
+        output_dir: Directory where the audio and image files are written.
+        quiet: If True, the stages' output is not printed.
+        targets: Optional names of the stages to produce, e.g. ["search_results"];
+            only these and the stages they depend on run. Defaults to all stages.
+        url: The URL of the talk; with SEMANTIC_INDEX_ENABLED, the talk is added
+            to the semantic index and excluded from its own archive matches.
+
+    Completed stages are checkpointed in the manifest of output_dir, and a
+    rerun restores the stages whose inputs are unchanged. With FUSED_GENERATION
+    enabled, the text stages are generated in one structured-output call (see
+    fused.py) and only invalid fields fall back to their own call.
+
+    Returns:
+        Dictionary mapping stage names to their results, and "models" to the
+        models that served the chat stages computed in this run.
+    """
+    audio_path = os.path.join(output_dir, config.AUDIO_FILENAME)
+    # The audio is only prefetched while it is a target; no other stage depends on it
+    wants_audio = not targets or "audio" in targets
+    speech = SpeechPrefetcher(audio_path) if config.STREAM_OUTPUT and wants_audio else None
+    log = ModelLog()
+    stages = (
+        content_stages(speaker_name, title, speech, log)
+        + media_stages(audio_path, os.path.join(output_dir, config.IMAGE_FILENAME), speech)
+        + search_stages(speaker_name, title, url, log)
+    )
+    if config.SEMANTIC_INDEX_ENABLED and url:
+        stages += index_stages(speaker_name, title, url)
+    if config.FUSED_GENERATION:
+        stages = fuse_stages(stages, speaker_name, title, log)
+    if targets:
+        stages = select_stages(stages, targets)
     try:
-        print(f"\033[94mGenerating image...\033[0m")
-        image_generation(visualization_prompt)
-    except Exception as e:
-        print(f"Image generation failed: {e}")
+        results = run_stages(
+            stages, inputs={"transcript": transcript}, quiet=quiet, manifest=load_manifest(output_dir)
+        )
+    finally:
+        # Stops the segments prefetched for an audio stage that was restored or failed
+        if speech:
+            speech.discard()
+    results["models"] = log.served()
+    if results["models"] and not quiet:
+        print(f"\033[90mModels: {log.summary()}\033[0m")
+    return results
@@ -0,0 +1,204 @@
+"""
+Fused generation of the text stages.
+
+Instead of one chat round trip per text stage (summary, extract, narrative,
+visualization prompt and search queries), the fused mode asks for all of them
+in a single structured-output call whose response is constrained to a JSON
+schema. Long transcripts that need map-reduce summarization (see
+summarizer.py) are summarized first, and a second call derives the other four
+fields from the summary.
+
+Every field of the response is validated on its own. Fields that are missing
+or invalid fall back to the regular staged path: fuse_stages wraps the text
+stages so that each one uses the fused value when it is valid and consistent
+with its inputs, and runs its own chat call otherwise. The wrapped stages do
+not stream; their results are printed once complete.
+"""
+
+import io
+import json
+from typing import Any, Dict, List, Optional, Sequence, TextIO
+
+from ai_services import get_structured_response
+from config import config
+from metrics import metrics
+from pipeline import Stage
+from prompts import FUSED_DERIVED_SYSTEM_MESSAGE, FUSED_SYSTEM_MESSAGE
+from routing import ModelLog, model_router
+from summarizer import estimate_tokens, summarize_transcript
+
+# Fused fields and the stage whose output each one is generated from
+FUSED_FIELDS = {
+    "summary": "transcript",
+    "extract": "summary",
+    "narrative": "extract",
+    "visualization_prompt": "summary",
+    "search_queries": "summary",
+}
+
+# Fields that are lists of strings; all others are strings
+LIST_FIELDS = ("search_queries",)
+
+
+def fused_schema(fields: Sequence[str]) -> Dict[str, Any]:
+    """Build the strict JSON schema of a fused response.
+
+    Args:
+        fields: The requested fields.
+
+    Returns:
+        JSON schema of an object with all fields required.
+    """
+    properties = {
+        field: {"type": "array", "items": {"type": "string"}} if field in LIST_FIELDS else {"type": "string"}
+        for field in fields
+    }
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(fields),
+        "additionalProperties": False,
+    }
+
+
+def parse_fused_response(text: str, fields: Sequence[str]) -> Dict[str, Any]:
+    """Parse a fused response, keeping only the valid fields.
+
+    Strings must be non-empty and lists must hold at least one non-empty
+    string. Every dropped field is counted in the "fused_fallbacks" metric.
+
+    Args:
+        text: The response as JSON text.
+        fields: The requested fields.
+
+    Returns:
+        Dictionary mapping the valid fields to their values.
+    """
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict):
+        data = {}
+
+    valid: Dict[str, Any] = {}
+    for field in fields:
+        value = data.get(field)
+        if field in LIST_FIELDS:
+            if isinstance(value, list) and value and all(isinstance(item, str) and item.strip() for item in value):
+                valid[field] = value
+        elif isinstance(value, str) and value.strip():
+            valid[field] = value
+        if field not in valid:
+            metrics.add("fused_fallbacks", field=field)
+    return valid
+
+
+def generate_fused(
+    speaker_name: str, title: str, transcript: str, log: Optional[ModelLog] = None, file: Optional[TextIO] = None
+) -> Dict[str, Any]:
+    """Generate the text stages of a talk in one or two structured-output calls.
+
+    The calls use the "fused" stage's model (see routing.py).
+
+    Args:
+        speaker_name: The speaker's name.
+        title: The title of the talk.
+        transcript: The full transcript text.
+        log: Optional log of the run recording the model of the fused calls.
+        file: Optional stream to report a failure to; defaults to stdout.
+
+    Returns:
+        Dictionary mapping the successfully generated fields to their values;
+        empty if the calls failed.
+    """
+    fields = list(FUSED_FIELDS)
+    model = model_router.stage_model("fused")
+    try:
+        if estimate_tokens(transcript) <= config.SUMMARY_CHUNK_THRESHOLD:
+            response = get_structured_response(
+                FUSED_SYSTEM_MESSAGE, speaker_name, title, transcript, "talk_artifacts", fused_schema(fields), model
+            )
+            if log is not None:
+                log.record("fused", model)
+            return parse_fused_response(response, fields)
+
+        summary = summarize_transcript(speaker_name, title, transcript, log=log)
+        derived = fields[1:]
+        response = get_structured_response(
+            FUSED_DERIVED_SYSTEM_MESSAGE, speaker_name, title, summary, "summary_artifacts", fused_schema(derived),
+            model,
+        )
+        if log is not None:
+            log.record("fused", model)
+        return {"summary": summary, **parse_fused_response(response, derived)}
+    except Exception as e:
+        print(f"Fused generation failed, falling back to the staged path: {e}", file=file)
+        metrics.add("fused_fallbacks", len(fields), field="all")
+        return {}
+
+
+def fused_stage(speaker_name: str, title: str, log: Optional[ModelLog] = None) -> Stage:
+    """Declare the stage generating all fused fields; it expects the "transcript" input."""
+    return Stage(
+        "fused",
+        lambda transcript, output: generate_fused(speaker_name, title, transcript, log, output),
+        deps=["transcript"],
+        description="Generating all text stages in one call...",
+        stream=True,
+        fingerprint=(
+            FUSED_SYSTEM_MESSAGE, FUSED_DERIVED_SYSTEM_MESSAGE, model_router.stage_model("fused"),
+            *model_router.fingerprint("summary"),
+            config.SUMMARY_CHUNK_THRESHOLD, config.SUMMARY_CHUNK_TOKENS, speaker_name, title,
+        ),
+    )
+
+
+def _fuse(stage: Stage) -> Stage:
+    """Wrap a text stage to use the fused value of its field when it is consistent."""
+    source = FUSED_FIELDS[stage.name]
+
+    def run(*args: Any) -> Any:
+        *values, fused = args
+        inputs = dict(zip(stage.deps, values))
+        # Only use the fused value if it was generated from the same input
+        consistent = source == "transcript" or (source in fused and fused[source] == inputs.get(source))
+        if stage.name in fused and consistent:
+            return fused[stage.name]
+        if stage.name in fused:
+            metrics.add("fused_fallbacks", field=stage.name)
+        if stage.stream:
+            # The fallback's streamed rendering is discarded; display prints the result
+            return stage.func(*values, output=io.StringIO())
+        return stage.func(*values)
+
+    return Stage(
+        stage.name,
+        run,
+        deps=list(stage.deps) + ["fused"],
+        description=stage.description,
+        display=stage.display,
+        optional=stage.optional,
+        fingerprint=stage.fingerprint,
+        outputs=stage.outputs,
+    )
+
+
+def fuse_stages(
+    stages: List[Stage], speaker_name: str, title: str, log: Optional[ModelLog] = None
+) -> List[Stage]:
+    """Switch the text stages of a pipeline to fused generation.
+
+    Args:
+        stages: The pipeline's stages.
+        speaker_name: The speaker's name.
+        title: The title of the talk.
+        log: Optional log of the run recording the model of the fused calls.
+
+    Returns:
+        The fused stage followed by the stages, with the text stages wrapped
+        to fall back to their own call per field.
+    """
+    return [fused_stage(speaker_name, title, log)] + [
+        _fuse(stage) if stage.name in FUSED_FIELDS else stage for stage in stages
+    ]
@@ -5,65 +5,408 @@ This module serves as the entry point for the TED Talk processing pipeline,
 which includes scraping TED talks, downloading transcripts, processing content
 through AI transformations, and generating media content and further suggestions.
 
-The application supports command-line arguments to specify which talk (newest, second newest, etc.) to process
-and handles the entire workflow from data collection to content generation.
+The application is organized in subcommands:
+- list: print the talk listing (served from the local listing cache while fresh)
+- process: process a talk by position or URL, a range of talks in one batch, or
+  newly published talks in watch mode (default when no subcommand is given)
+- search-only / media-only: only run the search or media stages of a talk and
+  the stages they depend on, reusing the talk's checkpoints
+
+The heavy dependencies (the OpenAI and Tavily SDKs, yt-dlp, Selenium) are only
+imported by the commands that need them, so that --help, argument errors and
+listing cached talks return immediately.
 """
 
-import os
 import argparse
+import os
+import sys
+import time
+from typing import Any, List, Optional, Sequence
 
 from config import config
-from ted_scraper import scrape_ted_talks, transcript_downloader
-from content_processors import process_talk_content, generate_media_content
-from search_service import generate_search_queries
+from metrics import metrics
+
+COMMANDS = ("list", "process", "search-only", "media-only")
+
+# Stages produced by the partial commands
+COMMAND_TARGETS = {
+    "search-only": ["search_results"],
+    "media-only": ["audio", "image"],
+}
+
+
+def process_talk(
+    talk: dict,
+    output_dir: str = config.DATA_DIR,
+    quiet: bool = False,
+    targets: Optional[Sequence[str]] = None,
+    transcript: Optional[str] = None,
+) -> bool:
+    """Download the transcript of a talk and run the processing pipeline on it.
+
+    Args:
+        talk: The talk metadata with "url", "speaker" and "title".
+        output_dir: Directory where the generated files are written.
+        quiet: If True, the pipeline's output is not printed.
+        targets: Optional names of the stages to produce; defaults to all stages.
+        transcript: The already downloaded transcript, e.g. from
+            prefetch_transcripts; downloaded if not given or None.
+
+    Returns:
+        False if the talk has no transcript, True otherwise.
+
+    Raises:
+        Exception: If the transcript download fails.
+    """
+    from content_processors import run_talk_pipeline
+    from ted_scraper import transcript_downloader
+
+    url = talk["url"]
+    speaker_name = talk["speaker"]
+    title = talk["title"]
+
+    with metrics.timer("talk"):
+        os.makedirs(output_dir, exist_ok=True)
+        if transcript is None:
+            transcript = transcript_downloader(url)
+        if transcript == "No transcript available.":
+            return False
+
+        run_talk_pipeline(
+            speaker_name, title, transcript, output_dir=output_dir, quiet=quiet, targets=targets, url=url
+        )
+    return True
+
+
+def export_metrics(args: argparse.Namespace) -> None:
+    """Print and write the run's metrics as requested on the command line.
+
+    Args:
+        args: The parsed command-line arguments.
+    """
+    from cache import audio_cache, chat_cache, search_cache
+    from media_store import media_store
+
+    caches = (("chat", chat_cache), ("audio", audio_cache), ("search", search_cache), ("media", media_store))
+    for name, cache in caches:
+        stats = cache.stats()
+        metrics.set("cache_hits", stats["hits"], cache=name)
+        metrics.set("cache_misses", stats["misses"], cache=name)
+
+    if args.profile:
+        print(metrics.summary_table())
+    if args.report_json:
+        metrics.write_json(args.report_json)
+    if args.prometheus:
+        metrics.write_prometheus(args.prometheus)
+
+
+def print_cache_stats() -> None:
+    """Print the hits, misses and hit rates of the persistent caches."""
+    from cache import audio_cache, chat_cache, search_cache
+    from media_store import media_store
+
+    parts = []
+    caches = (("chat", chat_cache), ("audio", audio_cache), ("search", search_cache), ("media", media_store))
+    for name, cache in caches:
+        stats = cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        rate = f" ({stats['hits'] / lookups:.0%})" if lookups else ""
+        parts.append(f"{name} {stats['hits']} hits / {stats['misses']} misses{rate}")
+    print(f"\033[90mCache: {', '.join(parts)}\033[0m")
+
+
+def watch(args: argparse.Namespace) -> None:
+    """Run the watch mode until interrupted.
+
+    Args:
+        args: The parsed command-line arguments.
+    """
+    from ted_scraper import talk_slug
+    from watcher import SeenIndex, Watcher
+
+    index = SeenIndex(config.WATCH_INDEX_PATH)
+    print(
+        f"\033[92mWatching {config.TED_BASE_URL} every {args.interval:.0f}s with {args.workers} workers "
+        f"({len(index)} talks seen)\033[0m"
+    )
+
+    def write_metrics() -> None:
+        if args.report_json:
+            metrics.write_json(args.report_json)
+        if args.prometheus:
+            metrics.write_prometheus(args.prometheus)
+
+    Watcher(
+        lambda talk: process_talk(talk, config.talk_dir(talk_slug(talk["url"])), quiet=True),
+        index,
+        interval=args.interval,
+        workers=args.workers,
+        backfill=args.backfill,
+        on_poll=write_metrics,
+    ).run()
+
+
+def select_talk(args: argparse.Namespace) -> dict:
+    """Return the talk selected on the command line.
+
+    With --url the listing is not scraped; otherwise the talk is looked up by
+    its position in the (cached) listing.
+
+    Args:
+        args: The parsed command-line arguments.
+
+    Returns:
+        The talk metadata with "url", "speaker" and "title".
+    """
+    from ted_scraper import scrape_ted_talks, talk_from_url
+
+    if args.url:
+        talk = dict(talk_from_url(args.url))
+    else:
+        talk = dict(scrape_ted_talks(refresh=args.refresh)[args.talk_number])
+    if args.speaker:
+        talk["speaker"] = args.speaker
+    if args.title:
+        talk["title"] = args.title
+    print(f"\033[92mSelected Talk: {talk['title']} by {talk['speaker']} from {talk['url']}\033[0m")
+    return talk
+
 
+def list_talks(args: argparse.Namespace) -> None:
+    """Print the talk listing.
 
-def main():
+    Args:
+        args: The parsed command-line arguments.
+    """
+    from ted_scraper import scrape_ted_talks
+
+    talks = scrape_ted_talks(args.pages, refresh=args.refresh)
+    for number, talk in sorted(talks.items()):
+        print(f"{number:>4}. {talk['title']} by {talk['speaker']}")
+        print(f"      \033[90m{talk['url']}\033[0m")
+
+
+def process(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    """Process a single talk, a batch of talks or newly published talks.
+
+    Args:
+        args: The parsed command-line arguments.
+        parser: The subcommand's parser, used to report invalid combinations.
+    """
+    if args.watch:
+        watch(args)
+        return
+
+    if args.batch_api and not (args.talks or args.all):
+        parser.error("--batch-api requires --talks or --all")
+
+    if args.talks or args.all:
+        from backfill import backfill_text_stages
+        from batch import parse_talk_numbers, print_batch_report, run_batch
+        from ted_scraper import prefetch_transcripts, scrape_ted_talks, talk_slug
+
+        talks = scrape_ted_talks(refresh=args.refresh)
+        talk_numbers = sorted(talks) if args.all else parse_talk_numbers(args.talks, list(talks))
+        start = time.perf_counter()
+        numbers = {talks[number]["url"]: number for number in talk_numbers}
+        if args.batch_api:
+            print(f"\033[92mGenerating text stages of {len(talk_numbers)} talks through the Batch API\033[0m")
+            _, downloaded = backfill_text_stages([talks[number] for number in talk_numbers])
+            transcripts = ((numbers[url], transcript) for url, transcript in downloaded.items())
+        else:
+            transcripts = ((numbers[url], transcript) for url, transcript in prefetch_transcripts(list(numbers)))
+        print(f"\033[92mProcessing {len(talk_numbers)} talks with {args.workers} workers\033[0m")
+        results = run_batch(
+            talks,
+            talk_numbers,
+            lambda talk, transcript: process_talk(
+                talk, config.talk_dir(talk_slug(talk["url"])), quiet=True, transcript=transcript
+            ),
+            workers=args.workers,
+            transcripts=transcripts,
+        )
+        print_batch_report(results, time.perf_counter() - start)
+    elif not process_talk(select_talk(args)):
+        print("\033[91mNo transcript available for this talk.\033[0m")
+        return
+
+    print_cache_stats()
+
+
+def process_partial(args: argparse.Namespace) -> None:
+    """Run only the search or media stages of a talk and the stages they depend on.
+
+    Args:
+        args: The parsed command-line arguments.
+    """
+    if not process_talk(select_talk(args), targets=COMMAND_TARGETS[args.command]):
+        print("\033[91mNo transcript available for this talk.\033[0m")
+        return
+    print_cache_stats()
+
+
+def _add_talk_arguments(parser: argparse.ArgumentParser, selection: Any) -> None:
+    """Add the options selecting and describing a single talk; --url is added to selection."""
+    parser.add_argument(
+        "--talk_number", type=int, default=1, help="The number of the TED talk to process"
+    )
+    selection.add_argument(
+        "--url", help="Process the talk at this URL without scraping the listing"
+    )
+    parser.add_argument("--speaker", help="Speaker name of the talk, overriding the scraped one")
+    parser.add_argument("--title", help="Title of the talk, overriding the scraped one")
+    parser.add_argument(
+        "--refresh", action="store_true", help="Scrape the listing even if a fresh cached listing exists"
+    )
+
+
+def _add_run_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options shared by the commands running the pipeline."""
+    parser.add_argument(
+        "--stream", action="store_true", help="Render generated text as it arrives"
+    )
+    parser.add_argument(
+        "--fused", action="store_true", help="Generate the text stages in one structured-output call"
+    )
+    parser.add_argument(
+        "--fresh", action="store_true", help="Ignore stage checkpoints and recompute every stage"
+    )
+    parser.add_argument(
+        "--profile", action="store_true", help="Print timings, token usage and cache hits per stage"
+    )
+    parser.add_argument("--report-json", metavar="PATH", help="Write the run's metrics as a JSON report")
+    parser.add_argument("--prometheus", metavar="PATH", help="Write the run's metrics as a Prometheus textfile")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser with its subcommands."""
+    parser = argparse.ArgumentParser(description="TED Talk Transcript and Summary Generator")
+    commands = parser.add_subparsers(dest="command", metavar="{" + ",".join(COMMANDS) + "}")
+
+    listing = commands.add_parser("list", help="List the talks of the TED listing")
+    listing.add_argument(
+        "--pages", type=int, default=config.LISTING_PAGES, help="Number of listing pages to list"
+    )
+    listing.add_argument(
+        "--refresh", action="store_true", help="Scrape the listing even if a fresh cached listing exists"
+    )
+
+    process_parser = commands.add_parser(
+        "process", help="Process a talk, a batch of talks or newly published talks (default)"
+    )
+    selection = process_parser.add_mutually_exclusive_group()
+    _add_talk_arguments(process_parser, selection)
+    selection.add_argument(
+        "--talks", type=str, help="Batch mode: talks to process, e.g. '1-20' or '1,3,5-8'"
+    )
+    selection.add_argument(
+        "--all", action="store_true", help="Batch mode: process every talk in the listing"
+    )
+    selection.add_argument(
+        "--watch", action="store_true", help="Keep polling the listing and process newly published talks"
+    )
+    process_parser.add_argument(
+        "--interval", type=float, default=config.WATCH_INTERVAL, help="Watch mode: seconds between polls"
+    )
+    process_parser.add_argument(
+        "--backfill", action="store_true",
+        help="Watch mode: on first start, process the listed talks instead of recording them as seen",
+    )
+    process_parser.add_argument(
+        "--batch-api", action="store_true",
+        help="Batch mode: generate the text stages of all selected talks through the OpenAI Batch API",
+    )
+    process_parser.add_argument(
+        "--workers", type=int, default=config.BATCH_WORKERS, help="Number of talks processed concurrently"
+    )
+    _add_run_arguments(process_parser)
+    # Lets process() report errors with the usage of the subcommand
+    process_parser.set_defaults(command_parser=process_parser)
+
+    for name, description in (
+        ("search-only", "Only generate the search queries and results of a talk"),
+        ("media-only", "Only generate the audio and image of a talk"),
+    ):
+        partial = commands.add_parser(name, help=description)
+        _add_talk_arguments(partial, partial)
+        _add_run_arguments(partial)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None):
     """
     Main function to orchestrate the TED talk processing pipeline.
-    
+
     This function handles the complete workflow:
     1. Validates configuration settings
-    2. Scrapes available TED talks
+    2. Scrapes available TED talks, unless the talk is given by URL or the
+       listing cache is fresh
     3. Download and processe the selected talk's transcript
     4. Generates AI-processed content (summary, extract, narrative, visualization prompt)
     5. Creates media content (audio and visual)
     6. Generates and executes search queries and offers further suggestions
-    
+
+    Steps 4-6 run as one dependency graph so that independent stages overlap.
+    With --talks or --all, steps 3-6 run for several talks concurrently, each
+    writing into its own directory below DATA_DIR; with --batch-api their text
+    stages are generated in Batch API waves first. With --watch, the listing is
+    polled and only newly published talks are processed. The search-only and
+    media-only commands limit steps 4-6 to the stages they need.
+
+    Args:
+        argv: The command-line arguments; defaults to sys.argv. Without a
+            subcommand, the arguments are those of "process".
+
     Raises:
         Exception: Any error that occurs during the processing pipeline
     """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv = ["process"] + argv
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "list":
+        try:
+            list_talks(args)
+        except Exception as e:
+            print(f"Error occurred: {e}")
+        return
+
     try:
         # Ensure APIs are set
         config.validate()
-        
-        talks = scrape_ted_talks()
-        
+
         os.makedirs(config.DATA_DIR, exist_ok=True)
-        parser = argparse.ArgumentParser(description="TED Talk Transcript and Summary Generator")
-        parser.add_argument(
-            "--talk_number", type=int, default=1, help="The number of the TED talk to process"
-        )
-        args = parser.parse_args()
-        talk_number = args.talk_number
-        talk = talks[talk_number]
-        url = talk["url"]
-        speaker_name = talk["speaker"]
-        title = talk["title"]
-        print(f"\033[92mSelected Talk: {title} by {speaker_name} from {url}\033[0m")
-
-        transcript = transcript_downloader(url)
-        if transcript == "No transcript available.":
-            print("\033[91mNo transcript available for this talk.\033[0m")
-            return
-        
-        summary, extract, narrative, visualization_prompt = process_talk_content(speaker_name, title, transcript)
-        generate_media_content(speaker_name, title, narrative, visualization_prompt)
-        generate_search_queries(speaker_name, title, summary)
-            
+        if args.stream:
+            config.STREAM_OUTPUT = True
+        if args.fresh:
+            config.RESUME_ENABLED = False
+        if args.fused:
+            config.FUSED_GENERATION = True
+
+        if args.command == "process":
+            process(args, args.command_parser)
+        else:
+            process_partial(args)
+        from media_store import media_store
+
+        # Wait until the generated media is linked into the output directories
+        media_store.flush()
+        if not getattr(args, "watch", False):
+            export_metrics(args)
+
     except Exception as e:
         print(f"Error occurred: {e}")
-        
+        # The metrics of the failed run are still exported, but must not mask its error
+        try:
+            export_metrics(args)
+        except Exception as export_error:
+            print(f"Failed to export the metrics: {export_error}")
+        raise
+
 
 if __name__ == "__main__":
     main()
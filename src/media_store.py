@@ -0,0 +1,219 @@
+"""
+Content-addressed store of the generated audio and images.
+
+Generated media is stored once under MEDIA_STORE_DIR, addressed by a hash of
+everything that determines it (model, voice or image size, and the input
+text), and each talk's output directory gets symbolic links to its files.
+Repeating a narrative or visualization prompt therefore costs neither an API
+call nor a copy.
+
+Layout of MEDIA_STORE_DIR:
+- objects/: one file per request key, hard-linked to its content blob
+- blobs/: one file per distinct content, named by its SHA-256, so identical
+  media produced by different requests is stored once
+- tmp/: files still being generated
+
+Producers write into tmp/ and hand the file over. Hashing, linking and the
+atomic renames into objects/ and the talk directories happen in order on a
+single background writer thread, so the next API call does not wait for them;
+a talk's links appear once its media is published. Failed writes are
+reported and counted in the "media_store_errors" metric, and the talk's file
+is then missing, so its checkpoint is not restored. flush() waits for all
+pending writes and is called when the process exits.
+"""
+
+import atexit
+import hashlib
+import os
+import queue
+import shutil
+import threading
+import uuid
+from typing import Any, Callable, Dict, Optional, Set
+
+from cache import DiskCache
+from config import config
+from metrics import metrics
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _replace_with_link(target: str, dest: str, symbolic: bool) -> None:
+    """Atomically replace dest with a link to target.
+
+    Symbolic links are relative, so the output directories can be moved
+    together with the store. Falls back to a hard link, then to a copy, where
+    the file system does not support the link type.
+    """
+    directory = os.path.dirname(dest) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f".tmp-{uuid.uuid4().hex}")
+    try:
+        if symbolic:
+            try:
+                os.symlink(os.path.relpath(target, directory), tmp_path)
+            except (OSError, NotImplementedError):
+                symbolic = False
+        if not symbolic:
+            try:
+                os.link(target, tmp_path)
+            except OSError:
+                shutil.copyfile(target, tmp_path)
+        os.replace(tmp_path, dest)
+    except OSError:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaStore:
+    """Content-addressed media files with deduplication and background publishing."""
+
+    def __init__(self, directory: str, enabled: bool = True):
+        """Initialize the store; the writer thread is started on first use.
+
+        Args:
+            directory: Directory of the store.
+            enabled: If False, media is written directly to its destination.
+        """
+        self.directory = directory
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._pending: Set[str] = set()
+        self._queue: "queue.Queue[Callable[[], None]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build the key of a media file from the values that determine it."""
+        return DiskCache.make_key(*parts)
+
+    def _object_path(self, name: str) -> str:
+        return os.path.join(self.directory, "objects", name[:2], name)
+
+    def contains(self, key: str, ext: str) -> bool:
+        """Return whether the media of a key is stored or being published, counting hits and misses.
+
+        Args:
+            key: Key produced by make_key.
+            ext: File extension of the media, e.g. ".mp3".
+        """
+        name = key + ext
+        with self._lock:
+            found = name in self._pending or os.path.isfile(self._object_path(name))
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        metrics.add("media_store_hits" if found else "media_store_misses", kind=ext.lstrip("."))
+        return found
+
+    def generate(self, path: str, key: str, produce: Callable[[str], None]) -> bool:
+        """Expose the media of a key at path, producing it first unless it is stored.
+
+        Args:
+            path: The destination file path, e.g. in a talk's output directory.
+            key: Key produced by make_key.
+            produce: Callable writing the media to the file path it is given.
+
+        Returns:
+            True if the media was produced, False if it was already stored.
+
+        Raises:
+            ValueError: If produce wrote no file.
+        """
+        if not self.enabled:
+            produce(path)
+            if not os.path.isfile(path):
+                raise ValueError(f"No media was written to {path}")
+            return True
+
+        ext = os.path.splitext(path)[1]
+        if self.contains(key, ext):
+            self._submit(lambda: self._link(key + ext, path))
+            return False
+
+        os.makedirs(os.path.join(self.directory, "tmp"), exist_ok=True)
+        tmp_path = os.path.join(self.directory, "tmp", f"{uuid.uuid4().hex}{ext}")
+        try:
+            produce(tmp_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if not os.path.isfile(tmp_path):
+            raise ValueError(f"No media was written for {path}")
+        with self._lock:
+            self._pending.add(key + ext)
+        self._submit(lambda: self._publish(key + ext, tmp_path))
+        self._submit(lambda: self._link(key + ext, path))
+        return True
+
+    def flush(self) -> None:
+        """Wait until all pending writes are done."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit/miss counters."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def _submit(self, job: Callable[[], None]) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="media-store-writer", daemon=True)
+                self._thread.start()
+        self._queue.put(job)
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                job()
+            except Exception as e:
+                metrics.add("media_store_errors")
+                print(f"\033[91mFailed to write media: {e}\033[0m")
+            finally:
+                self._queue.task_done()
+
+    def _publish(self, name: str, src: str) -> None:
+        """Move a produced file into the store, sharing the blob of identical content."""
+        try:
+            with metrics.timer("media_store.publish"):
+                ext = os.path.splitext(name)[1]
+                digest = _file_digest(src)
+                blob = os.path.join(self.directory, "blobs", digest[:2], digest + ext)
+                if os.path.isfile(blob):
+                    os.remove(src)
+                    metrics.add("media_store_deduplicated", kind=ext.lstrip("."))
+                else:
+                    os.makedirs(os.path.dirname(blob), exist_ok=True)
+                    os.replace(src, blob)
+                _replace_with_link(blob, self._object_path(name), symbolic=False)
+        finally:
+            if os.path.exists(src):
+                os.remove(src)
+            with self._lock:
+                self._pending.discard(name)
+
+    def _link(self, name: str, dest: str) -> None:
+        target = self._object_path(name)
+        if not os.path.isfile(target):
+            # Publishing the media failed; its error has been reported already
+            raise FileNotFoundError(f"{dest} not linked, {name} is not in the media store")
+        _replace_with_link(target, dest, symbolic=True)
+
+
+media_store = MediaStore(config.MEDIA_STORE_DIR, enabled=config.MEDIA_STORE_ENABLED)
+atexit.register(media_store.flush)
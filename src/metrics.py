@@ -0,0 +1,261 @@
+"""
+Run instrumentation: timings, counters and exports.
+
+Every pipeline stage and external call is wrapped in a named timer recording
+calls, errors and wall time. Counters record retries, cache hits, token usage,
+API cost and bytes written; the stage running a call is available through
+current_stage() to label them. The collected metrics can be printed as a summary table,
+written as a JSON run report, or as a Prometheus textfile for the node
+exporter's textfile collector.
+"""
+
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Tuple
+
+from config import config
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+# Pipeline stage of the running code; thread pools inside a stage pass it on explicitly
+_stage: "ContextVar[str]" = ContextVar("stage", default="none")
+
+
+class TimerStats:
+    """Aggregated wall-time statistics of a named operation."""
+
+    # Bound on the durations kept for percentiles
+    MAX_SAMPLES = 10000
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: List[float] = []
+
+    def record(self, elapsed: float, failed: bool) -> None:
+        self.calls += 1
+        self.errors += int(failed)
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        if len(self.samples) < self.MAX_SAMPLES:
+            self.samples.append(elapsed)
+
+    def percentile(self, fraction: float) -> float:
+        """Return a percentile (nearest rank) of the recorded durations."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_seconds": round(self.total, 6),
+            "mean_seconds": round(self.total / self.calls, 6) if self.calls else 0.0,
+            "p50_seconds": round(self.percentile(0.5), 6),
+            "p95_seconds": round(self.percentile(0.95), 6),
+            "max_seconds": round(self.max, 6),
+        }
+
+
+class Metrics:
+    """Thread-safe registry of timers, counters and gauges."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timers: Dict[str, TimerStats] = {}
+        self._counters: Dict[Tuple[str, LabelSet], float] = {}
+        self._gauges: Dict[Tuple[str, LabelSet], float] = {}
+        self.started = time.time()
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Time a block of code under a name, counting it as an error if it raises.
+
+        Args:
+            name: Name of the operation, e.g. "openai.chat" or "stage.summary".
+        """
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, failed)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Attribute the counters labeled with current_stage() within a block to a stage.
+
+        Args:
+            name: Name of the stage, e.g. "summary".
+        """
+        token = _stage.set(name)
+        try:
+            yield
+        finally:
+            _stage.reset(token)
+
+    def current_stage(self) -> str:
+        """Return the name of the stage running the calling code, "none" outside of stages."""
+        return _stage.get()
+
+    def record(self, name: str, seconds: float, failed: bool = False) -> None:
+        """Record a duration measured elsewhere under a timer's name.
+
+        Args:
+            name: Name of the operation, e.g. "stream.summary".
+            seconds: The duration in seconds.
+            failed: Whether the operation failed.
+        """
+        with self._lock:
+            self._timers.setdefault(name, TimerStats()).record(seconds, failed)
+
+    def add(self, name: str, value: float = 1, **labels: str) -> None:
+        """Increase a counter.
+
+        Args:
+            name: Name of the counter, e.g. "openai_prompt_tokens".
+            value: Amount to add.
+            **labels: Labels distinguishing series of the counter.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        """Set a gauge.
+
+        Args:
+            name: Name of the gauge.
+            value: The current value.
+            **labels: Labels distinguishing series of the gauge.
+        """
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all metrics as a JSON-serializable run report."""
+        def series(values: Dict[Tuple[str, LabelSet], float]) -> List[Dict[str, Any]]:
+            return [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(values.items())
+            ]
+
+        with self._lock:
+            return {
+                "started": self.started,
+                "duration_seconds": round(time.time() - self.started, 6),
+                "timers": {name: stats.to_dict() for name, stats in sorted(self._timers.items())},
+                "counters": series(self._counters),
+                "gauges": series(self._gauges),
+            }
+
+    def reset(self) -> None:
+        """Discard all collected metrics and restart the run clock."""
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+            self._gauges.clear()
+            self.started = time.time()
+
+    def summary_table(self) -> str:
+        """Format the timers and counters as a plain-text table."""
+        report = self.snapshot()
+        width = config.TEXT_WIDTH
+        lines = [
+            "=" * width,
+            "Profile:".center(width),
+            "=" * width,
+            f"{'operation':<28}{'calls':>7}{'errors':>7}{'total s':>10}{'mean s':>10}{'max s':>10}",
+        ]
+        timers = sorted(report["timers"].items(), key=lambda item: -item[1]["total_seconds"])
+        for name, stats in timers:
+            lines.append(
+                f"{name[:27]:<28}{stats['calls']:>7}{stats['errors']:>7}"
+                f"{stats['total_seconds']:>10.2f}{stats['mean_seconds']:>10.2f}{stats['max_seconds']:>10.2f}"
+            )
+        if report["counters"] or report["gauges"]:
+            lines.append("-" * width)
+        for entry in report["counters"] + report["gauges"]:
+            labels = ",".join(f"{key}={value}" for key, value in entry["labels"].items())
+            name = f"{entry['name']}{{{labels}}}" if labels else entry["name"]
+            value = entry["value"]
+            # Fractional counters such as cost_usd keep their cents
+            value_text = f"{value:,.0f}" if float(value).is_integer() else f"{value:,.4f}"
+            lines.append(f"{name[:width - 15]:<{width - 15}}{value_text:>15}")
+        lines.append("=" * width)
+        cost = sum(entry["value"] for entry in report["counters"] if entry["name"] == "cost_usd")
+        lines.append(f"Run time: {report['duration_seconds']:.1f}s, API cost: ${cost:.4f}")
+        return "\n".join(lines)
+
+    def to_prometheus(self, prefix: str = "ted_processor") -> str:
+        """Format the metrics in the Prometheus text exposition format."""
+        report = self.snapshot()
+        lines = []
+
+        def emit(name: str, kind: str, samples: List[Tuple[Dict[str, str], float]]) -> None:
+            metric = f"{prefix}_{_sanitize(name)}"
+            lines.append(f"# TYPE {metric} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{_sanitize(k)}="{_escape(v)}"' for k, v in labels.items())
+                lines.append(f"{metric}{{{label_text}}} {value}" if label_text else f"{metric} {value}")
+
+        timers = report["timers"]
+        emit("operation_calls_total", "counter", [({"operation": n}, s["calls"]) for n, s in timers.items()])
+        emit("operation_errors_total", "counter", [({"operation": n}, s["errors"]) for n, s in timers.items()])
+        emit("operation_seconds_total", "counter", [({"operation": n}, s["total_seconds"]) for n, s in timers.items()])
+        emit("operation_seconds_max", "gauge", [({"operation": n}, s["max_seconds"]) for n, s in timers.items()])
+
+        for kind, entries, suffix in (("counter", report["counters"], "_total"), ("gauge", report["gauges"], "")):
+            by_name: Dict[str, List[Tuple[Dict[str, str], float]]] = {}
+            for entry in entries:
+                by_name.setdefault(entry["name"], []).append((entry["labels"], entry["value"]))
+            for name, samples in by_name.items():
+                emit(f"{name}{suffix}", kind, samples)
+
+        emit("run_duration_seconds", "gauge", [({}, report["duration_seconds"])])
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str) -> None:
+        """Atomically write the run report as JSON."""
+        _atomic_write(path, json.dumps(self.snapshot(), indent=2))
+
+    def write_prometheus(self, path: str) -> None:
+        """Atomically write the metrics as a Prometheus textfile."""
+        _atomic_write(path, self.to_prometheus())
+
+
+def _sanitize(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _atomic_write(path: str, content: str) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(content)
+    # mkstemp creates the file readable by its owner only; exporters such as
+    # node_exporter's textfile collector usually run as another user
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+metrics = Metrics()
@@ -0,0 +1,295 @@
+"""
+Dependency-graph execution of pipeline stages.
+
+Each stage declares the stages whose outputs it consumes. Stages whose
+dependencies are satisfied run concurrently on a bounded thread pool, so the
+wall-clock time of a run is the length of the critical path rather than the
+sum of all stages. Console output of the stages is reported strictly in
+declaration order, regardless of the order in which the stages finish.
+Streaming stages write their output while they run; it is shown live while
+the stage is first in line and buffered otherwise. With a manifest (see
+checkpoints.py), stages declaring a fingerprint are restored instead of run
+when their inputs are unchanged.
+"""
+
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from checkpoints import StageManifest, stage_fingerprint
+from config import config
+from metrics import metrics
+
+
+class Stage:
+    """A single unit of work in the pipeline graph."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        deps: Sequence[str] = (),
+        description: Optional[str] = None,
+        display: Optional[Callable[[Any, "StageOutput"], None]] = None,
+        optional: bool = False,
+        stream: bool = False,
+        fingerprint: Optional[Sequence[Any]] = None,
+        outputs: Sequence[str] = (),
+    ):
+        """Initialize the stage.
+
+        Args:
+            name: Unique name of the stage; its result is stored under this name.
+            func: Callable receiving the results of the dependencies as positional arguments.
+            deps: Names of the stages this stage depends on.
+            description: Progress message printed before the stage's output.
+            display: Callable printing the stage's result, given the result and the
+                StageOutput to print to.
+            optional: If True, a failure is reported and only the dependent stages are skipped.
+            stream: If True, func additionally receives a StageOutput as the "output"
+                keyword argument to write its output while running; display is then
+                only used for output restored from a checkpoint.
+            fingerprint: Static inputs of the stage, such as prompt text and model name.
+                Only stages with a fingerprint are checkpointed.
+            outputs: Paths of the files the stage writes.
+        """
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.description = description
+        self.display = display
+        self.optional = optional
+        self.stream = stream
+        self.fingerprint = fingerprint
+        self.outputs = tuple(outputs)
+
+
+class OrderedConsole:
+    """Serializes the output of concurrently running stages into declaration order."""
+
+    def __init__(self, names: Sequence[str], quiet: bool = False):
+        """Initialize the console.
+
+        Args:
+            names: Stage names in the order their output should appear.
+            quiet: If True, all output is discarded.
+        """
+        self._names = list(names)
+        self._buffers: Dict[str, List[str]] = {name: [] for name in self._names}
+        self._closed: set = set()
+        self._head = 0
+        self._quiet = quiet
+        self._out = sys.stdout
+        self._lock = threading.Lock()
+
+    def write(self, name: str, text: str) -> None:
+        """Write text of a stage, live if the stage is first in line.
+
+        Args:
+            name: The name of the stage.
+            text: The text to write.
+        """
+        if self._quiet:
+            return
+        with self._lock:
+            if self._head < len(self._names) and self._names[self._head] == name:
+                self._out.write(text)
+                self._out.flush()
+            else:
+                self._buffers[name].append(text)
+
+    def close(self, name: str) -> None:
+        """Mark a stage's output as complete and pass the line on to the next stage.
+
+        Args:
+            name: The name of the stage.
+        """
+        with self._lock:
+            self._closed.add(name)
+            while self._head < len(self._names):
+                head = self._names[self._head]
+                if not self._quiet and self._buffers[head]:
+                    self._out.write("".join(self._buffers[head]))
+                    self._out.flush()
+                self._buffers[head] = []
+                if head not in self._closed:
+                    break
+                self._head += 1
+
+
+class StageOutput:
+    """File-like writer for the output of a single stage."""
+
+    def __init__(self, console: OrderedConsole, name: str):
+        self._console = console
+        self._name = name
+
+    def write(self, text: str) -> int:
+        self._console.write(self._name, text)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+class StageSkipped(Exception):
+    """Raised for stages that did not run because a dependency failed."""
+
+
+def select_stages(stages: List[Stage], targets: Sequence[str]) -> List[Stage]:
+    """Select the stages needed to produce the given targets.
+
+    Args:
+        stages: All stages of the graph.
+        targets: Names of the stages whose results are wanted.
+
+    Returns:
+        The targets and the stages they transitively depend on, in declaration order.
+
+    Raises:
+        ValueError: If a target is not a stage of the graph.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    needed = set()
+    todo = list(targets)
+    while todo:
+        name = todo.pop()
+        if name in needed:
+            continue
+        if name not in by_name:
+            raise ValueError(f"Unknown stage '{name}'")
+        needed.add(name)
+        todo.extend(dep for dep in by_name[name].deps if dep in by_name)
+    return [stage for stage in stages if stage.name in needed]
+
+
+def run_stages(
+    stages: List[Stage],
+    inputs: Optional[Dict[str, Any]] = None,
+    max_workers: int = config.PIPELINE_WORKERS,
+    quiet: bool = False,
+    manifest: Optional[StageManifest] = None,
+) -> Dict[str, Any]:
+    """Run the stages of a dependency graph with bounded concurrency.
+
+    Args:
+        stages: Stages in the order their output should be reported.
+        inputs: Precomputed results, available to the stages as dependencies.
+        max_workers: Maximum number of stages running at the same time.
+        quiet: If True, the stages' progress messages and output are not printed.
+        manifest: Optional manifest to restore unchanged stages from and record
+            completed stages in.
+
+    Returns:
+        Dictionary mapping stage names (and input names) to their results. Failed
+        optional stages and stages depending on them map to None.
+
+    Raises:
+        ValueError: If a dependency is unknown or the graph contains a cycle.
+        Exception: The error of the first non-optional stage that failed.
+    """
+    results: Dict[str, Any] = dict(inputs or {})
+    errors: Dict[str, BaseException] = {}
+    by_name = {stage.name: stage for stage in stages}
+
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in by_name and dep not in results:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    pending = [stage for stage in stages if stage.name not in results]
+    running: Dict[Future, Stage] = {}
+    finished = set(results)
+    fatal: Optional[BaseException] = None
+    fingerprints: Dict[str, str] = {}
+    restored = set()
+    console = OrderedConsole([stage.name for stage in stages], quiet=quiet)
+    for stage in stages:
+        if stage.name in results:
+            console.close(stage.name)
+
+    def report(stage: Stage) -> None:
+        # Emit a finished stage's output; the console keeps declaration order
+        output = StageOutput(console, stage.name)
+        error = errors.get(stage.name)
+        if stage.name in restored:
+            if stage.description:
+                output.write(f"\033[94m{stage.description}\033[0m \033[90m(restored from checkpoint)\033[0m\n")
+            if stage.display and not quiet:
+                stage.display(results[stage.name], output)
+        elif not isinstance(error, StageSkipped):
+            if stage.description and not stage.stream:
+                output.write(f"\033[94m{stage.description}\033[0m\n")
+            if error is not None:
+                if stage.optional:
+                    output.write(f"Stage '{stage.name}' failed: {error}\n")
+            elif stage.display and not stage.stream and not quiet:
+                stage.display(results[stage.name], output)
+        console.close(stage.name)
+
+    def timed(stage: Stage, *args: Any, **kwargs: Any) -> Any:
+        with metrics.stage(stage.name), metrics.timer(f"stage.{stage.name}"):
+            return stage.func(*args, **kwargs)
+
+    def submit(stage: Stage, args: List[Any]) -> Future:
+        if not stage.stream:
+            return executor.submit(timed, stage, *args)
+        output = StageOutput(console, stage.name)
+        if stage.description:
+            output.write(f"\033[94m{stage.description}\033[0m\n")
+        return executor.submit(timed, stage, *args, output=output)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            scheduled = True
+            while scheduled and fatal is None:
+                scheduled = False
+                for stage in list(pending):
+                    if any(dep not in finished for dep in stage.deps):
+                        continue
+                    pending.remove(stage)
+                    scheduled = True
+                    failed = [dep for dep in stage.deps if dep in errors]
+                    if failed:
+                        errors[stage.name] = StageSkipped(failed[0])
+                        results[stage.name] = None
+                        finished.add(stage.name)
+                        report(stage)
+                        continue
+                    args = [results[dep] for dep in stage.deps]
+                    if manifest is not None and stage.fingerprint is not None:
+                        fingerprints[stage.name] = stage_fingerprint(stage.fingerprint, args)
+                        valid, output = manifest.lookup(stage.name, fingerprints[stage.name])
+                        if valid:
+                            results[stage.name] = output
+                            restored.add(stage.name)
+                            finished.add(stage.name)
+                            report(stage)
+                            continue
+                    running[submit(stage, args)] = stage
+
+            if not running:
+                if pending and fatal is None:
+                    names = ", ".join(stage.name for stage in pending)
+                    raise ValueError(f"Unresolvable stage dependencies: {names}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    results[stage.name] = future.result()
+                    if stage.name in fingerprints:
+                        manifest.record(stage.name, fingerprints[stage.name], results[stage.name], stage.outputs)
+                except Exception as e:
+                    errors[stage.name] = e
+                    results[stage.name] = None
+                    if not stage.optional and fatal is None:
+                        fatal = e
+                finished.add(stage.name)
+                report(stage)
+
+    if fatal is not None:
+        raise fatal
+    return results
@@ -43,4 +43,42 @@ SEARCH_SYSTEM_MESSAGE = (
     "Output only a JSON array of strings."
     "Queries should address questions that the answers to them satisfies reader curiosity regarding the topics mention in the talk."
     "Produce exactly 5 search queries as a JSON array of strings."
-)
\ No newline at end of file
+)
+CHUNK_SUMMARY_SYSTEM_MESSAGE = (
+    "You are a professional assistant who summarizes one consecutive part of a longer TED Talk transcript."
+    "Capture every main idea, argument and key point made in this part, in the order they appear."
+    "Present key statements and questions verbatim when important."
+    "Include important quotes in quotation marks."
+    "Omit detailed descriptions of examples unless they directly support the core message."
+    "Do not add an introduction or a conclusion; the partial summaries will be combined later."
+    "Use the [speaker_name]s voice or 'the speaker' rather than 'he' or 'she'."
+)
+REDUCE_SUMMARY_SYSTEM_MESSAGE = (
+    "You are a professional assistant who combines partial summaries of consecutive parts of a TED Talk into one summary. "
+    "The partial summaries are given in the order of the talk; merge them into one summary of the whole talk and remove repetition."
+    "Focus on the main ideas and key points."
+    "Keep key statements, questions and quotes verbatim in quotation marks."
+    "Use the [speaker_name]s voice or 'the speaker' rather than 'he' or 'she'."
+    "Conclude with the main takeaway or conclusion."
+    "Write the summary in clear, concise paragraphs without explicit section headers (like conclusion:) or labels."
+    "The text should flow naturally and logically, with each paragraph focusing on a distinct idea or theme."
+    "Make sure that sentences are not overly long or complex."
+    "Separate each paragraph by a single newline character '\\n' without extra blank lines."
+)
+FUSED_SYSTEM_MESSAGE = (
+    "You are a professional assistant who writes all artifacts for a TED Talk transcript in one JSON object. "
+    "Fill every field of the JSON schema, following the instructions given for it.\n\n"
+    "summary: " + SUMMARY_SYSTEM_MESSAGE + "\n\n"
+    "extract (written from the summary): " + EXTRACT_SYSTEM_MESSAGE + "\n\n"
+    "narrative (written from the extract): " + NARRATIVE_SYSTEM_MESSAGE + "\n\n"
+    "visualization_prompt (written from the summary): " + IMAGE_SYSTEM_MESSAGE + "\n\n"
+    "search_queries (written from the summary, as an array of strings): " + SEARCH_SYSTEM_MESSAGE
+)
+FUSED_DERIVED_SYSTEM_MESSAGE = (
+    "You are a professional assistant who writes all artifacts derived from a TED Talk summary in one JSON object. "
+    "Fill every field of the JSON schema, following the instructions given for it.\n\n"
+    "extract (written from the summary): " + EXTRACT_SYSTEM_MESSAGE + "\n\n"
+    "narrative (written from the extract): " + NARRATIVE_SYSTEM_MESSAGE + "\n\n"
+    "visualization_prompt (written from the summary): " + IMAGE_SYSTEM_MESSAGE + "\n\n"
+    "search_queries (written from the summary, as an array of strings): " + SEARCH_SYSTEM_MESSAGE
+)
@@ -0,0 +1,285 @@
+"""
+Process-wide rate limiting of the OpenAI and Tavily endpoints.
+
+Every call to an external endpoint (chat, TTS, images, embeddings, search) takes a slot
+from that endpoint's limiter, which combines:
+- Token buckets for requests per minute and, for chat, tokens per minute
+- An adaptive concurrency limit (AIMD): each successful call raises the limit
+  by about one per window of calls, each throttling response (HTTP 429)
+  halves it, so bulk runs settle just below the quota ceiling
+- Pauses honoring Retry-After and the x-ratelimit-* headers reported by the
+  services; when the service reports its limit, the request bucket follows it
+
+Response headers are observed through hooks on the shared HTTP clients (see
+clients.py), so SDK-internal retries are accounted for as well.
+"""
+
+import re
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+from config import config
+from metrics import metrics
+
+# Duration format of the x-ratelimit-reset-* headers, e.g. "6m0s", "1.5s", "20ms"
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Parse a reset duration like "6m0s" or "20ms" into seconds."""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _UNITS[unit] for number, unit in parts)
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """Return the delay requested by a response's Retry-After headers, if any."""
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate."""
+
+    def __init__(self, per_minute: float):
+        """Initialize the bucket.
+
+        Args:
+            per_minute: Refill rate; 0 disables the bucket.
+        """
+        self._lock = threading.Lock()
+        self.per_minute = per_minute
+        self._tokens = per_minute
+        self._updated = time.monotonic()
+
+    def set_rate(self, per_minute: float) -> None:
+        """Change the refill rate, keeping the tokens already accumulated."""
+        with self._lock:
+            self._refill()
+            self.per_minute = per_minute
+            self._tokens = min(self._tokens, per_minute)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.per_minute, self._tokens + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+
+    def acquire(self, cost: float = 1.0) -> float:
+        """Take tokens from the bucket, waiting until they are available.
+
+        Args:
+            cost: Number of tokens; costs above the capacity wait for a full bucket.
+
+        Returns:
+            Time waited in seconds.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                if self.per_minute <= 0:
+                    return waited
+                self._refill()
+                cost = min(cost, self.per_minute)
+                if self._tokens >= cost:
+                    self._tokens -= cost
+                    return waited
+                delay = (cost - self._tokens) * 60 / self.per_minute
+            time.sleep(delay)
+            waited += delay
+
+
+class EndpointLimiter:
+    """Request/token buckets and adaptive concurrency of one endpoint."""
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_concurrency: int = config.RATE_LIMIT_MAX_CONCURRENCY,
+        initial_concurrency: int = config.RATE_LIMIT_INITIAL_CONCURRENCY,
+    ):
+        """Initialize the limiter.
+
+        Args:
+            name: Name of the endpoint, e.g. "chat".
+            requests_per_minute: Request quota; 0 adopts the limit reported by the service.
+            tokens_per_minute: Token quota; 0 adopts the limit reported by the service.
+            max_concurrency: Upper bound of concurrent calls.
+            initial_concurrency: Concurrency limit before any feedback.
+        """
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._configured = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(min(self.max_concurrency, max(1, initial_concurrency)))
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, tokens: float = 0) -> Iterator[None]:
+        """Hold one of the endpoint's call slots.
+
+        Args:
+            tokens: Estimated tokens of the call, charged to the token bucket.
+        """
+        waited = self.requests.acquire(1)
+        if tokens:
+            waited += self.tokens.acquire(tokens)
+
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                remaining = self._paused_until - time.monotonic()
+                if remaining <= 0 and self._in_flight < int(self.limit):
+                    break
+                self._cond.wait(timeout=remaining if remaining > 0 else None)
+            self._in_flight += 1
+        waited += time.monotonic() - start
+        if waited > 0:
+            metrics.add("rate_limit_wait_seconds", waited, endpoint=self.name)
+
+        throttled = False
+        try:
+            yield
+        except Exception as e:
+            throttled = _status_code(e) == 429
+            if throttled:
+                self.throttle(retry_after_seconds(_headers(e)))
+            raise
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                if not throttled:
+                    # Additive increase: about +1 per window of `limit` successful calls
+                    self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+                metrics.set("rate_limit_concurrency", int(self.limit), endpoint=self.name)
+                self._cond.notify_all()
+
+    def throttle(self, retry_after: Optional[float] = None) -> None:
+        """Record a throttling response: halve the concurrency and pause.
+
+        Several throttled responses of the same window of calls count as one
+        decrease.
+
+        Args:
+            retry_after: Delay requested by the service; defaults to one second.
+        """
+        now = time.monotonic()
+        delay = retry_after if retry_after is not None else 1.0
+        with self._cond:
+            if now - self._last_decrease >= max(delay, 1.0):
+                self.limit = max(1.0, self.limit / 2)
+                self._last_decrease = now
+                metrics.add("rate_limited", endpoint=self.name)
+            self._paused_until = max(self._paused_until, now + delay)
+            metrics.set("rate_limit_concurrency", int(self.limit), endpoint=self.name)
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """Adjust the limiter to the rate limit feedback of a response.
+
+        Args:
+            status_code: HTTP status of the response.
+            headers: Response headers (case-insensitive mapping).
+        """
+        if status_code == 429:
+            self.throttle(retry_after_seconds(headers))
+            return
+
+        for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            limit = _number(headers.get(f"x-ratelimit-limit-{kind}"))
+            if limit and not self._configured[kind] and limit != bucket.per_minute:
+                bucket.set_rate(limit)
+            if _number(headers.get(f"x-ratelimit-remaining-{kind}")) == 0:
+                reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}") or "")
+                if reset:
+                    with self._cond:
+                        self._paused_until = max(self._paused_until, time.monotonic() + reset)
+
+
+class RateLimiter:
+    """Registry of the process-wide endpoint limiters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, EndpointLimiter] = {}
+
+    def endpoint(self, name: str) -> EndpointLimiter:
+        """Return the limiter of an endpoint ("chat", "tts", "images", "embeddings" or "search")."""
+        with self._lock:
+            if name not in self._endpoints:
+                rpm, tpm = {
+                    "chat": (config.CHAT_RPM, config.CHAT_TPM),
+                    "tts": (config.TTS_RPM, 0),
+                    "images": (config.IMAGE_RPM, 0),
+                    "search": (config.SEARCH_RPM, 0),
+                }.get(name, (0, 0))
+                self._endpoints[name] = EndpointLimiter(name, rpm, tpm)
+            return self._endpoints[name]
+
+    @contextmanager
+    def slot(self, name: str, tokens: float = 0) -> Iterator[None]:
+        """Hold a call slot of an endpoint; a no-op if rate limiting is disabled.
+
+        Args:
+            name: The endpoint.
+            tokens: Estimated tokens of the call.
+        """
+        if not config.RATE_LIMIT_ENABLED:
+            yield
+            return
+        with self.endpoint(name).slot(tokens):
+            yield
+
+    def observe(self, name: str, status_code: int, headers: Mapping[str, str]) -> None:
+        """Feed a response's rate limit headers to an endpoint's limiter."""
+        if config.RATE_LIMIT_ENABLED:
+            self.endpoint(name).observe(status_code, headers)
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _headers(error: BaseException) -> Mapping[str, Any]:
+    return getattr(getattr(error, "response", None), "headers", None) or {}
+
+
+limiter = RateLimiter()
@@ -0,0 +1,70 @@
+"""
+Retry helpers for calls to external services.
+
+Provides jittered exponential backoff so that concurrent callers retrying a
+transient failure spread out instead of hitting the service in lockstep.
+"""
+
+import random
+import time
+from typing import Any, Callable, Optional, Tuple, Type
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Compute a "full jitter" exponential backoff delay.
+
+    Args:
+        attempt: Zero-based number of the attempt that just failed.
+        base_delay: Delay cap of the first retry in seconds.
+        max_delay: Upper bound of any delay in seconds.
+
+    Returns:
+        Random delay between 0 and min(max_delay, base_delay * 2 ** attempt).
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def retry_call(
+    func: Callable[..., Any],
+    *args: Any,
+    retries: int,
+    retry_on: Tuple[Type[BaseException], ...],
+    base_delay: float = 0.5,
+    max_delay: float = 8.0,
+    deadline: Optional[float] = None,
+    on_retry: Optional[Callable[[int, BaseException], None]] = None,
+    **kwargs: Any,
+) -> Any:
+    """Call a function, retrying transient errors with jittered exponential backoff.
+
+    Args:
+        func: The function to call.
+        *args: Positional arguments for the function.
+        retries: Maximum number of retries after the first attempt; 0 calls the function once.
+        retry_on: Exception types considered transient.
+        base_delay: Delay cap of the first retry in seconds.
+        max_delay: Upper bound of any delay in seconds.
+        deadline: Optional time.monotonic() value after which no retry is attempted.
+        on_retry: Optional callable receiving the attempt number and error before each retry.
+        **kwargs: Keyword arguments for the function.
+
+    Returns:
+        The function's return value.
+
+    Raises:
+        Exception: The last error if all attempts failed, or any non-transient error.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return func(*args, **kwargs)
+        except retry_on as e:
+            if attempt == retries:
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= delay:
+                    raise
+            if on_retry:
+                on_retry(attempt, e)
+            time.sleep(delay)
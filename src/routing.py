@@ -0,0 +1,157 @@
+"""
+Latency-budgeted model routing of the chat stages.
+
+Every chat stage is served by its own model (STAGE_MODELS, defaulting to
+CHAT_MODEL). With ROUTING_ENABLED, a stage with a latency budget
+(STAGE_LATENCY_BUDGETS) is served by FAST_CHAT_MODEL instead when:
+- its input has at most ROUTING_FAST_INPUT_TOKENS tokens,
+- the moving average of the stage model's recent latencies exceeds the
+  budget, or
+- a blocking call of the stage model does not finish within the budget; the
+  call is abandoned and repeated with the fast model.
+
+Streamed calls are routed up front but never abandoned, since their output is
+already on the screen. The model that served each stage is recorded in the
+run's ModelLog and counted in the "stage_model" metric.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config import config
+from metrics import metrics
+
+# Weight of the latest latency in the moving average of a stage's model
+LATENCY_SMOOTHING = 0.3
+
+# Decay of the latency estimate each time the stage's model is skipped, so
+# that a model routed around after a slow phase is eventually tried again
+SKIPPED_DECAY = 0.8
+
+
+class ModelLog:
+    """The models that served the chat stages of one run."""
+
+    def __init__(self):
+        self._served: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, model: str) -> None:
+        """Record the model that served a stage."""
+        with self._lock:
+            self._served[stage] = model
+
+    def served(self) -> Dict[str, str]:
+        """Return the models by stage name."""
+        with self._lock:
+            return dict(self._served)
+
+    def summary(self) -> str:
+        """Return a one-line description like "summary: gpt-5, extract: gpt-5-mini"."""
+        return ", ".join(f"{stage}: {model}" for stage, model in self.served().items())
+
+
+class ModelRouter:
+    """Chooses the model of each chat call and learns the models' latencies per stage."""
+
+    def __init__(self):
+        self._latency: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def stage_model(stage: str) -> str:
+        """Return the configured model of a stage."""
+        return config.STAGE_MODELS.get(stage, config.CHAT_MODEL)
+
+    @staticmethod
+    def budget(stage: str) -> float:
+        """Return the latency budget of a stage in seconds; 0 if it is not routed."""
+        if not config.ROUTING_ENABLED:
+            return 0.0
+        return config.STAGE_LATENCY_BUDGETS.get(stage, 0.0)
+
+    def fingerprint(self, stage: str) -> Tuple[Any, ...]:
+        """Return the routing settings that determine a stage's output, for checkpoints."""
+        if not self.budget(stage):
+            return (self.stage_model(stage),)
+        return (self.stage_model(stage), config.FAST_CHAT_MODEL, self.budget(stage), config.ROUTING_FAST_INPUT_TOKENS)
+
+    def choose(self, stage: str, input_tokens: int) -> Tuple[str, Optional[float]]:
+        """Choose the model of a call.
+
+        Args:
+            stage: Name of the stage making the call.
+            input_tokens: Estimated tokens of the call's input.
+
+        Returns:
+            The model and the timeout after which the call should fall back to
+            FAST_CHAT_MODEL (None for no fallback).
+        """
+        model, budget = self.stage_model(stage), self.budget(stage)
+        if not budget or model == config.FAST_CHAT_MODEL:
+            return model, None
+        if input_tokens <= config.ROUTING_FAST_INPUT_TOKENS:
+            metrics.add("routing_fast", stage=stage, reason="input_size")
+            return config.FAST_CHAT_MODEL, None
+        with self._lock:
+            estimate = self._latency.get((stage, model))
+            if estimate is not None and estimate > budget:
+                self._latency[(stage, model)] = estimate * SKIPPED_DECAY
+                metrics.add("routing_fast", stage=stage, reason="latency")
+                return config.FAST_CHAT_MODEL, None
+        return model, budget
+
+    def observe(self, stage: str, model: str, seconds: float) -> None:
+        """Update the latency estimate of a stage's model."""
+        with self._lock:
+            previous = self._latency.get((stage, model))
+            self._latency[(stage, model)] = (
+                seconds if previous is None else LATENCY_SMOOTHING * seconds + (1 - LATENCY_SMOOTHING) * previous
+            )
+
+    def call(
+        self,
+        stage: str,
+        input_tokens: int,
+        request: Callable[[str, Optional[float]], str],
+        log: Optional[ModelLog] = None,
+        stream: bool = False,
+    ) -> str:
+        """Make a routed chat call.
+
+        Args:
+            stage: Name of the stage making the call.
+            input_tokens: Estimated tokens of the call's input.
+            request: Callable making the call with a model and a timeout in seconds (or None).
+            log: Optional log of the run recording the model that served the stage.
+            stream: If True, the call is not abandoned when it exceeds the budget.
+
+        Returns:
+            The response of the call.
+        """
+        from openai import APITimeoutError
+
+        model, timeout = self.choose(stage, input_tokens)
+        if stream:
+            timeout = None
+        start = time.monotonic()
+        try:
+            output = request(model, timeout)
+        except APITimeoutError:
+            if timeout is None:
+                raise
+            self.observe(stage, model, time.monotonic() - start)
+            metrics.add("routing_fallbacks", stage=stage, model=model)
+            model = config.FAST_CHAT_MODEL
+            output = request(model, None)
+        else:
+            self.observe(stage, model, time.monotonic() - start)
+
+        metrics.add("stage_model", stage=stage, model=model)
+        if log is not None:
+            log.record(stage, model)
+        return output
+
+
+model_router = ModelRouter()
@@ -2,62 +2,359 @@
 Search service for TED talk content discovery using Tavily API.
 
 Provides search query generation and execution functionality to find
-related content and resources based on processed TED talk summaries.
+related content and resources based on processed TED talk summaries. With
+SEMANTIC_INDEX_ENABLED, queries are first matched against the archive of
+processed talks (see semantic_index.py) and only the unmatched ones are
+searched on the web.
+
+Web results are cached on disk for SEARCH_CACHE_TTL seconds, keyed on the
+normalized query (case-folded, stopwords removed, words sorted), so that
+rephrasings such as "benefits of mindfulness meditation" and "mindfulness
+meditation benefits" share one entry. Within a run, duplicate and
+near-duplicate queries are searched only once.
 """
 
 import json
+import re
 import time
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Set, TextIO
 
-from tavily import TavilyClient
+import requests
 
 from ai_services import get_openai_response
+from cache import search_cache
+from clients import clients
 from config import config
+from metrics import metrics
+from pipeline import Stage, StageOutput, run_stages
+from rate_limit import limiter
 from prompts import SEARCH_SYSTEM_MESSAGE
+from retry import retry_call
+from routing import ModelLog, model_router
+from semantic_index import semantic_index
+from summarizer import estimate_tokens
+
+if TYPE_CHECKING:
+    from tavily import TavilyClient
+
+# Words that do not change what a query searches for
+STOPWORDS = frozenset(
+    "a about an and are as at be between by can do does for from how in into is it its of on or "
+    "the their this to vs what when where which who why with".split()
+)
+
+
+class TransientSearchError(Exception):
+    """Raised for search failures that are worth retrying."""
+
+
+def _search_once(client: "TavilyClient", query: str, timeout: float) -> List[Dict[str, Any]]:
+    """Run a single search attempt, classifying transient failures.
+
+    Args:
+        client: The Tavily client.
+        query: The search query.
+        timeout: Timeout of the request in seconds.
+
+    Returns:
+        List of result dictionaries.
+
+    Raises:
+        TransientSearchError: On timeouts, connection problems, rate limiting (HTTP 429) and server errors.
+        Exception: Other errors as is, e.g. ForbiddenError once the plan's quota is used up.
+    """
+    from tavily.errors import TimeoutError as TavilyTimeoutError, UsageLimitExceededError
+
+    try:
+        with limiter.slot("search"), metrics.timer("tavily.search"):
+            response = client.search(query, max_results=config.MAX_SEARCH_RESULTS, timeout=timeout)
+    except (TavilyTimeoutError, UsageLimitExceededError, requests.ConnectionError, requests.Timeout) as e:
+        raise TransientSearchError(str(e) or type(e).__name__) from e
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code >= 500:
+            raise TransientSearchError(str(e)) from e
+        raise
+
+    return (response.get("results") or [])[:config.MAX_SEARCH_RESULTS]
+
+
+def _search_query(client: "TavilyClient", query: str) -> List[Dict[str, Any]]:
+    """Search a single query with retries, bounded by the per-query deadline.
+
+    Args:
+        client: The Tavily client.
+        query: The search query.
+
+    Returns:
+        List of result dictionaries.
+    """
+    deadline = time.monotonic() + config.SEARCH_TIMEOUT
+
+    def attempt() -> List[Dict[str, Any]]:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"No result within {config.SEARCH_TIMEOUT}s")
+        return _search_once(client, query, remaining)
+
+    return retry_call(
+        attempt,
+        retries=config.SEARCH_MAX_RETRIES,
+        retry_on=(TransientSearchError,),
+        deadline=deadline,
+        on_retry=lambda attempt, error: metrics.add("retries", operation="tavily.search"),
+    )
+
 
+def normalize_query(query: str) -> str:
+    """Normalize a query into the form its results are cached under.
 
-def get_tavily_search_results(queries: List[str]) -> Dict[int, Dict[str, Any]]:
-    """Get search results with retry logic.
+    Args:
+        query: The search query.
+
+    Returns:
+        The distinct case-folded words of the query without stopwords, sorted
+        and space-separated; all its words if it only has stopwords, and the
+        stripped query itself if it has no words at all.
+    """
+    words = set(re.findall(r"\w+", query.casefold()))
+    return " ".join(sorted(words - STOPWORDS)) or " ".join(sorted(words)) or query.strip()
+
+
+def _query_words(query: str) -> Set[str]:
+    return set(normalize_query(query).split())
+
+
+def collapse_queries(queries: Dict[int, str]) -> Dict[int, int]:
+    """Assign every query the first earlier query it duplicates.
+
+    Queries are near-duplicates if the word overlap (Jaccard similarity) of
+    their normalized forms is at least SEARCH_DEDUP_SIMILARITY.
+
+    Args:
+        queries: Dictionary mapping query index to query.
+
+    Returns:
+        Dictionary mapping each query index to the index of the query searched
+        in its place (itself for distinct queries).
+    """
+    searched: Dict[int, Set[str]] = {}
+    representative = {}
+    for idx, query in queries.items():
+        words = _query_words(query)
+        representative[idx] = next(
+            (
+                other for other, other_words in searched.items()
+                if words and len(words & other_words) >= config.SEARCH_DEDUP_SIMILARITY * len(words | other_words)
+            ),
+            idx,
+        )
+        if representative[idx] == idx:
+            searched[idx] = words
+    return representative
+
+
+def _cached_search(query: str) -> List[Dict[str, Any]]:
+    """Search a query, reusing the cached results of an equivalent query.
+
+    Args:
+        query: The search query.
+
+    Returns:
+        List of result dictionaries.
+    """
+    key = search_cache.make_key("tavily", normalize_query(query), config.MAX_SEARCH_RESULTS)
+    cached = search_cache.get_text(key)
+    if cached is not None:
+        return json.loads(cached)
+    results = _search_query(clients.tavily(), query)
+    search_cache.set_text(key, json.dumps(results, ensure_ascii=False))
+    return results
+
+
+def get_tavily_search_results(queries: List[str], file: Optional[TextIO] = None) -> Dict[int, Dict[str, Any]]:
+    """Get search results for all queries concurrently, with retry logic.
+
+    Duplicate and near-duplicate queries are collapsed and searched once, and
+    queries with cached results (see normalize_query) are not searched at all.
+    The remaining queries are dispatched at once over the shared client (see
+    clients.py), so the search costs about as long as the slowest query.
+    Transient failures are retried with jittered exponential backoff until the
+    per-query deadline.
     
     Args:
         queries: List of search queries.
+        file: Optional stream to report failed searches to; defaults to stdout.
         
     Returns:
-        Dictionary mapping query index to search results.
+        Dictionary mapping query index to search results. Each entry holds the
+        query, the "url" and "content" of the top result and the list of up to
+        MAX_SEARCH_RESULTS "results".
     """
     if not queries:
-        print("No queries provided for search")
+        print("No queries provided for search", file=file)
         return {}
         
-    client = TavilyClient(api_key=config.TAVILY_API_KEY)
+    jobs = {idx: query for idx, query in enumerate(queries, 1) if query.strip()}
+    representative = collapse_queries(jobs)
+    searches = {idx: jobs[idx] for idx in sorted(set(representative.values()))}
+    metrics.add("search_queries_collapsed", len(jobs) - len(searches))
     results = {}
-    
-    for idx, query in enumerate(queries, 1):
-        if not query.strip():
-            continue
-            
-        results[idx] = {}
-        results[idx]["query"] = query
-        
-        # Retry logic for search
-        max_retries = 3
-        for attempt in range(max_retries):
+
+    workers = max(1, min(config.SEARCH_WORKERS, len(searches)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {idx: executor.submit(_cached_search, query) for idx, query in searches.items()}
+
+        for idx, query in jobs.items():
+            results[idx] = {"query": query}
             try:
-                response = client.search(query, max_results=config.MAX_SEARCH_RESULTS)["results"][0]
-                results[idx]["url"] = response['url']
-                results[idx]["content"] = response['content']
-                break  # Success, exit retry loop
-            except (IndexError, KeyError) as e:
-                if attempt == max_retries - 1:  # Last attempt
-                    print(f"Search failed for query '{query}' after {max_retries} attempts: {e}")
-                    results[idx]["url"] = "N/A"
-                    results[idx]["content"] = "Search failed"
-                else:
-                    time.sleep(1)  # Wait before retry
+                hits = futures[representative[idx]].result()
+                results[idx]["url"] = hits[0]["url"] if hits else "N/A"
+                results[idx]["content"] = hits[0]["content"] if hits else "No results"
+                results[idx]["results"] = hits
+            except Exception as e:
+                print(f"Search failed for query '{query}': {e}", file=file)
+                results[idx]["url"] = "N/A"
+                results[idx]["content"] = "Search failed"
+                results[idx]["results"] = []
     
     return results
 
 
+def get_search_results(
+    queries: List[str], exclude_url: str = "", file: Optional[TextIO] = None
+) -> Dict[int, Dict[str, Any]]:
+    """Get search results, answering queries from the local archive where possible.
+
+    With SEMANTIC_INDEX_ENABLED, the queries are matched against the semantic
+    index first; only the queries without a sufficiently similar archived talk
+    are searched with Tavily. If the index lookup fails, all queries are
+    searched on the web.
+
+    Args:
+        queries: List of search queries.
+        exclude_url: URL of the talk being processed, which must not match itself.
+        file: Optional stream to report failures to; defaults to stdout.
+
+    Returns:
+        Dictionary mapping query index to search results, as returned by
+        get_tavily_search_results. Each entry additionally holds its "source",
+        "archive" or "web".
+    """
+    local: Dict[int, List[Dict[str, Any]]] = {}
+    if config.SEMANTIC_INDEX_ENABLED and queries:
+        try:
+            local = semantic_index.lookup(queries, exclude_url)
+        except Exception as e:
+            print(f"Semantic index lookup failed, searching the web: {e}", file=file)
+    metrics.add("search_archive_hits", len(local))
+
+    web_positions = [position for position in range(len(queries)) if position not in local]
+    web = (
+        get_tavily_search_results([queries[position] for position in web_positions], file) if web_positions else {}
+    )
+
+    results = {}
+    for position, query in enumerate(queries):
+        if position in local:
+            hits = local[position]
+            results[position + 1] = {
+                "query": query, "url": hits[0]["url"], "content": hits[0]["content"],
+                "results": hits, "source": "archive",
+            }
+    for web_idx, result in web.items():
+        results[web_positions[web_idx - 1] + 1] = dict(result, source="web")
+    return dict(sorted(results.items()))
+
+
+def parse_search_queries(json_queries: str) -> List[str]:
+    """Parse the search queries returned by the model.
+
+    Args:
+        json_queries: The model output, expected to be a JSON array of strings.
+
+    Returns:
+        List of search queries.
+
+    Raises:
+        ValueError: If the output is not a JSON array.
+    """
+    try:
+        list_of_queries = json.loads(json_queries)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Failed to parse search queries: {e}")
+    if not isinstance(list_of_queries, list):
+        raise ValueError("Invalid query format received from OpenAI")
+    return list_of_queries
+
+
+def print_search_results(query_results: Dict[int, Dict[str, Any]], file: Optional[TextIO] = None) -> None:
+    """Print the executed queries and their result URLs.
+
+    Args:
+        query_results: Dictionary mapping query index to search results.
+        file: Optional stream to print to, e.g. a stage's output; defaults to stdout.
+    """
+    print("\n" + "="*config.TEXT_WIDTH, file=file)
+    print("Search Results:".center(config.TEXT_WIDTH), file=file)
+    print("="*config.TEXT_WIDTH, file=file)
+    
+    for result in query_results.values():
+        source = " (from the talk archive)" if result.get("source") == "archive" else ""
+        print(f"Query: {result['query']}{source}", file=file)
+        urls = [hit["url"] for hit in result.get("results", [])] or [result["url"]]
+        for url in urls:
+            print(f"URL: {url}", file=file)
+        print(file=file)
+    
+    print("="*config.TEXT_WIDTH, file=file)
+
+
+def search_stages(speaker_name: str, title: str, url: str = "", log: Optional[ModelLog] = None) -> List[Stage]:
+    """Declare the query generation and search stages of the pipeline.
+
+    The stages expect the "summary" result. The search results are not
+    checkpointed, so a rerun picks up newly indexed talks and fresh web
+    results; the web results are cached for SEARCH_CACHE_TTL instead.
+
+    Args:
+        speaker_name: The speaker's name.
+        title: The title of the talk.
+        url: The URL of the talk, excluded from the archive matches.
+        log: Optional log of the run recording the model that generated the queries.
+
+    Returns:
+        Stages producing "search_queries" and "search_results".
+    """
+    def create_queries(summary: str) -> List[str]:
+        response = model_router.call(
+            "search_queries",
+            estimate_tokens(summary),
+            lambda model, timeout: get_openai_response(
+                SEARCH_SYSTEM_MESSAGE, speaker_name, title, summary, model, timeout
+            ),
+            log,
+        )
+        return parse_search_queries(response)
+
+    def search(queries: List[str], output: StageOutput) -> Dict[int, Dict[str, Any]]:
+        results = get_search_results(queries, url, output)
+        print_search_results(results, output)
+        return results
+
+    return [
+        Stage(
+            "search_queries", create_queries, deps=["summary"],
+            description="Generating queries...", optional=True,
+            fingerprint=(SEARCH_SYSTEM_MESSAGE, *model_router.fingerprint("search_queries"), speaker_name, title),
+        ),
+        Stage(
+            "search_results", search, deps=["search_queries"],
+            description="Getting search results...", display=print_search_results, optional=True, stream=True,
+        ),
+    ]
+
+
 def generate_search_queries(speaker_name: str, title: str, summary: str) -> None:
     """Generate and execute search queries related to the TED talk content.
     
@@ -72,29 +369,4 @@ def generate_search_queries(speaker_name: str, title: str, summary: str) -> None
     Raises:
         Handles JSON parsing errors gracefully and continues execution.
     """
-    print(f"\033[94mGenerating queries...\033[0m")
-    json_queries = get_openai_response(
-        SEARCH_SYSTEM_MESSAGE, speaker_name, title, summary
-    )
-    
-    try:
-        list_of_queries = json.loads(json_queries)
-        if not isinstance(list_of_queries, list):
-            print("Invalid query format received from OpenAI")
-            return
-    except json.JSONDecodeError as e:
-        print(f"Failed to parse search queries: {e}")
-        return
-        
-    print(f"\033[94mGetting search results...\033[0m")
-    query_results = get_tavily_search_results(list_of_queries)
-    
-    print("\n" + "="*config.TEXT_WIDTH)
-    print("Search Results:".center(config.TEXT_WIDTH))
-    print("="*config.TEXT_WIDTH)
-    
-    for result in query_results.values():
-        print(f"Query: {result['query']}")
-        print(f"URL: {result['url']}\n")
-    
-    print("="*config.TEXT_WIDTH)
+    run_stages(search_stages(speaker_name, title), inputs={"summary": summary})
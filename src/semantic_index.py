@@ -0,0 +1,312 @@
+"""
+Local semantic index over the archive of processed talks.
+
+Every processed talk's summary and transcript segments are embedded (in
+batched embedding calls) and appended to an on-disk index. Before searching
+the web, the generated search queries are embedded and matched against the
+archive: queries with a sufficiently similar archived talk are answered
+locally with that talk, and only the remaining queries go to Tavily (see
+search_service.py). The more talks have been processed, the fewer web
+searches a run needs.
+
+Layout of SEMANTIC_INDEX_DIR:
+- vectors.f32: L2-normalized float32 embeddings, one row per entry, updated in
+  place and read through a NumPy memory map
+- entries.jsonl: metadata of each row (row number, talk URL, speaker, title,
+  kind, text and the talk's content hash); the texts stay on disk and are only
+  read for the rows that match a query
+- meta.json: embedding model, dimension, committed row count and the content
+  hash of every indexed talk; it is replaced atomically after the rows are
+  written, so rows left behind by an interrupted update are ignored and later
+  overwritten
+
+Reindexing a talk whose summary or transcript changed appends new rows and
+retires the old ones. The index assumes a single writing process.
+NumPy is imported on first use.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ai_services import embed_texts
+from checkpoints import output_hash
+from config import config
+from metrics import metrics
+from pipeline import Stage
+from summarizer import split_into_chunks
+
+INDEX_VERSION = 1
+
+# Characters of an entry's text kept as the content of a local search result
+SNIPPET_CHARS = 300
+
+
+def _without_text(entry: Dict[str, Any], offset: int) -> Dict[str, Any]:
+    """Return the in-memory form of an entry: its metadata and the offset of its line in entries.jsonl."""
+    metadata = {key: value for key, value in entry.items() if key != "text"}
+    metadata["offset"] = offset
+    return metadata
+
+
+class SemanticIndex:
+    """Append-only, memory-mapped embedding index of processed talks."""
+
+    def __init__(self, directory: str):
+        """Initialize the index; the files are read on first use.
+
+        Args:
+            directory: Directory of the index files.
+        """
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._meta: Optional[Dict[str, Any]] = None
+        self._meta_mtime = 0.0
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._vectors: Any = None
+        self._rows: Any = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self) -> Dict[str, Any]:
+        """Load the metadata and entries, reloading them if another process updated the index."""
+        try:
+            mtime = os.path.getmtime(self._path("meta.json"))
+        except OSError:
+            mtime = 0.0
+        if self._meta is not None and mtime == self._meta_mtime:
+            return self._meta
+
+        meta = {"version": INDEX_VERSION, "model": config.EMBEDDING_MODEL, "dim": 0, "count": 0, "talks": {}}
+        if mtime:
+            with open(self._path("meta.json"), encoding="utf-8") as f:
+                stored = json.load(f)
+            # Vectors of another model or format are not comparable; start over
+            if stored.get("version") == INDEX_VERSION and stored.get("model") == config.EMBEDDING_MODEL:
+                meta = stored
+
+        entries: Dict[int, Dict[str, Any]] = {}
+        if meta["count"]:
+            with open(self._path("entries.jsonl"), "rb") as f:
+                offset = 0
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        if entry["row"] < meta["count"]:
+                            entries[entry["row"]] = _without_text(entry, offset)
+                    offset += len(line)
+
+        self._meta, self._meta_mtime, self._entries, self._vectors, self._rows = meta, mtime, entries, None, None
+        return meta
+
+    def _matrix(self) -> Any:
+        """Return the committed vectors as a read-only memory map."""
+        import numpy as np
+
+        meta = self._load()
+        if self._vectors is None and meta["count"]:
+            self._vectors = np.memmap(
+                self._path("vectors.f32"), dtype=np.float32, mode="r", shape=(meta["count"], meta["dim"])
+            )
+        return self._vectors
+
+    def _row_index(self) -> Tuple[Any, Dict[str, int], Any]:
+        """Return the talk of every committed row as an index array, the talk indexes by URL and the live rows.
+
+        Rows of retired versions of a talk are not live.
+        """
+        import numpy as np
+
+        meta = self._load()
+        if self._rows is None:
+            talk_ids: Dict[str, int] = {}
+            talks = np.full(meta["count"], -1, dtype=np.int64)
+            live = np.zeros(meta["count"], dtype=bool)
+            for row, entry in self._entries.items():
+                talks[row] = talk_ids.setdefault(entry["url"], len(talk_ids))
+                live[row] = meta["talks"].get(entry["url"]) == entry["hash"]
+            self._rows = (talks, talk_ids, live)
+        return self._rows
+
+    def _read_texts(self, rows: Sequence[int]) -> Dict[int, str]:
+        """Read the texts of some rows from entries.jsonl."""
+        texts = {}
+        with open(self._path("entries.jsonl"), "rb") as f:
+            for row in sorted(rows):
+                f.seek(self._entries[row]["offset"])
+                texts[row] = json.loads(f.readline())["text"]
+        return texts
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._load()["count"]
+
+    def is_indexed(self, url: str, content_hash: str) -> bool:
+        """Return whether a talk is indexed with the given content."""
+        with self._lock:
+            return self._load()["talks"].get(url) == content_hash
+
+    def add_talk(self, url: str, speaker_name: str, title: str, summary: str, transcript: str) -> int:
+        """Index a talk's summary and transcript segments.
+
+        Args:
+            url: The URL of the talk.
+            speaker_name: The speaker's name.
+            title: The title of the talk.
+            summary: The summary of the talk.
+            transcript: The full transcript text.
+
+        Returns:
+            Number of rows added; 0 if the talk is already indexed unchanged.
+        """
+        import numpy as np
+
+        content_hash = output_hash([summary, transcript])
+        if self.is_indexed(url, content_hash):
+            return 0
+
+        texts = [summary] + split_into_chunks(transcript, config.INDEX_SEGMENT_TOKENS)
+        kinds = ["summary"] + ["segment"] * (len(texts) - 1)
+        vectors = np.asarray(embed_texts(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            meta = self._load()
+            if meta["dim"] and meta["dim"] != vectors.shape[1]:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the index ({meta['dim']})")
+            os.makedirs(self.directory, exist_ok=True)
+            start = meta["count"]
+
+            # The memory map of the old rows must not outlive the update
+            self._vectors = None
+            path = self._path("vectors.f32")
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                f.seek(start * vectors.shape[1] * vectors.itemsize)
+                f.write(vectors.tobytes())
+                f.truncate()
+            self._rows = None
+            with open(self._path("entries.jsonl"), "ab") as f:
+                for position, (kind, text) in enumerate(zip(kinds, texts)):
+                    entry = {
+                        "row": start + position,
+                        "url": url,
+                        "speaker": speaker_name,
+                        "title": title,
+                        "kind": kind,
+                        "text": text,
+                        "hash": content_hash,
+                    }
+                    self._entries[entry["row"]] = _without_text(entry, f.tell())
+                    f.write((json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8"))
+
+            meta.update({"dim": int(vectors.shape[1]), "count": start + len(texts)})
+            meta["talks"][url] = content_hash
+            self._save_meta(meta)
+        metrics.add("index_rows", len(texts))
+        return len(texts)
+
+    def _save_meta(self, meta: Dict[str, Any]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2, ensure_ascii=False)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, self._path("meta.json"))
+        self._meta_mtime = os.path.getmtime(self._path("meta.json"))
+
+    def lookup(
+        self, queries: Sequence[str], exclude_url: str = "", threshold: float = config.SEMANTIC_MATCH_THRESHOLD
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """Match queries against the archived talks.
+
+        Args:
+            queries: The search queries.
+            exclude_url: URL of a talk that must not match, e.g. the talk being processed.
+            threshold: Minimum cosine similarity of a match.
+
+        Returns:
+            Dictionary mapping the 0-based position of each query with a match
+            to its matching talks, best first: up to MAX_SEARCH_RESULTS results
+            with "title", "url", "content" and "score".
+        """
+        import numpy as np
+
+        with self._lock:
+            meta = self._load()
+            if not meta["count"] or not queries:
+                return {}
+            matrix = self._matrix()
+            talks, talk_ids, live = self._row_index()
+
+        vectors = np.asarray(embed_texts(list(queries)), dtype=np.float32)
+        if vectors.shape[1] != matrix.shape[1]:
+            return {}
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        scores = np.asarray(matrix @ vectors.T)
+
+        # Rows of retired versions of a talk and of the excluded talk never match
+        candidates = live & (talks != talk_ids.get(exclude_url, -1))
+        scores[~candidates] = -np.inf
+
+        # Best rows of the best talks per query, at most one row per talk
+        best_rows: Dict[int, List[int]] = {}
+        for position in range(len(queries)):
+            column = scores[:, position]
+            matching = np.flatnonzero(column >= threshold)
+            chosen: List[int] = []
+            seen = set()
+            for row in matching[np.argsort(-column[matching], kind="stable")]:
+                if talks[row] not in seen:
+                    seen.add(talks[row])
+                    chosen.append(int(row))
+                    if len(chosen) == config.MAX_SEARCH_RESULTS:
+                        break
+            if chosen:
+                best_rows[position] = chosen
+
+        with self._lock:
+            entries = {row: self._entries[row] for rows in best_rows.values() for row in rows}
+            texts = self._read_texts(list(entries))
+
+        matches: Dict[int, List[Dict[str, Any]]] = {}
+        for position, rows in best_rows.items():
+            matches[position] = [
+                {
+                    "title": f"{entries[row]['title']} by {entries[row]['speaker']}",
+                    "url": entries[row]["url"],
+                    "content": texts[row][:SNIPPET_CHARS],
+                    "score": round(float(scores[row, position]), 4),
+                }
+                for row in rows
+            ]
+        return matches
+
+
+def index_stages(speaker_name: str, title: str, url: str) -> List[Stage]:
+    """Declare the stage adding a talk to the semantic index.
+
+    The stage expects the "transcript" input and the "summary" result.
+
+    Args:
+        speaker_name: The speaker's name.
+        title: The title of the talk.
+        url: The URL of the talk.
+
+    Returns:
+        Stage producing "index", the number of rows added.
+    """
+    return [
+        Stage(
+            "index",
+            lambda transcript, summary: semantic_index.add_talk(url, speaker_name, title, summary, transcript),
+            deps=["transcript", "summary"],
+            description="Updating the semantic index...",
+            optional=True,
+        ),
+    ]
+
+
+semantic_index = SemanticIndex(config.SEMANTIC_INDEX_DIR)
@@ -0,0 +1,218 @@
+"""
+Chunked and incremental text-to-speech.
+
+Narratives are split at paragraph and sentence boundaries into pieces within
+the TTS input limit. The pieces are synthesized concurrently, each response is
+streamed to its own part file, and the parts are joined in order into the
+final audio file. Generation time therefore scales with the longest piece
+rather than the whole narrative, memory use stays flat, and narratives longer
+than the TTS input limit are supported.
+
+For streamed narratives, completed sentences are grouped into segments and
+synthesized in the background while the narrative is still being generated.
+"""
+
+import os
+import re
+import shutil
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from ai_services import synthesize_speech_to_file
+from config import config
+from metrics import metrics
+from streaming import SentenceSplitter, split_sentences
+
+
+def split_for_speech(text: str, max_chars: int = config.TTS_MAX_CHARS) -> List[str]:
+    """Split text into pieces within the TTS input limit.
+
+    Paragraphs are kept together where possible, then sentences, and only
+    sentences longer than the limit are split at word boundaries; words
+    longer than the limit are split into pieces of the limit.
+
+    Args:
+        text: The text to split.
+        max_chars: Maximum length of a piece.
+
+    Returns:
+        List of pieces in the original order.
+    """
+    units = []
+    for paragraph in re.split(r"\n\s*\n|\n", text.strip()):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            units.append(paragraph)
+            continue
+        for sentence in split_sentences(paragraph):
+            if len(sentence) <= max_chars:
+                units.append(sentence)
+                continue
+            piece = ""
+            for word in sentence.split():
+                if piece and len(piece) + 1 + len(word) > max_chars:
+                    units.append(piece)
+                    piece = ""
+                if piece:
+                    piece = f"{piece} {word}"
+                    continue
+                # Words longer than the limit are split into pieces of the limit
+                while len(word) > max_chars:
+                    units.append(word[:max_chars])
+                    word = word[max_chars:]
+                piece = word
+            if piece:
+                units.append(piece)
+
+    pieces, current = [], ""
+    for unit in units:
+        if current and len(current) + 1 + len(unit) > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current}\n{unit}" if current else unit
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+class SpeechAssembler:
+    """Synthesizes pieces of text concurrently and joins their audio in order."""
+
+    def __init__(self, path: str, workers: int = config.TTS_WORKERS):
+        """Initialize the assembler.
+
+        Args:
+            path: The output file path of the joined audio.
+            workers: Number of pieces synthesized concurrently.
+        """
+        self.path = path
+        self._parts: List[Tuple[str, str, Future]] = []
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers))
+
+    def add(self, text: str) -> None:
+        """Start synthesizing text, split into pieces within the TTS input limit.
+
+        Args:
+            text: The text to append to the audio.
+        """
+        for piece in split_for_speech(text):
+            part_path = f"{self.path}.part{len(self._parts):03d}"
+            future = self._executor.submit(self._synthesize, piece, part_path)
+            self._parts.append((piece, part_path, future))
+
+    @staticmethod
+    def _synthesize(text: str, path: str) -> None:
+        # Prefetched pieces are submitted while the narrative streams, but belong to the audio
+        with metrics.stage("audio"):
+            synthesize_speech_to_file(text, path)
+
+    def text(self) -> str:
+        """Return the text submitted so far."""
+        return " ".join(piece for piece, _, _ in self._parts)
+
+    def assemble(self, path: Optional[str] = None) -> None:
+        """Wait for all pieces and join them into the output file.
+
+        The parts are copied in chunks into a temporary file which then
+        atomically replaces the output file.
+
+        Args:
+            path: Optional file path overriding the assembler's output path.
+        """
+        path = path or self.path
+        try:
+            for _, _, future in self._parts:
+                future.result()
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as out:
+                for _, part_path, _ in self._parts:
+                    with open(part_path, "rb") as part:
+                        shutil.copyfileobj(part, out)
+            os.replace(tmp_path, path)
+        finally:
+            self.discard()
+
+    def discard(self) -> None:
+        """Cancel outstanding pieces and remove the part files."""
+        for _, _, future in self._parts:
+            future.cancel()
+        self._executor.shutdown(wait=True)
+        for _, part_path, _ in self._parts:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+
+def chunked_text_to_speech(text: str, path: str = config.AUDIO_PATH) -> None:
+    """Convert text of any length to speech, synthesizing its pieces concurrently.
+
+    Args:
+        text: The text (narrative) to convert to speech.
+        path: The output file path where the audio will be saved.
+    """
+    assembler = SpeechAssembler(path)
+    assembler.add(text)
+    assembler.assemble()
+
+
+class SpeechPrefetcher:
+    """Synthesizes a narrative segment by segment as its sentences complete."""
+
+    def __init__(self, path: str, min_chars: int = config.TTS_SEGMENT_CHARS):
+        """Initialize the prefetcher.
+
+        Args:
+            path: The output file path where the audio will be saved.
+            min_chars: Minimum length of a segment; shorter runs of sentences
+                are held back so that the audio does not break after every sentence.
+        """
+        self._min_chars = min_chars
+        self._splitter = SentenceSplitter()
+        self._sentences: List[str] = []
+        self._assembler = SpeechAssembler(path)
+
+    def feed(self, delta: str) -> None:
+        """Add streamed narrative text, starting synthesis of completed segments.
+
+        Args:
+            delta: The newly received text.
+        """
+        self._sentences.extend(self._splitter.feed(delta))
+        if sum(len(sentence) + 1 for sentence in self._sentences) >= self._min_chars:
+            self._submit()
+
+    def finish(self, narrative: str, path: Optional[str] = None) -> None:
+        """Synthesize the remaining text and write the complete audio file.
+
+        Falls back to synthesizing the final narrative from scratch if the
+        streamed segments do not add up to it.
+
+        Args:
+            narrative: The complete narrative.
+            path: Optional file path overriding the prefetcher's output path,
+                e.g. a temporary file of the media store.
+        """
+        path = path or self._assembler.path
+        self._sentences.extend(self._splitter.close())
+        self._submit()
+        if _normalize(self._assembler.text()) != _normalize(narrative):
+            self._assembler.discard()
+            chunked_text_to_speech(narrative, path)
+            return
+        self._assembler.assemble(path)
+
+    def discard(self) -> None:
+        """Stop synthesizing and remove the part files; does nothing after finish."""
+        self._assembler.discard()
+
+    def _submit(self) -> None:
+        if not self._sentences:
+            return
+        text = " ".join(self._sentences)
+        self._sentences = []
+        self._assembler.add(text)
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
@@ -0,0 +1,146 @@
+"""
+Helpers for streamed chat completions.
+
+Provides:
+- Incremental rendering of streamed text wrapped to the terminal width
+- Splitting of streamed and complete text into sentences for downstream consumers
+- Time-to-first-token and total time of each streamed stage, recorded as metrics timers
+"""
+
+import re
+import time
+from typing import Callable, List, Optional, Tuple
+
+from config import config
+from metrics import metrics
+
+# End of a sentence: any closing quotes or brackets after sentence punctuation and the whitespace after them.
+# The closers belong to the sentence; split with split_sentences rather than SENTENCE_END.split.
+SENTENCE_END = re.compile(r"(?<=[.!?…])[\"')\]]*\s+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences, keeping closing quotes and brackets with their sentence.
+
+    Args:
+        text: The text to split.
+
+    Returns:
+        The sentences in order, without the whitespace between them.
+    """
+    sentences, start = [], 0
+    for match in SENTENCE_END.finditer(text):
+        sentence = text[start:match.end()].rstrip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    if text[start:].strip():
+        sentences.append(text[start:])
+    return sentences
+
+
+class WrappedTextRenderer:
+    """Writes streamed text word by word, wrapped like textwrap.fill."""
+
+    def __init__(self, write: Callable[[str], None], width: int = config.TEXT_WIDTH):
+        """Initialize the renderer.
+
+        Args:
+            write: Callable receiving the rendered text.
+            width: Maximum line width.
+        """
+        self._write = write
+        self._width = width
+        self._word = ""
+        self._column = 0
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def feed(self, delta: str) -> None:
+        """Render a chunk of streamed text.
+
+        Args:
+            delta: The newly received text.
+        """
+        if delta and self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        for char in delta:
+            if char.isspace():
+                self._flush_word()
+            else:
+                self._word += char
+
+    def close(self) -> None:
+        """Render the remaining text and terminate the last line."""
+        self._flush_word()
+        if self._column:
+            self._write("\n")
+            self._column = 0
+        self.finished_at = time.perf_counter()
+
+    def timings(self) -> Tuple[float, float]:
+        """Return the seconds to the first token and the total seconds."""
+        end = self.finished_at or time.perf_counter()
+        first = self.first_token_at or end
+        return first - self.started, end - self.started
+
+    def _flush_word(self) -> None:
+        if not self._word:
+            return
+        if self._column and self._column + 1 + len(self._word) > self._width:
+            self._write("\n")
+            self._column = 0
+        text = f" {self._word}" if self._column else self._word
+        self._write(text)
+        self._column += len(text)
+        self._word = ""
+
+
+class SentenceSplitter:
+    """Collects streamed text and hands out completed sentences."""
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, delta: str) -> List[str]:
+        """Add streamed text.
+
+        Args:
+            delta: The newly received text.
+
+        Returns:
+            Sentences completed by this chunk of text.
+        """
+        self._buffer += delta
+        sentences = []
+        while True:
+            match = SENTENCE_END.search(self._buffer)
+            if not match:
+                break
+            sentence = self._buffer[:match.end()].strip()
+            self._buffer = self._buffer[match.end():]
+            if sentence:
+                sentences.append(sentence)
+        return sentences
+
+    def close(self) -> List[str]:
+        """Return the remaining text as a final sentence, if any."""
+        rest, self._buffer = self._buffer.strip(), ""
+        return [rest] if rest else []
+
+
+def record_timing(stage: str, renderer: WrappedTextRenderer) -> Tuple[float, float]:
+    """Record the timings of a streamed stage as the "stream.<stage>.first_token" and "stream.<stage>" timers.
+
+    Args:
+        stage: The name of the stage.
+        renderer: The renderer that displayed the stage's output.
+
+    Returns:
+        The seconds to the first token and the total seconds.
+    """
+    first_token, total = renderer.timings()
+    metrics.record(f"stream.{stage}.first_token", first_token)
+    metrics.record(f"stream.{stage}", total)
+    return first_token, total
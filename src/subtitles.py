@@ -0,0 +1,114 @@
+"""
+Streaming WebVTT subtitle parser.
+
+Parses subtitle payloads in a single pass over their lines, without temporary
+files, and cleans them up for use as a transcript:
+- Header, NOTE, STYLE and REGION blocks and cue identifiers are dropped
+- Inline timing and styling tags (<00:00:01.000>, <c>, <v Speaker>) are removed
+- Rolling captions, where each cue repeats the previous line, are de-duplicated
+"""
+
+import codecs
+import html
+import re
+from typing import Callable, Iterable, Iterator, List, NamedTuple
+
+_TAG = re.compile(r"<[^>]*>")
+_TIMING = re.compile(r"^\s*(\S+)\s+-->\s+(\S+)")
+
+
+class TranscriptSegment(NamedTuple):
+    """A piece of transcript text with its time range in seconds."""
+
+    start: float
+    end: float
+    text: str
+
+
+def _seconds(timestamp: str) -> float:
+    parts = timestamp.replace(",", ".").split(":")
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def parse_vtt(lines: Iterable[str]) -> List[TranscriptSegment]:
+    """Parse WebVTT subtitles into de-duplicated transcript segments.
+
+    Args:
+        lines: The lines of the subtitle payload; may be a lazily read stream.
+
+    Returns:
+        List of segments in order, without repeated rolling caption lines.
+    """
+    segments: List[TranscriptSegment] = []
+    last_line = ""
+    in_cue = False
+    skip_block = False
+    start = end = 0.0
+
+    for raw in lines:
+        line = raw.strip()
+        if not line:
+            in_cue = skip_block = False
+            continue
+        if skip_block:
+            continue
+        if not in_cue:
+            timing = _TIMING.match(line)
+            if timing:
+                start, end = _seconds(timing.group(1)), _seconds(timing.group(2))
+                in_cue = True
+            elif line.startswith(("WEBVTT", "NOTE", "STYLE", "REGION")):
+                skip_block = True
+            # Any other line before the timing line is a cue identifier
+            continue
+
+        text = html.unescape(_TAG.sub("", line)).strip()
+        if not text or text == last_line:
+            continue
+        if last_line and text.startswith(last_line + " "):
+            # Rolling caption: only the continuation is new
+            text = text[len(last_line) + 1:]
+        last_line = html.unescape(_TAG.sub("", line)).strip()
+        segments.append(TranscriptSegment(start, end, text))
+
+    return segments
+
+
+def iter_lines(read: Callable[[int], bytes], chunk_size: int = 16 * 1024) -> Iterator[str]:
+    """Decode a byte stream incrementally and yield its lines.
+
+    Args:
+        read: Callable returning up to the given number of bytes, b"" at the end.
+        chunk_size: Number of bytes read at a time.
+
+    Yields:
+        The decoded lines, without line endings.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    while True:
+        chunk = read(chunk_size)
+        pending += decoder.decode(chunk, final=not chunk)
+        lines = pending.splitlines(keepends=True)
+        pending = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        for line in lines:
+            yield line.rstrip("\r\n")
+        if not chunk:
+            break
+    if pending:
+        yield pending
+
+
+def segments_to_text(segments: List[TranscriptSegment]) -> str:
+    """Join transcript segments into plain text.
+
+    Args:
+        segments: The transcript segments.
+
+    Returns:
+        The transcript text.
+    """
+    return " ".join(segment.text for segment in segments)
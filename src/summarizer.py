@@ -0,0 +1,175 @@
+"""
+Map-reduce summarization of long transcripts.
+
+Short transcripts are summarized with a single chat call. Long transcripts are
+split into token-budgeted, sentence-aligned chunks which are summarized
+concurrently (map) and then combined into the final summary (reduce). Every
+chunk result goes through the cached get_openai_response, so a retry after a
+failure only redoes the chunks that did not succeed.
+"""
+
+import contextvars
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from ai_services import get_openai_response, stream_openai_response
+from config import config
+from metrics import metrics
+from prompts import CHUNK_SUMMARY_SYSTEM_MESSAGE, REDUCE_SUMMARY_SYSTEM_MESSAGE, SUMMARY_SYSTEM_MESSAGE
+from routing import ModelLog, model_router
+from streaming import split_sentences
+
+# Rough average for English text with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text.
+
+    Args:
+        text: The text to measure.
+
+    Returns:
+        Approximate token count.
+    """
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_into_chunks(text: str, max_tokens: int) -> List[str]:
+    """Split a text into sentence-aligned chunks within a token budget.
+
+    Sentences longer than the budget on their own are split at word boundaries.
+
+    Args:
+        text: The text to split.
+        max_tokens: Maximum estimated tokens per chunk.
+
+    Returns:
+        List of chunks in the original order.
+    """
+    sentences = []
+    for sentence in split_sentences(text.strip()):
+        if estimate_tokens(sentence) <= max_tokens:
+            sentences.append(sentence)
+            continue
+        words, piece = sentence.split(), []
+        for word in words:
+            if piece and estimate_tokens(" ".join(piece + [word])) > max_tokens:
+                sentences.append(" ".join(piece))
+                piece = []
+            piece.append(word)
+        if piece:
+            sentences.append(" ".join(piece))
+
+    chunks, current, current_tokens = [], [], 0
+    for sentence in sentences:
+        tokens = estimate_tokens(sentence)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += tokens
+    if current:
+        chunks.append(" ".join(current))
+
+    return chunks
+
+
+def summary_chunks(transcript: str) -> List[str]:
+    """Return the chunks a transcript is summarized in, or [] if one call suffices.
+
+    Args:
+        transcript: The full transcript text.
+
+    Returns:
+        The chunk summary inputs, already labeled with their part number.
+    """
+    if estimate_tokens(transcript) <= config.SUMMARY_CHUNK_THRESHOLD:
+        return []
+    chunks = split_into_chunks(transcript, config.SUMMARY_CHUNK_TOKENS)
+    if len(chunks) == 1:
+        return []
+    return [f"(Part {idx + 1} of {len(chunks)})\n\n{chunk}" for idx, chunk in enumerate(chunks)]
+
+
+def combine_partials(partials: List[str]) -> str:
+    """Combine the chunk summaries into the input of the reduce step."""
+    return "\n\n".join(f"Part {idx + 1}:\n{partial}" for idx, partial in enumerate(partials))
+
+
+def _summary_response(
+    system_message: str,
+    speaker_name: str,
+    title: str,
+    text: str,
+    on_delta: Optional[Callable[[str], None]] = None,
+    log: Optional[ModelLog] = None,
+) -> str:
+    # Every call of the summary, including the chunk summaries, is routed as the "summary" stage
+    def request(model: str, timeout: Optional[float]) -> str:
+        if on_delta:
+            return stream_openai_response(system_message, speaker_name, title, text, on_delta, model)
+        return get_openai_response(system_message, speaker_name, title, text, model, timeout)
+
+    return model_router.call("summary", estimate_tokens(text), request, log, stream=on_delta is not None)
+
+
+def summarize_transcript(
+    speaker_name: str,
+    title: str,
+    transcript: str,
+    on_delta: Optional[Callable[[str], None]] = None,
+    log: Optional[ModelLog] = None,
+) -> str:
+    """Summarize a transcript, using map-reduce for long transcripts.
+
+    Args:
+        speaker_name: The speaker's name.
+        title: The title of the talk.
+        transcript: The full transcript text.
+        on_delta: If given, the final summary is streamed to this callback.
+        log: Optional log of the run recording the model that served the summary.
+
+    Returns:
+        The summary of the whole talk.
+
+    Raises:
+        Exception: The error of a chunk that still failed after all rounds of retries.
+    """
+    chunks = summary_chunks(transcript)
+    if not chunks:
+        return _summary_response(SUMMARY_SYSTEM_MESSAGE, speaker_name, title, transcript, on_delta, log)
+
+    partials: Dict[int, str] = {}
+    errors: Dict[int, Exception] = {}
+    workers = max(1, min(config.SUMMARY_CHUNK_WORKERS, len(chunks)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Each round only resubmits the chunks that failed in the previous one
+        for _ in range(config.SUMMARY_CHUNK_RETRIES + 1):
+            todo = [idx for idx in range(len(chunks)) if idx not in partials]
+            if not todo:
+                break
+            # The calls run in a copy of the caller's context, so they are attributed to its stage
+            futures = {
+                idx: executor.submit(
+                    contextvars.copy_context().run,
+                    _summary_response, CHUNK_SUMMARY_SYSTEM_MESSAGE, speaker_name, title, chunks[idx], log=log,
+                )
+                for idx in todo
+            }
+            if errors:
+                metrics.add("retries", len(todo), operation="summary_chunk")
+            errors = {}
+            for idx, future in futures.items():
+                try:
+                    partials[idx] = future.result()
+                except Exception as e:
+                    errors[idx] = e
+
+    if errors:
+        idx, error = next(iter(errors.items()))
+        raise RuntimeError(f"Summary of part {idx + 1} of {len(chunks)} failed: {error}") from error
+
+    combined = combine_partials([partials[idx] for idx in range(len(chunks))])
+    return _summary_response(REDUCE_SUMMARY_SYSTEM_MESSAGE, speaker_name, title, combined, on_delta, log)
@@ -3,126 +3,744 @@ TED Talk Scraper and Transcript Processor
 
 Provides web scraping functionality for TED talks and transcript downloading/processing.
 Combines both talk discovery and content extraction in a unified module.
+
+Talk discovery has two backends: plain HTTP (default) and headless Chrome via
+Selenium as a fallback. Also provides:
+- Concurrent listing pages and a pool of reused browsers
+- Concurrent transcript prefetching with one yt-dlp instance per thread
+- A cached listing in CACHE_DIR (LISTING_CACHE_TTL)
 """
 
+import atexit
+import json
 import os
+import queue
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from functools import lru_cache
-from typing import Dict
-
-import yt_dlp
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
+from html.parser import HTMLParser
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urljoin, urlparse
 
+from clients import clients
 from config import config
+from metrics import metrics
+from subtitles import TranscriptSegment, iter_lines, parse_vtt, segments_to_text
+
+# Markers of a talk card on the TED listing page
+CONTAINER_CLASS = 'xs-tui:col-span-1'
+TITLE_CLASS = 'subheader2'
+SPEAKER_CLASS = 'text-textTertiary-onLight'
+
+LISTING_CACHE_FILENAME = 'listing.json'
+
+# Returns link, title and speaker of every talk card of the page in one round trip
+EXTRACT_TALKS_SCRIPT = """
+var titleSelector = arguments[1], speakerSelector = arguments[2];
+return Array.from(document.querySelectorAll(arguments[0])).map(function (card) {
+    var link = card.querySelector('a');
+    var title = card.querySelector(titleSelector);
+    var speaker = card.querySelector(speakerSelector);
+    return {
+        url: link ? link.href : '',
+        title: title ? (title.innerText || title.textContent) : '',
+        speaker: speaker ? (speaker.innerText || speaker.textContent) : ''
+    };
+});
+"""
+
+
+class _ListingHTMLParser(HTMLParser):
+    """Extracts link, title and speaker of every talk card of a listing page."""
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.talks: List[Dict[str, str]] = []
+        self._depth = 0
+        self._card: Optional[Dict[str, str]] = None
+        self._capture: Optional[str] = None
+        self._capture_tag: Optional[str] = None
+
+    def handle_starttag(self, tag: str, attrs: List[Any]) -> None:
+        attributes = dict(attrs)
+        classes = (attributes.get('class') or '').split()
+        if tag == 'div':
+            if self._card is not None:
+                self._depth += 1
+            elif CONTAINER_CLASS in classes:
+                self._card = {}
+                self._depth = 1
+            return
+        if self._card is None:
+            return
+        if tag == 'a' and 'url' not in self._card and attributes.get('href'):
+            self._card['url'] = urljoin(self.base_url, attributes['href'])
+        elif tag == 'span' and TITLE_CLASS in classes:
+            self._capture, self._capture_tag = 'title', tag
+        elif tag == 'p' and SPEAKER_CLASS in classes:
+            self._capture, self._capture_tag = 'speaker', tag
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._card is None:
+            return
+        if tag == self._capture_tag:
+            self._capture = self._capture_tag = None
+        if tag == 'div':
+            self._depth -= 1
+            if self._depth == 0:
+                card, self._card = self._card, None
+                if card.get('url') and card.get('title', '').strip() and card.get('speaker', '').strip():
+                    self.talks.append({
+                        'url': card['url'],
+                        'speaker': card['speaker'].strip(),
+                        'title': card['title'].strip(),
+                    })
+
+    def handle_data(self, data: str) -> None:
+        if self._card is not None and self._capture:
+            self._card[self._capture] = self._card.get(self._capture, '') + data
+
+
+def _talks_from_next_data(html: str, base_url: str) -> List[Dict[str, str]]:
+    """Extract talks from the page's embedded Next.js JSON payload, if present."""
+    marker = '<script id="__NEXT_DATA__" type="application/json">'
+    start = html.find(marker)
+    if start < 0:
+        return []
+    end = html.find('</script>', start)
+    try:
+        payload = json.loads(html[start + len(marker):end])
+    except json.JSONDecodeError:
+        return []
+
+    talks = []
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, dict):
+            speaker = node.get('presenterDisplayName') or node.get('speakerName')
+            if isinstance(node.get('slug'), str) and isinstance(node.get('title'), str) and isinstance(speaker, str):
+                talks.append({
+                    'url': urljoin(base_url, f"/talks/{node['slug']}"),
+                    'speaker': speaker.strip(),
+                    'title': node['title'].strip(),
+                })
+            else:
+                stack.extend(reversed(list(node.values())))
+    return talks
+
+
+def parse_listing_html(html: str, base_url: str = config.TED_BASE_URL) -> List[Dict[str, str]]:
+    """Parse the talks of a TED listing page.
+
+    Prefers the embedded JSON payload and falls back to the rendered talk cards.
+
+    Args:
+        html: The HTML of the listing page.
+        base_url: Base URL used to resolve relative talk links.
+
+    Returns:
+        List of talks with "url", "speaker" and "title", in page order.
+    """
+    talks = _talks_from_next_data(html, base_url)
+    if talks:
+        return talks
+    parser = _ListingHTMLParser(base_url)
+    parser.feed(html)
+    parser.close()
+    return parser.talks
+
+
+def listing_url(page: int) -> str:
+    """Return the URL of a page of the talk listing (1-based)."""
+    url = f"{config.TED_BASE_URL}/talks"
+    return url if page == 1 else f"{url}?page={page}"
+
+
+class HttpScraper:
+    """Scrapes the talk listing with plain HTTP requests."""
+
+    name = 'http'
+
+    def scrape_page(self, page: int) -> List[Dict[str, str]]:
+        """Fetch and parse one listing page.
+
+        Args:
+            page: The 1-based page number.
+
+        Returns:
+            List of talks on the page.
+        """
+        response = clients.http().get(
+            listing_url(page),
+            headers={'User-Agent': config.SCRAPER_USER_AGENT},
+            timeout=config.HTTP_TIMEOUT,
+        )
+        response.raise_for_status()
+        return parse_listing_html(response.text, config.TED_BASE_URL)
+
+    def close(self) -> None:
+        pass
+
+
+class DriverPool:
+    """Process-wide pool of headless Chrome sessions, started on demand and reused."""
+
+    def __init__(self, size: int):
+        """Initialize the pool; no browser is started until one is needed.
+
+        Args:
+            size: Maximum number of browsers running at the same time.
+        """
+        self.size = max(1, size)
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._drivers: List[Any] = []
+
+    def _start(self) -> Any:
+        # Selenium is only needed as a fallback, so it is imported on demand
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
+        chrome_options = Options()
+        chrome_options.add_argument('--headless')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        with metrics.timer("scrape.selenium_driver_start"):
+            driver = webdriver.Chrome(options=chrome_options)
+        with self._lock:
+            self._drivers.append(driver)
+        return driver
+
+    @contextmanager
+    def driver(self) -> Iterator[Any]:
+        """Borrow a browser, waiting for one to become free if all are in use.
+
+        A browser whose session failed is quit instead of being returned to the pool.
+        """
+        from selenium.common.exceptions import WebDriverException
+
+        with self._slots:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self._start()
+            try:
+                yield driver
+            except WebDriverException:
+                self._discard(driver)
+                raise
+            except BaseException:
+                self._idle.put(driver)
+                raise
+            else:
+                self._idle.put(driver)
+
+    def _discard(self, driver: Any) -> None:
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        """Quit all browsers of the pool."""
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        self._idle = queue.LifoQueue()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+driver_pool = DriverPool(config.SELENIUM_POOL_SIZE)
+atexit.register(driver_pool.close)
+
+
+class SeleniumScraper:
+    """Scrapes the talk listing with pooled headless Chrome browsers."""
+
+    name = 'selenium'
+
+    def scrape_page(self, page: int) -> List[Dict[str, str]]:
+        """Load one listing page and extract its talk cards once they are rendered.
+
+        The extraction script doubles as the wait condition: it is polled until
+        it finds talk cards or SELENIUM_WAIT_TIMEOUT expires, so a rendered page
+        costs one script round trip.
+
+        Args:
+            page: The 1-based page number.
+
+        Returns:
+            List of talks on the page; empty if no talk cards appeared in time.
+        """
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        selectors = (
+            'div.' + CONTAINER_CLASS.replace(':', '\\:'),
+            'span.' + TITLE_CLASS,
+            'p.' + SPEAKER_CLASS,
+        )
+        with driver_pool.driver() as driver:
+            driver.get(listing_url(page))
+            try:
+                cards = WebDriverWait(driver, config.SELENIUM_WAIT_TIMEOUT, poll_frequency=0.1).until(
+                    lambda d: d.execute_script(EXTRACT_TALKS_SCRIPT, *selectors) or False
+                )
+            except TimeoutException:
+                return []
+
+        return [
+            {'url': card['url'], 'speaker': card['speaker'].strip(), 'title': card['title'].strip()}
+            for card in cards
+            if card['url'] and card['title'].strip() and card['speaker'].strip()
+        ]
+
+    def close(self) -> None:
+        # The browsers stay in the pool for later scrapes and are quit at exit
+        pass
+
+
+SCRAPER_BACKENDS = {
+    HttpScraper.name: HttpScraper,
+    SeleniumScraper.name: SeleniumScraper,
+}
+
+
+def scrape_with_backend(
+    backend: str, pages: int = 1, stop: Optional[Callable[[List[Dict[str, str]]], bool]] = None
+) -> Dict[int, Dict[str, str]]:
+    """Scrape the first pages of the talk listing with a specific backend.
+
+    Up to SCRAPER_WORKERS pages are fetched concurrently, but they are
+    consumed in page order, so the result and the stop condition behave as
+    for a sequential scrape; pages already in flight when it stops are
+    discarded.
+
+    Args:
+        backend: Name of the backend, "http" or "selenium".
+        pages: Number of listing pages to scrape.
+        stop: Optional callable receiving the talks of each page; scraping ends
+            after the first page for which it returns True.
+
+    Returns:
+        Dictionary mapping the 1-based position of each talk to its metadata.
+    """
+    with metrics.timer(f"scrape.{backend}_startup"):
+        scraper = SCRAPER_BACKENDS[backend]()
+
+    def scrape_page(page: int) -> List[Dict[str, str]]:
+        with metrics.timer(f"scrape.{backend}_page"):
+            return scraper.scrape_page(page)
+
+    workers = max(1, min(config.SCRAPER_WORKERS, pages))
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            talks: Dict[int, Dict[str, str]] = {}
+            seen = set()
+            for page in range(1, pages + 1):
+                # Keep a window of the next pages in flight
+                for ahead in range(page, min(page + workers, pages + 1)):
+                    if ahead not in futures:
+                        futures[ahead] = executor.submit(scrape_page, ahead)
+                try:
+                    page_talks = futures.pop(page).result()
+                except BaseException:
+                    for future in futures.values():
+                        future.cancel()
+                    raise
+                if not page_talks:
+                    break
+                for talk in page_talks:
+                    if talk['url'] not in seen:
+                        seen.add(talk['url'])
+                        talks[len(talks) + 1] = talk
+                if stop and stop(page_talks):
+                    break
+            for future in futures.values():
+                future.cancel()
+        return talks
+    finally:
+        scraper.close()
+
+
+def _listing_cache_path() -> str:
+    return os.path.join(config.CACHE_DIR, LISTING_CACHE_FILENAME)
+
+
+def load_cached_listing(pages: int = config.LISTING_PAGES, max_age: Optional[float] = None) -> Optional[dict]:
+    """Return the locally cached listing if it is fresh enough.
+
+    Args:
+        pages: Number of listing pages the listing must cover.
+        max_age: Maximum age in seconds; defaults to LISTING_CACHE_TTL, None
+            accepts any age.
+
+    Returns:
+        Dictionary mapping the 1-based position of each talk to its metadata,
+        or None if there is no matching cached listing.
+    """
+    if not config.CACHE_ENABLED:
+        return None
+    try:
+        with open(_listing_cache_path(), encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('base_url') != config.TED_BASE_URL or data.get('pages', 0) < pages:
+        return None
+    if max_age is not None and time.time() - data.get('scraped', 0) > max_age:
+        return None
+    return {int(position): talk for position, talk in data.get('talks', {}).items()}
+
+
+def save_listing(talks: dict, pages: int) -> None:
+    """Store a scraped listing in the local cache."""
+    if not config.CACHE_ENABLED or not talks:
+        return
+    os.makedirs(config.CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=config.CACHE_DIR, prefix='.tmp-')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({
+            'base_url': config.TED_BASE_URL,
+            'pages': pages,
+            'scraped': time.time(),
+            'talks': talks,
+        }, f, indent=2, ensure_ascii=False)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, _listing_cache_path())
 
 
 @lru_cache(maxsize=config.CACHE_SIZE)
-def scrape_ted_talks() -> dict:
+def scrape_ted_talks(pages: int = config.LISTING_PAGES, refresh: bool = False) -> dict:
     """Scrape recent TED talks.
+
+    Uses the backend configured by SCRAPER_BACKEND. With "auto", the plain
+    HTTP backend is tried first and headless Chrome is only launched if it
+    finds no talks. A listing scraped less than LISTING_CACHE_TTL seconds ago
+    is reused from the local cache.
+
+    Args:
+        pages: Number of listing pages to scrape.
+        refresh: If True, the cached listing is ignored.
     
     Returns:
         dict: A dictionary of recent TED talks with their metadata.
     """
-    chrome_options = Options()
-    chrome_options.add_argument('--headless')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
+    if not refresh and config.LISTING_CACHE_TTL > 0:
+        talks = load_cached_listing(pages, config.LISTING_CACHE_TTL)
+        if talks:
+            metrics.add("listing_cache_hits")
+            return talks
+    talks = scrape_listing(pages)
+    save_listing(talks, pages)
+    return talks
 
-    driver = None
-    try:
-        driver = webdriver.Chrome(options=chrome_options)
-        talks_url = 'https://www.ted.com/talks'
-        driver.get(talks_url)
-        time.sleep(1)  # Wait for page to load
-        
-        video_containers = driver.find_elements(By.CSS_SELECTOR, 'div.xs-tui\\:col-span-1')
 
-        talks = {}
-        for idx, container in enumerate(video_containers, 1):
-            try:
-                # Extract the link from the <a> tag's href attribute
-                link_element = container.find_element(By.TAG_NAME, 'a')
-                link = link_element.get_attribute('href')
-
-                # Extract the title from the <span> tag with the specific class
-                title_element = container.find_element(By.CSS_SELECTOR, 'span.subheader2')
-                title = title_element.text
-
-                # Extract the speaker's name from the <p> tag with the specific class
-                speaker_element = container.find_element(By.CSS_SELECTOR, 'p.text-textTertiary-onLight')
-                speaker = speaker_element.text
-                
-                if link and title and speaker:
-                    talks[idx] = {
-                        'url': link,
-                        'speaker': speaker.strip(),
-                        'title': title.strip()
-                    }
-                
-            except Exception as e:
-                print(f"Failed to extract talk {idx}: {e}")
-                continue
+def scrape_listing(
+    pages: int = config.LISTING_PAGES, stop: Optional[Callable[[List[Dict[str, str]]], bool]] = None
+) -> Dict[int, Dict[str, str]]:
+    """Scrape the talk listing with the configured backend, without caching.
 
-        return talks
-        
+    Args:
+        pages: Maximum number of listing pages to scrape.
+        stop: Optional callable ending the scrape after a page, see scrape_with_backend.
+
+    Returns:
+        Dictionary mapping the 1-based position of each talk to its metadata.
+    """
+    if config.SCRAPER_BACKEND != 'auto':
+        return scrape_with_backend(config.SCRAPER_BACKEND, pages, stop)
+
+    try:
+        talks = scrape_with_backend(HttpScraper.name, pages, stop)
+        if talks:
+            return talks
+        print("\033[93mNo talks found via HTTP, falling back to Selenium\033[0m")
     except Exception as e:
-        raise e
-    finally:
-        if driver:
-            driver.quit()
+        print(f"\033[93mHTTP scraping failed ({e}), falling back to Selenium\033[0m")
+    return scrape_with_backend(SeleniumScraper.name, pages, stop)
+
+
+def talk_slug(url: str) -> str:
+    """Derive a filesystem-friendly identifier of a talk from its URL.
+
+    Args:
+        url: The URL of the TED talk.
+
+    Returns:
+        The last path segment of the URL, e.g. "jane_doe_the_title".
+    """
+    path = urlparse(url).path.rstrip("/")
+    return os.path.basename(path) or "talk"
+
+
+class _TalkPageHTMLParser(HTMLParser):
+    """Extracts the title metadata of a talk page."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta: Dict[str, str] = {}
+        self.title = ''
+        self._in_title = False
+
+    def handle_starttag(self, tag: str, attrs: List[Any]) -> None:
+        attributes = dict(attrs)
+        if tag == 'meta':
+            key = attributes.get('property') or attributes.get('name')
+            if key and attributes.get('content'):
+                self.meta[key] = attributes['content']
+        elif tag == 'title':
+            self._in_title = True
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == 'title':
+            self._in_title = False
+
+    def handle_data(self, data: str) -> None:
+        if self._in_title:
+            self.title += data
+
+
+def parse_talk_page(html: str, url: str) -> Dict[str, str]:
+    """Parse the speaker and title of a talk page.
+
+    TED talk pages are titled "Speaker: Title | TED Talk". If the page carries
+    no such title, the title is derived from the URL.
+
+    Args:
+        html: The HTML of the talk page.
+        url: The URL of the talk.
+
+    Returns:
+        The talk metadata with "url", "speaker" and "title".
+    """
+    parser = _TalkPageHTMLParser()
+    parser.feed(html)
+    parser.close()
+    heading = (parser.meta.get('og:title') or parser.title).split(' | ')[0].strip()
+    speaker, _, title = heading.partition(': ')
+    if not title:
+        speaker = parser.meta.get('author', '')
+        title = talk_slug(url).replace('_', ' ').capitalize()
+    return {'url': url, 'speaker': speaker.strip(), 'title': title.strip()}
+
+
+def talk_from_url(url: str) -> Dict[str, str]:
+    """Look up a talk by URL without scraping the listing.
+
+    The talk is taken from the cached listing if it is listed there (at any
+    age); otherwise only the talk page itself is fetched.
+
+    Args:
+        url: The URL of the TED talk.
+
+    Returns:
+        The talk metadata with "url", "speaker" and "title".
+    """
+    for talk in (load_cached_listing(pages=0) or {}).values():
+        if talk['url'].rstrip('/') == url.rstrip('/'):
+            return talk
+    with metrics.timer("scrape.talk_page"):
+        response = clients.http().get(
+            url, headers={'User-Agent': config.SCRAPER_USER_AGENT}, timeout=config.HTTP_TIMEOUT
+        )
+        response.raise_for_status()
+    return parse_talk_page(response.text, url)
+
+
+YDL_OPTIONS = {
+    'skip_download': True,
+    'writesubtitles': True,
+    'subtitleslangs': [config.SUBTITLE_LANGUAGE],
+    'subtitlesformat': 'vtt',
+    'quiet': True,
+    'no_warnings': True,
+}
+
+_ydl_local = threading.local()
+_ydl_lock = threading.Lock()
+_ydl_instances: List[Any] = []
+_ydl_warm = threading.Event()
+_ydl_warmup_lock = threading.Lock()
+
+
+def _youtube_dl() -> Any:
+    """Return the calling thread's yt-dlp instance, created on first use.
+
+    A YoutubeDL instance must not be used by several threads at once, but
+    reusing one per thread keeps its initialized extractors, HTTP handlers and
+    cookies across talks.
+    """
+    ydl = getattr(_ydl_local, 'ydl', None)
+    if ydl is None:
+        # yt-dlp is slow to import and only needed for transcripts
+        import yt_dlp
+
+        ydl = yt_dlp.YoutubeDL(YDL_OPTIONS)
+        _ydl_local.ydl = ydl
+        with _ydl_lock:
+            _ydl_instances.append(ydl)
+    return ydl
+
+
+def _extract_info(ydl: Any, url: str) -> Dict[str, Any]:
+    """Extract the metadata of a talk with yt-dlp.
+
+    The first extraction of the process loads and initializes yt-dlp's
+    extractors, which takes seconds of CPU time; it runs alone so that
+    concurrent downloads do not all pay for it at the same time.
+    """
+    if _ydl_warm.is_set():
+        return ydl.extract_info(url, download=False)
+    with _ydl_warmup_lock:
+        try:
+            return ydl.extract_info(url, download=False)
+        finally:
+            _ydl_warm.set()
+
+
+def _close_youtube_dl() -> None:
+    with _ydl_lock:
+        instances = list(_ydl_instances)
+        _ydl_instances.clear()
+    for ydl in instances:
+        try:
+            ydl.close()
+        except Exception:
+            pass
+
+
+atexit.register(_close_youtube_dl)
+
+
+def _pick_subtitles(info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Select the English WebVTT subtitles of an extracted video, if any."""
+    requested = (info.get('requested_subtitles') or {}).get(config.SUBTITLE_LANGUAGE)
+    if requested and requested.get('ext') == 'vtt':
+        return requested
+    for subtitle in (info.get('subtitles') or {}).get(config.SUBTITLE_LANGUAGE, []):
+        if subtitle.get('ext') == 'vtt':
+            return subtitle
+    return requested
+
+
+class NoTranscriptError(Exception):
+    """Raised if a talk has no subtitles, e.g. because they are not published yet."""
 
 
 @lru_cache(maxsize=config.CACHE_SIZE)
-def transcript_downloader(url: str, outtmpl: str = config.TRANSCRIPT_PATH) -> str:
+def _download_segments(url: str) -> List[TranscriptSegment]:
+    """Download and parse the subtitles of a talk; only successful downloads are cached.
+
+    Raises:
+        NoTranscriptError: If the talk has no subtitles.
+    """
+    with metrics.timer("yt_dlp.transcript"):
+        ydl = _youtube_dl()
+        info = _extract_info(ydl, url)
+        subtitle = _pick_subtitles(info or {})
+        if not subtitle:
+            raise NoTranscriptError(f"No subtitles for {url}")
+        if subtitle.get('data'):
+            segments = parse_vtt(subtitle['data'].splitlines())
+        else:
+            with ydl.urlopen(subtitle['url']) as response:
+                segments = parse_vtt(iter_lines(response.read))
+    if not segments:
+        raise NoTranscriptError(f"Empty subtitles for {url}")
+    metrics.add("transcript_characters", sum(len(segment.text) + 1 for segment in segments))
+    return segments
+
+
+def transcript_segments(url: str) -> List[TranscriptSegment]:
+    """Fetch the subtitles of a TED talk in memory and parse them into segments.
+
+    yt-dlp only extracts the subtitle metadata; the payload is streamed from
+    the subtitle URL straight into the parser, without temporary files.
+    Missing subtitles and failed downloads are not cached, so a later call
+    tries again.
+
+    Args:
+        url: The URL of the TED talk.
+
+    Returns:
+        List of timestamped transcript segments; empty if none are available.
+
+    Raises:
+        Exception: If the download fails, e.g. on network errors.
+    """
+    if not url or not url.strip():
+        return []
+    try:
+        return _download_segments(url)
+    except NoTranscriptError:
+        return []
+
+
+def transcript_downloader(url: str) -> str:
     """Download transcript of a TED talk using yt-dlp.
     
     Args:
         url: The URL of the TED talk.
-        outtmpl: The output template for the transcript file.
         
     Returns:
         The transcript text or an error message.
+
+    Raises:
+        Exception: If the download fails, e.g. on network errors.
     """
-    if not url or not url.strip():
-        return "No transcript available."
-        
-    ydl_opts = {
-        'writesubtitles': True,
-        'skip_download': True,
-        'subtitleslang': 'en',
-        'outtmpl': outtmpl,
-        'overwrites': True,
-    }
-    
-    try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download(url)
-    except Exception as e:
-        print(f"Failed to download transcript: {e}")
+    segments = transcript_segments(url)
+    if not segments:
         return "No transcript available."
+    return segments_to_text(segments)
 
-    file_path = f'{outtmpl}.en.vtt'
-    if not os.path.exists(file_path):
-        return "No transcript available."
-    
-    lines = []
+
+def prefetch_transcripts(
+    urls: Sequence[str], workers: int = config.TRANSCRIPT_WORKERS
+) -> Iterator[Tuple[str, Optional[str]]]:
+    """Download the transcripts of several talks concurrently.
+
+    All downloads start right away on a bounded worker pool, and the
+    transcripts are yielded as they finish, so that a consumer can start
+    processing the first talk while the others are still downloading.
+
+    Args:
+        urls: The URLs of the talks.
+        workers: Maximum number of transcripts downloaded at the same time.
+
+    Yields:
+        Pairs of talk URL and transcript text (or "No transcript available."),
+        in order of completion; the text is None if the download failed.
+    """
+    if not urls:
+        return
+    executor = ThreadPoolExecutor(max_workers=max(1, min(workers, len(urls))))
+    futures = {executor.submit(transcript_downloader, url): url for url in urls}
     try:
-        with open(file_path, 'r') as file:
-            for line in file:
-                line = line.strip()
-                if not line or line.startswith('WEBVTT') or '-->' in line:
-                    continue
-                else:
-                    lines.append(line)
-        os.remove(file_path)
-        
-        result = " ".join(lines)
-        return result
-        
-    except Exception as e:
-        print(f"Failed to process transcript file: {e}")
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        return "No transcript available."
+        for future in as_completed(futures):
+            try:
+                transcript = future.result()
+            except Exception as e:
+                print(f"Failed to download transcript: {e}")
+                transcript = None
+            yield futures[future], transcript
+    finally:
+        # Pending downloads are dropped if the consumer stops early
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
@@ -0,0 +1,215 @@
+"""
+Watch mode: incrementally process newly published TED talks.
+
+Instead of reprocessing a fixed position of the listing, the watcher polls the
+listing on an interval and keeps a persistent index of the talk URLs it has
+seen. Only talks missing from the index are queued on a bounded worker pool,
+so each poll costs work proportional to the number of new talks:
+- Catch-up: listing pages are scraped until a page contains a known talk, so
+  talks published during downtime are picked up, oldest first
+- Failed talks and talks without a transcript yet are retried on later polls
+  up to WATCH_MAX_ATTEMPTS times
+- On first start the current listing is recorded as a baseline without being
+  processed, unless a backfill is requested
+- SIGINT/SIGTERM stop polling, cancel queued talks (they are picked up again
+  on the next start) and wait for the talks in progress
+"""
+
+import json
+import os
+import signal
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config import config
+from metrics import metrics
+from ted_scraper import scrape_listing
+
+# Index statuses of talks that are not processed again; talks without a
+# transcript are retried, as their subtitles are often published after the talk
+DONE_STATUSES = ("ok", "baseline")
+
+
+class SeenIndex:
+    """Persistent index of the talk URLs seen by the watcher."""
+
+    def __init__(self, path: str):
+        """Load the index, starting empty if it does not exist.
+
+        Args:
+            path: The index file path.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._talks: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._talks = json.load(f).get("talks", {})
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._talks)
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return url in self._talks
+
+    def is_done(self, url: str) -> bool:
+        """Return whether a talk needs no further processing."""
+        with self._lock:
+            entry = self._talks.get(url)
+        return entry is not None and (
+            entry["status"] in DONE_STATUSES or entry.get("attempts", 0) >= config.WATCH_MAX_ATTEMPTS
+        )
+
+    def mark(self, talk: Dict[str, str], status: str, error: Optional[str] = None) -> None:
+        """Record the outcome of a talk and persist the index.
+
+        Args:
+            talk: The talk metadata with "url", "speaker" and "title".
+            status: "ok", "no transcript", "failed" or "baseline".
+            error: The error message of a failed talk.
+        """
+        with self._lock:
+            entry = self._talks.setdefault(talk["url"], {"attempts": 0})
+            entry.update({
+                "speaker": talk["speaker"],
+                "title": talk["title"],
+                "status": status,
+                "error": error,
+                "updated": time.time(),
+            })
+            if status != "baseline":
+                entry["attempts"] += 1
+            self._save()
+
+    def _save(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"talks": self._talks}, f, indent=2, ensure_ascii=False)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, self.path)
+
+
+class Watcher:
+    """Polls the talk listing and processes new talks on a bounded worker pool."""
+
+    def __init__(
+        self,
+        process: Callable[[dict], bool],
+        index: SeenIndex,
+        interval: float = config.WATCH_INTERVAL,
+        workers: int = config.BATCH_WORKERS,
+        max_pages: int = config.WATCH_MAX_PAGES,
+        backfill: bool = False,
+        on_poll: Optional[Callable[[], None]] = None,
+    ):
+        """Initialize the watcher.
+
+        Args:
+            process: Callable processing a single talk; returns False if the talk
+                has no transcript and raises on failure.
+            index: The persistent index of seen talks.
+            interval: Seconds between polls of the listing.
+            workers: Maximum number of talks processed at the same time.
+            max_pages: Maximum number of listing pages scraped to catch up.
+            backfill: If True, an empty index does not record the current listing
+                as a baseline, so the listed talks are processed.
+            on_poll: Optional callable invoked after each poll, e.g. to export metrics.
+        """
+        self.process = process
+        self.index = index
+        self.interval = interval
+        self.workers = max(1, workers)
+        self.max_pages = max(1, max_pages)
+        self.backfill = backfill
+        self.on_poll = on_poll
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+
+    def stop(self) -> None:
+        """Request a graceful shutdown."""
+        self._stop.set()
+
+    def poll(self, executor: ThreadPoolExecutor) -> int:
+        """Scrape the listing and queue the talks that still need processing.
+
+        Args:
+            executor: The worker pool.
+
+        Returns:
+            Number of queued talks.
+        """
+        with metrics.timer("watch.poll"):
+            talks = list(scrape_listing(
+                self.max_pages, stop=lambda page: any(talk["url"] in self.index for talk in page)
+            ).values())
+        metrics.add("watch_polls")
+
+        if not len(self.index) and not self.backfill:
+            for talk in talks:
+                self.index.mark(talk, "baseline")
+            print(f"\033[92mRecorded {len(talks)} listed talks as baseline; watching for new talks\033[0m")
+            return 0
+
+        queued = 0
+        # The listing is newest first; catch up in publication order
+        for talk in reversed(talks):
+            with self._lock:
+                if talk["url"] in self._in_flight or self.index.is_done(talk["url"]):
+                    continue
+                self._in_flight[talk["url"]] = executor.submit(self._run, talk)
+            queued += 1
+        metrics.add("watch_new_talks", queued)
+        return queued
+
+    def _run(self, talk: dict) -> None:
+        start = time.perf_counter()
+        try:
+            status = "ok" if self.process(talk) else "no transcript"
+            error = None
+        except Exception as e:
+            status, error = "failed", str(e)
+        self.index.mark(talk, status, error)
+        with self._lock:
+            self._in_flight.pop(talk["url"], None)
+        color = "92" if status == "ok" else "91"
+        print(f"\033[{color}m{talk['title']}: {status} ({time.perf_counter() - start:.1f}s)\033[0m")
+        if error:
+            print(f"      {error}"[:config.TEXT_WIDTH])
+
+    def run(self) -> None:
+        """Poll until stopped by stop(), SIGINT or SIGTERM."""
+        previous = {}
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                previous[sig] = signal.signal(sig, self._handle_signal)
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            while not self._stop.is_set():
+                try:
+                    queued = self.poll(executor)
+                    if queued:
+                        print(f"\033[92mQueued {queued} new talks\033[0m")
+                except Exception as e:
+                    print(f"\033[91mPolling the listing failed: {e}\033[0m")
+                if self.on_poll:
+                    self.on_poll()
+                self._stop.wait(self.interval)
+        finally:
+            with self._lock:
+                deferred = sum(future.cancel() for future in self._in_flight.values())
+            print(f"\033[93mShutting down: {deferred} queued talks deferred, waiting for talks in progress\033[0m")
+            executor.shutdown(wait=True)
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+
+    def _handle_signal(self, signum: int, frame: Any) -> None:
+        self.stop()